@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -37,3 +39,17 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True, scope='session')
+def isolated_storage():
+    from core.runner import isolated_storage
+    with isolated_storage():
+        yield
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(isolated_storage, django_db_setup):
+    """Тестовая база создаётся, когда хранилища уже во временном
+    каталоге: миграции не пишут в рабочий кэш.
+    """
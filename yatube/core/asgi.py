@@ -0,0 +1,342 @@
+"""Вспомогательные функции для ASGI-приложений проекта.
+
+Django 2.2 не умеет обслуживать запросы по ASGI, поэтому ``yatube.asgi``
+собирает приложение из частей этого модуля. ``AsyncRouter`` отдаёт
+страницы, для которых есть асинхронный вариант view, через
+``AsyncViewHandler``, а остальные запросы — обычному WSGI-приложению
+Django через ``WsgiBridge``. Синхронная работа (запросы к БД, кэш,
+рендеринг шаблонов, middleware, весь WSGI-обработчик) выполняется в
+общем пуле из ASGI_THREADS потоков, поэтому медленные клиенты не
+занимают потоки. Запрос к асинхронному view занимает поток только на
+время отдельных синхронных шагов, а WSGI-запрос — на всё время
+обработки.
+"""
+import asyncio
+import io
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from django.conf import settings
+from django.core import signals
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import response_for_exception
+from django.core.handlers.wsgi import WSGIRequest, get_script_name
+from django.db import close_old_connections
+from django.urls import (
+    Resolver404, get_resolver, resolve, set_script_prefix
+)
+from django.utils.module_loading import import_string
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Общий ограниченный пул потоков для синхронной работы."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.ASGI_THREADS,
+                    thread_name_prefix='asgi',
+                )
+    return _executor
+
+
+def _call_closing(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_sync(func, *args, **kwargs):
+    """Выполнить синхронную функцию в пуле потоков."""
+    return await asyncio.get_running_loop().run_in_executor(
+        get_executor(), _call_closing, func, args, kwargs
+    )
+
+
+def get_header(scope, name):
+    """Значение заголовка запроса или пустая строка."""
+    name = name.lower().encode('latin-1')
+    for key, value in scope.get('headers', ()):
+        if key.lower() == name:
+            return value.decode('latin-1')
+    return ''
+
+
+def get_query(scope):
+    """Параметры строки запроса: последнее значение каждого."""
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return {key: values[-1] for key, values in query.items()}
+
+
+def get_cookie(scope, name):
+    cookie = SimpleCookie()
+    cookie.load(get_header(scope, 'cookie'))
+    morsel = cookie.get(name)
+    return morsel.value if morsel is not None else None
+
+
+async def read_body(receive):
+    """Тело запроса целиком или None, если клиент отключился."""
+    body = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body.append(message.get('body', b''))
+        if not message.get('more_body', False):
+            return b''.join(body)
+
+
+def build_environ(scope, body):
+    """WSGI-окружение для запроса из ASGI scope."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', ''),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for key, value in scope.get('headers', ()):
+        name = key.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+async def send_response(send, status, body=b'', headers=None,
+                        content_type='text/plain; charset=utf-8'):
+    """Отправить ответ целиком одним сообщением."""
+    if headers is None:
+        headers = [('Content-Type', content_type)]
+    headers = [
+        (name.encode('latin-1'), value.encode('latin-1'))
+        for name, value in headers
+        if name.lower() != 'content-length'
+    ]
+    headers.append((b'content-length', str(len(body)).encode('latin-1')))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers,
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+def get_response_headers(response):
+    """Заголовки и cookies ответа Django списком пар."""
+    headers = list(response.items())
+    headers += [
+        ('Set-Cookie', morsel.output(header='').strip())
+        for morsel in response.cookies.values()
+    ]
+    return headers
+
+
+class WsgiBridge:
+    """ASGI-приложение, вызывающее WSGI-приложение в пуле потоков.
+
+    Ответ собирается в потоке целиком: потоковые ответы (файлы)
+    проекта отдаёт веб-сервер, а не Django.
+    """
+
+    def __init__(self, wsgi_application):
+        self.wsgi_application = wsgi_application
+
+    def call_wsgi(self, environ):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'] = int(status.split(' ', 1)[0])
+            started['headers'] = headers
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return started['status'], started['headers'], body
+
+    async def __call__(self, scope, receive, send, body=None):
+        if body is None:
+            body = await read_body(receive)
+            if body is None:
+                return
+        status, headers, body = await run_sync(
+            self.call_wsgi, build_environ(scope, body)
+        )
+        await send_response(send, status, body, headers=headers)
+
+
+class AsyncViewHandler:
+    """Обработчик Django, в котором вместо view выполняется его
+    асинхронный вариант.
+
+    ``views`` сопоставляет имя URL асинхронному view. Middleware из
+    MIDDLEWARE применяются через свои методы ``process_request``,
+    ``process_view``, ``process_exception``, ``process_template_response``
+    и ``process_response`` в том же порядке, что и в WSGI-приложении.
+    Методы до view и после него выполняются отдельными короткими
+    вызовами в общем пуле, а сам view ждёт в цикле событий, не занимая
+    поток. Middleware, работающие только в ``__call__``, здесь не
+    выполняются: это профилирование, и запросы с заголовком X-Profile
+    обслуживает WSGI.
+    """
+
+    def __init__(self, views):
+        self.views = views
+        self.middleware = []
+        for middleware_path in settings.MIDDLEWARE:
+            middleware = import_string(middleware_path)
+            try:
+                self.middleware.append(middleware(None))
+            except MiddlewareNotUsed:
+                pass
+
+    def hooks(self, name, reverse=False):
+        middleware = reversed(self.middleware) if reverse else self.middleware
+        for instance in middleware:
+            hook = getattr(instance, name, None)
+            if hook is not None:
+                yield hook
+
+    def start(self, environ):
+        """Запрос Django, прошедший middleware до view.
+
+        Возвращает запрос и ответ, если его уже дал какой-то middleware
+        или обработка ошибки.
+        """
+        set_script_prefix(get_script_name(environ))
+        signals.request_started.send(sender=self.__class__, environ=environ)
+        request = WSGIRequest(environ)
+        try:
+            for hook in self.hooks('process_request'):
+                response = hook(request)
+                if response is not None:
+                    return request, response
+            match = get_resolver(getattr(request, 'urlconf', None)).resolve(
+                request.path_info
+            )
+            request.resolver_match = match
+            for hook in self.hooks('process_view'):
+                response = hook(request, match.func, match.args, match.kwargs)
+                if response is not None:
+                    return request, response
+        except Exception as error:
+            return request, self.handle_exception(request, error)
+        return request, None
+
+    def handle_exception(self, request, error, view_hooks=False):
+        """Ответ на исключение, как его построил бы Django."""
+        try:
+            # Обработчик ошибок Django читает sys.exc_info() этого потока.
+            raise error
+        except Exception:
+            if view_hooks:
+                for hook in self.hooks('process_exception', reverse=True):
+                    response = hook(request, error)
+                    if response is not None:
+                        return response
+            return response_for_exception(request, error)
+
+    def finish(self, request, response):
+        """Провести ответ через middleware и собрать его для отправки."""
+        try:
+            if callable(getattr(response, 'render', None)):
+                for hook in self.hooks(
+                    'process_template_response', reverse=True
+                ):
+                    response = hook(request, response)
+                response = response.render()
+            for hook in self.hooks('process_response', reverse=True):
+                response = hook(request, response)
+        except Exception as error:
+            response = self.handle_exception(request, error)
+        try:
+            return (
+                response.status_code,
+                get_response_headers(response),
+                response.content,
+            )
+        finally:
+            # Отправляет request_finished и закрывает соединения с БД.
+            response.close()
+
+    async def __call__(self, scope, body):
+        request, response = await run_sync(
+            self.start, build_environ(scope, body)
+        )
+        if response is None:
+            match = request.resolver_match
+            try:
+                response = await self.views[match.view_name](
+                    request, *match.args, **match.kwargs
+                )
+            except Exception as error:
+                response = await run_sync(
+                    self.handle_exception, request, error, True
+                )
+        return await run_sync(self.finish, request, response)
+
+
+class AsyncRouter:
+    """Отдаёт анонимные GET-запросы асинхронным view.
+
+    ``views`` сопоставляет имя URL асинхронному view, который получает
+    запрос Django и аргументы из URL и возвращает HttpResponse; запрос
+    проходит через middleware в ``AsyncViewHandler``. Запросы с cookie
+    сессии или заголовком X-Profile, другие методы и адреса без
+    асинхронного view обслуживает ``fallback``: асинхронные view
+    показывают страницы анонимному читателю.
+    """
+
+    def __init__(self, views, fallback):
+        self.handler = AsyncViewHandler(views)
+        self.fallback = fallback
+
+    def has_view(self, scope):
+        if scope['method'] != 'GET':
+            return False
+        if get_cookie(scope, settings.SESSION_COOKIE_NAME):
+            return False
+        if get_header(scope, 'x-profile'):
+            return False
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            return False
+        return match.view_name in self.handler.views
+
+    async def __call__(self, scope, receive, send):
+        body = await read_body(receive)
+        if body is None:
+            return
+        if not self.has_view(scope):
+            await self.fallback(scope, receive, send, body=body)
+            return
+        status, headers, body = await self.handler(scope, body)
+        await send_response(send, status, body, headers=headers)
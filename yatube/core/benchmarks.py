@@ -0,0 +1,108 @@
+"""Реестр сценариев для команды ``python manage.py bench``.
+
+Сценарии объявляются в модулях ``benchmarks`` приложений декоратором
+``benchmark`` и получают ``stdout`` команды и число повторов.
+"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.sessions import flush_sessions
+
+registry = {}
+
+
+def benchmark(name):
+    """Зарегистрировать сценарий под именем name."""
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+@contextmanager
+def timer(results, label):
+    """Записать в results[label] время выполнения блока в секундах."""
+    start = time.perf_counter()
+    yield
+    results[label] = time.perf_counter() - start
+
+
+def time_calls(func, iterations):
+    """Среднее время одного вызова func в секундах."""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def report(stdout, title, rows):
+    """Вывести таблицу результатов: строки — пары (подпись, значение)."""
+    stdout.write(title)
+    width = max(len(label) for label, _ in rows)
+    for label, value in rows:
+        if isinstance(value, float):
+            value = f'{value * 1000:.2f} мс'
+        stdout.write(f'  {label.ljust(width)}  {value}')
+
+
+def _count_session_writes(queries):
+    return sum(
+        1 for query in queries
+        if 'django_session' in query['sql']
+        and query['sql'].split(None, 1)[0] in ('INSERT', 'UPDATE', 'DELETE')
+    )
+
+
+@benchmark('sessions')
+def sessions_benchmark(stdout, iterations):
+    """Записи в django_session при входе через LoginView и просмотрах
+    страниц для стандартного движка и core.sessions.
+    """
+    password = 'bench-password'
+    user = get_user_model().objects.create_user(
+        username='bench-sessions', password=password
+    )
+    engines = ('django.contrib.sessions.backends.db', 'core.sessions')
+    rows = []
+    with tempfile.TemporaryDirectory() as queue_dir:
+        for engine in engines:
+            cache.clear()
+            with override_settings(
+                SESSION_ENGINE=engine,
+                TASKS_ALWAYS_EAGER=False,
+                TASKS_QUEUE_PATH=os.path.join(queue_dir, 'tasks.sqlite3'),
+                PASSWORD_HASHERS=[
+                    'django.contrib.auth.hashers.MD5PasswordHasher'
+                ],
+            ):
+                user.set_password(password)
+                user.save()
+                results = {}
+                with CaptureQueriesContext(connection) as queries, \
+                        timer(results, 'requests'):
+                    for _ in range(iterations):
+                        client = Client()
+                        client.post(reverse('users:login'), {
+                            'username': user.username, 'password': password
+                        })
+                        client.get(reverse('posts:follow_index'))
+                request_writes = _count_session_writes(queries)
+                with CaptureQueriesContext(connection) as queries:
+                    if engine == 'core.sessions':
+                        flush_sessions()
+                flush_writes = _count_session_writes(queries)
+            rows += [
+                (f'{engine}: записей в запросах', request_writes),
+                (f'{engine}: записей при сбросе', flush_writes),
+                (f'{engine}: время запросов', results['requests']),
+            ]
+    report(stdout, f'Сессии, входов и просмотров: {iterations}', rows)
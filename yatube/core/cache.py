@@ -0,0 +1,162 @@
+"""Кэш в отдельном файле SQLite, общий для всех процессов сервера.
+
+LocMemCache живёт в памяти одного процесса: выход из аккаунта, сброс
+счётчиков или лимит запросов, сделанные в одном воркере, не видны в
+остальных. Этот бэкенд хранит записи в файле рядом с очередью задач,
+поэтому его видят все процессы на машине, а ``add()`` и ``incr()``
+атомарны между ними. Просроченные записи удаляются лениво при чтении и
+пачками при записи.
+"""
+import pickle
+import random
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from core.tasks import LocalStore
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires);
+'''
+# Ограничение SQLite на количество параметров в одном запросе.
+CHUNK_SIZE = 500
+# Доля записей, после которых проверяется размер таблицы.
+CULL_PROBABILITY = 0.01
+
+
+class CacheStore(LocalStore):
+    schema = SCHEMA
+
+
+class SQLiteCache(BaseCache):
+    """Бэкенд кэша; LOCATION — путь к файлу SQLite."""
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self.store = CacheStore(location)
+
+    def prepare_key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        keys = {self.prepare_key(key, version): key for key in keys}
+        result = {}
+        stored = list(keys)
+        for start in range(0, len(stored), CHUNK_SIZE):
+            chunk = stored[start:start + CHUNK_SIZE]
+            rows = self.store.connection.execute(
+                'SELECT key, value FROM cache_entry WHERE key IN ({}) '
+                'AND (expires IS NULL OR expires > ?)'.format(
+                    ', '.join('?' * len(chunk))
+                ),
+                (*chunk, time.time())
+            )
+            for key, value in rows:
+                result[keys[key]] = pickle.loads(value)
+        return result
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.prepare_key(key, version)
+        self.store.connection.execute(
+            'INSERT OR REPLACE INTO cache_entry (key, value, expires) '
+            'VALUES (?, ?, ?)',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             self.get_backend_timeout(timeout))
+        )
+        self.maybe_cull()
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.prepare_key(key, version)
+        # Просроченная запись считается отсутствующей и перезаписывается.
+        cursor = self.store.connection.execute(
+            'INSERT INTO cache_entry (key, value, expires) VALUES (?, ?, ?) '
+            'ON CONFLICT (key) DO UPDATE SET '
+            'value = excluded.value, expires = excluded.expires '
+            'WHERE cache_entry.expires <= ?',
+            (key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+             self.get_backend_timeout(timeout), time.time())
+        )
+        self.maybe_cull()
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.prepare_key(key, version)
+        with self.store.transaction() as connection:
+            row = connection.execute(
+                'SELECT value FROM cache_entry WHERE key = ? '
+                'AND (expires IS NULL OR expires > ?)',
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache_entry SET value = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), key)
+            )
+        return value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.prepare_key(key, version)
+        cursor = self.store.connection.execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time())
+        )
+        return cursor.rowcount > 0
+
+    def has_key(self, key, version=None):
+        key = self.prepare_key(key, version)
+        return self.store.connection.execute(
+            'SELECT 1 FROM cache_entry WHERE key = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (key, time.time())
+        ).fetchone() is not None
+
+    def delete(self, key, version=None):
+        key = self.prepare_key(key, version)
+        self.store.connection.execute(
+            'DELETE FROM cache_entry WHERE key = ?', (key,)
+        )
+
+    def clear(self):
+        self.store.connection.execute('DELETE FROM cache_entry')
+
+    def maybe_cull(self):
+        """Изредка удалять просроченные записи и лишние при переполнении.
+
+        Проверка идёт примерно на каждой сотой записи, чтобы обычная
+        запись не считала строки таблицы; при переполнении удаляется
+        1/CULL_FREQUENCY записей.
+        """
+        if random.random() >= CULL_PROBABILITY:
+            return
+        connection = self.store.connection
+        connection.execute(
+            'DELETE FROM cache_entry WHERE expires <= ?', (time.time(),)
+        )
+        count, = connection.execute(
+            'SELECT COUNT(*) FROM cache_entry'
+        ).fetchone()
+        if count <= self._max_entries:
+            return
+        if not self._cull_frequency:
+            self.clear()
+            return
+        # Первыми вытесняются записи, которые истекут раньше других.
+        connection.execute(
+            'DELETE FROM cache_entry WHERE key IN ('
+            'SELECT key FROM cache_entry ORDER BY expires IS NULL, expires '
+            'LIMIT ?)',
+            (count // self._cull_frequency,)
+        )
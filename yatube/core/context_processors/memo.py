@@ -0,0 +1,10 @@
+from django.utils.functional import SimpleLazyObject
+
+from core.memo import get_nav_urls
+
+
+def memo(request):
+    """Добавляет адреса ссылок шапки, вычисляемые один раз за запрос."""
+    return {
+        'nav_urls': SimpleLazyObject(lambda: get_nav_urls(request)),
+    }
@@ -0,0 +1,81 @@
+"""SQLite с настройками для работы под нагрузкой.
+
+Для каждого нового соединения включается WAL (читатели не ждут
+писателя) и выставляются PRAGMA из OPTIONS['pragmas']. Запросы вне
+транзакции, упавшие с ``database is locked`` после ожидания ``timeout``,
+повторяются несколько раз с нарастающей паузой.
+
+Блоки ``atomic`` открывают транзакцию командой ``BEGIN IMMEDIATE``
+(режим задаётся OPTIONS['transaction_mode']): блокировка записи
+берётся сразу, и ожидание вместе с повторами приходится на сам BEGIN.
+При отложенном BEGIN первая запись внутри блока могла упасть с
+``database is locked``, а повторить её уже нельзя.
+
+Внутри открытой транзакции запрос не повторяется: в режиме WAL её
+снимок устарел, если другой процесс успел записать, и повтор снова
+упадёт, пока транзакция не откатится. Такая ошибка пробрасывается
+сразу.
+"""
+import time
+
+from django.db.backends.sqlite3 import base
+
+Database = base.Database
+
+DEFAULT_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -20000,
+    'mmap_size': 128 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+
+class SQLiteCursorWrapper(base.SQLiteCursorWrapper):
+    lock_retries = 0
+    lock_retry_delay = 0
+
+    def execute(self, query, params=None):
+        return self._retry(super().execute, query, params)
+
+    def executemany(self, query, param_list):
+        return self._retry(super().executemany, query, param_list)
+
+    def _retry(self, method, *args):
+        # Вне транзакции неудачный запрос ничего не изменил и не держит
+        # снимок, поэтому его можно выполнить заново. Сюда же попадает
+        # BEGIN, открывающий транзакцию.
+        retries = 0 if self.connection.in_transaction else self.lock_retries
+        for attempt in range(retries + 1):
+            try:
+                return method(*args)
+            except Database.OperationalError as error:
+                if ('database is locked' not in str(error)
+                        or attempt == retries):
+                    raise
+                time.sleep(self.lock_retry_delay * 2 ** attempt)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = {**DEFAULT_PRAGMAS, **params.pop('pragmas', {})}
+        self.lock_retries = params.pop('lock_retries', 3)
+        self.lock_retry_delay = params.pop('lock_retry_delay', 0.05)
+        self.transaction_mode = params.pop('transaction_mode', 'IMMEDIATE')
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
+
+    def create_cursor(self, name=None):
+        cursor = self.connection.cursor(factory=SQLiteCursorWrapper)
+        cursor.lock_retries = self.lock_retries
+        cursor.lock_retry_delay = self.lock_retry_delay
+        return cursor
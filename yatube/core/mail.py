@@ -0,0 +1,110 @@
+"""Отправка почты через очередь фоновых задач.
+
+``QueuedEmailBackend`` только сериализует письма и ставит на каждое
+задачу ``deliver_email``; воркер отправляет их настоящим бэкендом из
+EMAIL_DELIVERY_BACKEND, переиспользуя одно соединение на процесс.
+"""
+import base64
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from core.tasks import task
+
+_delivery_connection = (None, None)
+
+
+def serialize_message(message):
+    """Представить письмо в виде, пригодном для JSON."""
+    attachments = []
+    for filename, content, mimetype in message.attachments:
+        if isinstance(content, str):
+            content = content.encode()
+        attachments.append(
+            (filename, base64.b64encode(content).decode(), mimetype)
+        )
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'attachments': attachments,
+    }
+
+
+def deserialize_message(data, connection=None):
+    """Восстановить письмо, сохранённое serialize_message."""
+    message = EmailMultiAlternatives(
+        subject=data['subject'],
+        body=data['body'],
+        from_email=data['from_email'],
+        to=data['to'],
+        cc=data['cc'],
+        bcc=data['bcc'],
+        reply_to=data['reply_to'],
+        headers=data['headers'],
+        alternatives=[tuple(item) for item in data['alternatives']],
+        connection=connection,
+    )
+    for filename, content, mimetype in data['attachments']:
+        message.attach(filename, base64.b64decode(content), mimetype)
+    return message
+
+
+def get_delivery_connection():
+    """Открытое соединение настоящего бэкенда, общее для процесса."""
+    global _delivery_connection
+    backend, connection = _delivery_connection
+    if backend != settings.EMAIL_DELIVERY_BACKEND:
+        reset_delivery_connection()
+        backend = settings.EMAIL_DELIVERY_BACKEND
+        connection = get_connection(backend)
+        connection.open()
+        _delivery_connection = (backend, connection)
+    return connection
+
+
+def reset_delivery_connection():
+    """Закрыть соединение, чтобы повтор задачи открыл новое."""
+    global _delivery_connection
+    _, connection = _delivery_connection
+    if connection is not None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    _delivery_connection = (None, None)
+
+
+@task(max_retries=5, retry_delay=30)
+def deliver_email(message):
+    """Отправить одно письмо; после всех неудачных попыток задача
+    остаётся в очереди со статусом dead.
+    """
+    connection = get_delivery_connection()
+    try:
+        connection.send_messages([deserialize_message(message, connection)])
+    except Exception:
+        reset_delivery_connection()
+        raise
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь вместо отправки во время запроса.
+
+    Каждое письмо — отдельная задача: повтор после ошибки отправляет
+    только не доставленное письмо, а не всю пачку заново.
+    """
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        for message in email_messages:
+            deliver_email.delay(serialize_message(message))
+        return len(email_messages)
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from core.paginator import analyze
+
+
+class Command(BaseCommand):
+    help = (
+        'Обновляет статистику SQLite, по которой админка оценивает '
+        'размер таблиц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Псевдоним базы данных.'
+        )
+
+    def handle(self, *args, **options):
+        if analyze(options['database']):
+            self.stdout.write('Статистика таблиц обновлена.')
+        else:
+            self.stdout.write('Статистика нужна только для SQLite.')
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import (
+    setup_test_environment, teardown_test_environment
+)
+from django.utils.module_loading import autodiscover_modules
+
+from core.benchmarks import registry
+from core.runner import isolated_storage
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает сценарии нагрузочного сравнения на временной тестовой '
+        'базе данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'names', nargs='*',
+            help='Имена сценариев; без аргументов — все.'
+        )
+        parser.add_argument(
+            '--iterations', type=int, default=100,
+            help='Количество повторов в каждом сценарии.'
+        )
+
+    def handle(self, *args, **options):
+        autodiscover_modules('benchmarks')
+        names = options['names'] or sorted(registry)
+        unknown = set(names) - set(registry)
+        if unknown:
+            raise CommandError(
+                f'Неизвестные сценарии: {", ".join(sorted(unknown))}. '
+                f'Доступны: {", ".join(sorted(registry))}.'
+            )
+        setup_test_environment()
+        # Хранилища переносятся до создания базы: миграции и сигналы
+        # не должны писать в рабочий кэш и очередь задач.
+        with isolated_storage():
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(
+                verbosity=0, autoclobber=True
+            )
+            try:
+                for name in names:
+                    registry[name](self.stdout, options['iterations'])
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                teardown_test_environment()
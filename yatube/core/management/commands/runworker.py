@@ -0,0 +1,67 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import get_queue, run_task
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди в пуле процессов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int,
+            default=settings.TASKS_WORKER_PROCESSES,
+            help='Количество процессов в пуле.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=settings.TASKS_WORKER_BATCH,
+            help='Сколько задач забирать из очереди за раз.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.TASKS_POLL_INTERVAL,
+            help='Пауза в секундах, если очередь пуста.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        queue = get_queue()
+        # Дочерние процессы не должны наследовать открытые соединения.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=options['processes'], initializer=django.setup
+        ) as pool:
+            try:
+                self._work(queue, pool, options)
+            except KeyboardInterrupt:
+                self.stdout.write('Воркер остановлен.')
+
+    def _work(self, queue, pool, options):
+        while True:
+            queue.requeue_stale(settings.TASKS_STALE_TIMEOUT)
+            tasks = queue.claim(options['batch'])
+            if not tasks:
+                if options['once']:
+                    return
+                time.sleep(options['poll_interval'])
+                continue
+            futures = {
+                pool.submit(run_task, name, payload): (task_id, name)
+                for task_id, name, payload in tasks
+            }
+            for future in as_completed(futures):
+                task_id, name = futures[future]
+                error = future.result()
+                if error is None:
+                    queue.complete(task_id)
+                    continue
+                queue.fail(task_id, error)
+                self.stderr.write(f'Задача {name} #{task_id}: {error}')
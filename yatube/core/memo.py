@@ -0,0 +1,31 @@
+"""Значения, вычисляемые не больше одного раза за запрос."""
+from django.urls import reverse
+
+NAV_URL_NAMES = (
+    'posts:index',
+    'posts:follow_index',
+    'posts:group_index',
+    'posts:post_create',
+    'posts:notifications',
+    'about:author',
+    'about:tech',
+    'users:login',
+    'users:logout',
+    'users:signup',
+    'users:password_change',
+)
+
+
+def request_memo(request, key, factory):
+    """Вернуть factory() для ключа key, вычислив его один раз за запрос."""
+    memo = request.__dict__.setdefault('_memo', {})
+    if key not in memo:
+        memo[key] = factory()
+    return memo[key]
+
+
+def get_nav_urls(request):
+    """Адреса ссылок шапки сайта; ключ — имя URL с '_' вместо ':'."""
+    return request_memo(request, 'nav_urls', lambda: {
+        name.replace(':', '_'): reverse(name) for name in NAV_URL_NAMES
+    })
@@ -0,0 +1,127 @@
+"""Выборочное профилирование запросов.
+
+Профилируется доля запросов PROFILING_SAMPLE_RATE и любой запрос с
+подписанным заголовком X-Profile (значение выдаёт страница профилей в
+админке). Для запроса сохраняются статистика cProfile (``.prof``) и
+свёрнутые стеки сэмплирующего профайлера (``.stacks``) — формат,
+понятный flamegraph.pl и speedscope. Хранятся последние
+PROFILING_MAX_FILES запросов.
+"""
+import cProfile
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+HEADER_SALT = 'core.middleware.profiling'
+HEADER_VALUE = 'profile'
+
+
+def make_profile_header():
+    """Подписанное значение заголовка X-Profile."""
+    return signing.dumps(HEADER_VALUE, salt=HEADER_SALT)
+
+
+def has_profile_header(request):
+    value = request.META.get('HTTP_X_PROFILE')
+    if not value:
+        return False
+    try:
+        return signing.loads(
+            value,
+            salt=HEADER_SALT,
+            max_age=settings.PROFILING_HEADER_MAX_AGE
+        ) == HEADER_VALUE
+    except signing.BadSignature:
+        return False
+
+
+class StackSampler(threading.Thread):
+    """Периодически снимает стек потока, обрабатывающего запрос."""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f'{code.co_name} ({code.co_filename}:'
+                             f'{frame.f_lineno})')
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def list_profiles():
+    """Имена сохранённых файлов профилей, новые первыми."""
+    directory = settings.PROFILING_DIR
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.listdir(directory), reverse=True)
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not (has_profile_header(request)
+                or random.random() < settings.PROFILING_SAMPLE_RATE):
+            return self.get_response(request)
+        sampler = StackSampler(
+            threading.get_ident(), settings.PROFILING_SAMPLE_INTERVAL
+        )
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        sampler.start()
+        try:
+            response = profiler.runcall(self.get_response, request)
+        finally:
+            sampler.stop()
+        elapsed = time.perf_counter() - start
+        self._save(request, profiler, sampler.stacks, elapsed)
+        return response
+
+    def _save(self, request, profiler, stacks, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view_name = match.view_name if match else 'unresolved'
+        view_name = view_name.replace(':', '.')
+        directory = settings.PROFILING_DIR
+        os.makedirs(directory, exist_ok=True)
+        base_name = os.path.join(
+            directory,
+            f'{time.strftime("%Y%m%d-%H%M%S")}-{time.time_ns() % 10**9:09d}'
+            f'-{view_name}-{elapsed * 1000:.0f}ms'
+        )
+        profiler.dump_stats(f'{base_name}.prof')
+        with open(f'{base_name}.stacks', 'w') as stacks_file:
+            for stack, count in stacks.items():
+                stacks_file.write(f'{stack} {count}\n')
+        self._rotate()
+
+    def _rotate(self):
+        names = list_profiles()
+        prefixes = sorted({name.rsplit('.', 1)[0] for name in names})
+        stale = set(prefixes[:-settings.PROFILING_MAX_FILES])
+        for name in names:
+            if name.rsplit('.', 1)[0] in stale:
+                os.remove(os.path.join(settings.PROFILING_DIR, name))
@@ -0,0 +1,26 @@
+"""Ограничение частоты запросов к view из настройки RATELIMITS.
+
+Проверка выполняется в ``process_view``, то есть до вызова view и до
+любых запросов к БД; для определения пользователя нужна только сессия.
+"""
+from django.conf import settings
+
+from core.ratelimit import is_limited, too_many_requests
+
+
+class RateLimitMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        config = settings.RATELIMITS.get(match.view_name) if match else None
+        if config is None:
+            return None
+        rate, methods = config
+        if is_limited(request, match.view_name, rate, methods):
+            return too_many_requests(request)
+        return None
@@ -0,0 +1,123 @@
+"""MinHash-подписи текстов и LSH-индекс для поиска похожих.
+
+Текст превращается в множество признаков (слов или n-грамм слов),
+подпись — минимумы NUM_PERM независимых хеш-функций по признакам.
+Доля совпадающих позиций двух подписей оценивает коэффициент Жаккара
+множеств. ``LSHIndex`` делит подпись на ``bands`` полос и кладёт объект
+в корзину каждой полосы, поэтому кандидаты на сходство находятся
+поиском по словарю, без перебора всех объектов.
+"""
+import re
+import zlib
+
+import numpy as np
+
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text, min_length=1):
+    """Слова текста в нижнем регистре."""
+    return [
+        word for word in WORD_RE.findall(text.lower())
+        if len(word) >= min_length
+    ]
+
+
+def shingles(tokens, size):
+    """Множество n-грамм из size соседних слов."""
+    if len(tokens) < size:
+        return {' '.join(tokens)} if tokens else set()
+    return {
+        ' '.join(tokens[start:start + size])
+        for start in range(len(tokens) - size + 1)
+    }
+
+
+class MinHasher:
+    def __init__(self, num_perm, seed=1):
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = generator.randint(
+            1, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64
+        )
+        self.b = generator.randint(
+            0, int(MERSENNE_PRIME), size=num_perm, dtype=np.uint64
+        )
+
+    def signature(self, features):
+        """Подпись множества строк: массив uint32 длины num_perm."""
+        if not features:
+            return np.full(self.num_perm, MAX_HASH, dtype=np.uint32)
+        hashes = np.fromiter(
+            (zlib.crc32(feature.encode()) for feature in features),
+            dtype=np.uint64,
+            count=len(features),
+        )
+        # Переполнение uint64 при умножении допустимо: нужна лишь
+        # равномерная перестановка значений.
+        with np.errstate(over='ignore'):
+            values = (
+                np.outer(hashes, self.a) + self.b
+            ) % MERSENNE_PRIME & MAX_HASH
+        return values.min(axis=0).astype(np.uint32)
+
+
+def similarity(first, second):
+    """Оценка коэффициента Жаккара по двум подписям."""
+    return float(np.count_nonzero(first == second)) / len(first)
+
+
+class LSHIndex:
+    """Корзины полос подписей: ключ объекта находится по любой полосе."""
+
+    def __init__(self, num_perm, bands):
+        if num_perm % bands:
+            raise ValueError('num_perm должно делиться на bands.')
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.buckets = [{} for _ in range(bands)]
+        self.signatures = {}
+
+    def band_keys(self, signature):
+        return [
+            signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def insert(self, key, signature):
+        self.remove(key)
+        self.signatures[key] = signature
+        for buckets, band_key in zip(self.buckets, self.band_keys(signature)):
+            buckets.setdefault(band_key, set()).add(key)
+
+    def remove(self, key):
+        signature = self.signatures.pop(key, None)
+        if signature is None:
+            return
+        for buckets, band_key in zip(self.buckets, self.band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del buckets[band_key]
+
+    def candidates(self, signature):
+        """Ключи, совпавшие с подписью хотя бы в одной полосе."""
+        found = set()
+        for buckets, band_key in zip(self.buckets, self.band_keys(signature)):
+            found |= buckets.get(band_key, set())
+        return found
+
+    def query(self, signature, threshold=0.0):
+        """Пары (ключ, оценка сходства) кандидатов не ниже threshold."""
+        matches = []
+        for key in self.candidates(signature):
+            score = similarity(signature, self.signatures[key])
+            if score >= threshold:
+                matches.append((key, score))
+        return matches
+
+    def __len__(self):
+        return len(self.signatures)
@@ -1,5 +1,7 @@
 from django.db import models
 
+from core.richtext import render
+
 
 class CreatedModel(models.Model):
     """Абстрактная модель. Добавляет дату создания."""
@@ -11,3 +13,26 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class RichTextModel(models.Model):
+    """Абстрактная модель. Хранит HTML поля text, готовый к выводу.
+
+    HTML пересчитывается при каждом сохранении, которое затрагивает
+    text, поэтому шаблоны не разбирают разметку.
+    """
+    text_html = models.TextField(
+        'HTML текста',
+        blank=True,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, update_fields=None, **kwargs):
+        if update_fields is None or 'text' in update_fields:
+            self.text_html = render(self.text)
+            if update_fields is not None:
+                update_fields = {*update_fields, 'text_html'}
+        super().save(*args, update_fields=update_fields, **kwargs)
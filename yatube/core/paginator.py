@@ -0,0 +1,82 @@
+"""Пагинатор для больших таблиц в админке.
+
+``COUNT(*)`` по таблице на миллионы строк читает весь индекс, а
+``OFFSET`` на дальних страницах перебирает все пропущенные строки
+целиком. ``EstimatedCountPaginator`` берёт размер таблицы без фильтров
+из статистики ``ANALYZE`` (``sqlite_stat1``), а точный ``COUNT(*)``
+с фильтрами кэширует. Статистику обновляет команда ``analyze_db``,
+её запускают по расписанию; пока её нет, считается ``COUNT(*)``.
+Страница выбирается «отложенным соединением»: сначала только
+первичные ключи со смещением, затем строки по ним.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def analyze(using):
+    """Пересобрать статистику таблиц SQLite; False для других СУБД."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    return True
+
+
+def get_table_estimate(model, using):
+    """Число строк таблицы по статистике sqlite_stat1 или None."""
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+        )
+        if cursor.fetchone() is None:
+            return None
+        # Первое число stat — количество строк в индексе. Частичный
+        # индекс покрывает не всю таблицу, поэтому берётся наибольшее.
+        cursor.execute(
+            'SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 '
+            'WHERE tbl = %s',
+            [model._meta.db_table]
+        )
+        estimate, = cursor.fetchone()
+    return estimate
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = queryset.query
+        if not query.where:
+            estimate = get_table_estimate(queryset.model, queryset.db)
+            if estimate is not None:
+                return estimate
+        sql, params = query.sql_with_params()
+        key = 'core.paginator.count.' + hashlib.md5(
+            f'{queryset.db}:{sql}:{params}'.encode()
+        ).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, settings.ADMIN_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def page(self, number):
+        """Страница как QuerySet по первичным ключам из смещения."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        top = bottom + self.per_page
+        if top + self.orphans >= self.count:
+            top = self.count
+        pks = list(self.object_list.values_list('pk', flat=True)[bottom:top])
+        return self._get_page(
+            self.object_list.filter(pk__in=pks), number, self
+        )
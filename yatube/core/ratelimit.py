@@ -0,0 +1,96 @@
+"""Ограничение частоты запросов скользящим окном в кэше.
+
+Лимит задаётся строкой ``'<количество>/<период>'``, где период — ``s``,
+``m``, ``h``, ``d`` или число секунд с буквой: ``'10/m'``, ``'5/30s'``.
+Счётчик хранится в двух соседних фиксированных окнах, а число запросов
+за последний период оценивается как сумма текущего окна и доли
+предыдущего. Пользователь определяется по id из сессии, без запроса
+к БД, гость — по IP-адресу. Счётчики лежат в кэше RATELIMIT_CACHE_ALIAS;
+это должен быть общий для процессов кэш с атомарными ``add()`` и
+``incr()`` (``core.cache.SQLiteCache``), иначе каждый процесс сервера
+считает запросы отдельно и лимит умножается на число процессов.
+"""
+import functools
+import re
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 24 * 60 * 60}
+RATE_RE = re.compile(r'^(\d+)/(\d*)([smhd])$')
+SESSION_USER_KEY = '_auth_user_id'
+
+
+@functools.lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Разобрать '10/m' в пару (лимит, период в секундах)."""
+    match = RATE_RE.match(rate)
+    if match is None:
+        raise ValueError(f'Некорректный лимит: {rate!r}')
+    limit, multiplier, unit = match.groups()
+    return int(limit), int(multiplier or 1) * PERIODS[unit]
+
+
+def get_client_ip(request):
+    if settings.RATELIMIT_TRUST_FORWARDED:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def get_identity(request):
+    """'user:<id>' для вошедшего пользователя, иначе 'ip:<адрес>'."""
+    session = getattr(request, 'session', None)
+    user_id = session.get(SESSION_USER_KEY) if session is not None else None
+    if user_id is not None:
+        return f'user:{user_id}'
+    return f'ip:{get_client_ip(request)}'
+
+
+def hit(name, identity, rate, now=None):
+    """Учесть запрос; вернуть True, если лимит превышен."""
+    limit, period = parse_rate(rate)
+    now = time.time() if now is None else now
+    window, offset = divmod(now, period)
+    key = f'ratelimit:{name}:{identity}:{period}:'
+    cache = caches[settings.RATELIMIT_CACHE_ALIAS]
+    previous = cache.get(f'{key}{int(window) - 1}', 0)
+    estimate = previous * (1 - offset / period)
+    current_key = f'{key}{int(window)}'
+    # Окно хранится два периода, чтобы следующее видело предыдущее.
+    if cache.add(current_key, 1, period * 2):
+        current = 1
+    else:
+        try:
+            current = cache.incr(current_key)
+        except ValueError:
+            cache.set(current_key, 1, period * 2)
+            current = 1
+    return estimate + current > limit
+
+
+def is_limited(request, name, rate, methods):
+    if not settings.RATELIMIT_ENABLED or request.method not in methods:
+        return False
+    return hit(name, get_identity(request), rate)
+
+
+def too_many_requests(request):
+    return render(request, 'core/429.html', status=429)
+
+
+def ratelimit(rate, methods=('POST',), name=None):
+    """Декоратор view-функции с собственным лимитом."""
+    def decorator(view_func):
+        limit_name = name or f'{view_func.__module__}.{view_func.__name__}'
+
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if is_limited(request, limit_name, rate, methods):
+                return too_many_requests(request)
+            return view_func(request, *args, **kwargs)
+        return wrapper
+    return decorator
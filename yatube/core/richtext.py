@@ -0,0 +1,165 @@
+"""Безопасное подмножество Markdown для постов и комментариев.
+
+HTML получается один раз при сохранении записи (``RichTextModel``) и
+хранится рядом с текстом, поэтому страницы выводят готовую строку.
+Весь текст сначала экранируется, а теги добавляются только самим
+разборщиком, так что отдельная очистка HTML не нужна.
+
+Поддерживаются абзацы и переносы строк, списки ``- ``/``* `` и
+``1. ``, цитаты ``> ``, блоки кода в тройных обратных кавычках,
+``код``, **жирный**, *курсив* и _курсив_, ссылки ``[текст](https://…)``,
+автоссылки на http(s)-адреса, ``#теги`` и ``@упоминания``.
+"""
+import re
+from html import unescape
+
+from django.utils.html import escape
+
+from core.reverse import fast_reverse
+
+TAG_RE = re.compile(r'(?<![\w&#/])#(\w{1,50})')
+MENTION_RE = re.compile(r'(?<![\w@])@([\w.@+-]{1,150})')
+
+FENCE_RE = re.compile(r'^```')
+QUOTE_RE = re.compile(r'^&gt; ?(.*)$')
+BULLET_RE = re.compile(r'^[-*] +(.*)$')
+NUMBER_RE = re.compile(r'^\d{1,9}[.)] +(.*)$')
+CODE_RE = re.compile(r'`([^`\n]+)`')
+# Уже готовые фрагменты заменены метками \x00N\x00; ссылки и выделение
+# не должны захватывать метку частично или внутрь адреса.
+LINK_RE = re.compile(
+    r'\[([^\[\]\n\x00]+)\]\((https?://[^\s()<>\x00]+)\)'
+)
+# Экранированные кавычки и скобки завершают адрес.
+URL_RE = re.compile(
+    r'\bhttps?://(?:(?!&quot;|&#39;|&lt;|&gt;)[^\s\x00])+'
+)
+BOLD_RE = re.compile(r'\*\*(?=\S)(.+?)(?<=\S)\*\*')
+ITALIC_RE = re.compile(
+    r'(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])'
+    r'|(?<![\w_])_(?=\S)(.+?)(?<=\S)_(?![\w_])'
+)
+PLACEHOLDER_RE = re.compile('\x00(\\d+)\x00')
+URL_TRAILING = '.,;:!?)'
+LINK_ATTRS = 'rel="nofollow noopener"'
+
+
+def link(url, label):
+    # Адрес взят из экранированного текста; повторное экранирование
+    # после unescape гарантирует, что кавычка не закроет атрибут.
+    return f'<a href="{escape(unescape(url))}" {LINK_ATTRS}>{label}</a>'
+
+
+def render_inline(text):
+    """Строчная разметка уже экранированного текста."""
+    stash = []
+
+    def keep(html):
+        stash.append(html)
+        return f'\x00{len(stash) - 1}\x00'
+
+    def autolink(match):
+        url = match.group(0)
+        stripped = url.rstrip(URL_TRAILING)
+        return keep(link(stripped, stripped)) + url[len(stripped):]
+
+    def tag(match):
+        name = match.group(1)
+        url = fast_reverse('posts:tag_posts', kwargs={'name': name.lower()})
+        return keep(f'<a href="{url}">#{name}</a>')
+
+    def mention(match):
+        name = match.group(1).rstrip('.')
+        if not name:
+            return match.group(0)
+        url = fast_reverse('posts:profile', kwargs={'username': name})
+        return (
+            keep(f'<a href="{url}">@{name}</a>')
+            + match.group(1)[len(name):]
+        )
+
+    def italic(text):
+        return ITALIC_RE.sub(
+            lambda match: f'<em>{match.group(1) or match.group(2)}</em>',
+            text
+        )
+
+    text = CODE_RE.sub(
+        lambda match: keep(f'<code>{match.group(1)}</code>'), text
+    )
+    text = LINK_RE.sub(
+        lambda match: keep(link(match.group(2), match.group(1))), text
+    )
+    text = URL_RE.sub(autolink, text)
+    text = TAG_RE.sub(tag, text)
+    text = MENTION_RE.sub(mention, text)
+    # Жирный фрагмент становится меткой целиком, поэтому курсив снаружи
+    # не может начаться внутри <strong> и закончиться после него.
+    text = BOLD_RE.sub(
+        lambda match: keep(f'<strong>{italic(match.group(1))}</strong>'),
+        text
+    )
+    text = italic(text)
+    while PLACEHOLDER_RE.search(text):
+        text = PLACEHOLDER_RE.sub(
+            lambda match: stash[int(match.group(1))], text
+        )
+    return text
+
+
+def render_block(kind, lines):
+    if kind == 'code':
+        return '<pre><code>{}</code></pre>'.format('\n'.join(lines))
+    if kind in ('ul', 'ol'):
+        items = ''.join(f'<li>{render_inline(line)}</li>' for line in lines)
+        return f'<{kind}>{items}</{kind}>'
+    body = '<br>'.join(render_inline(line) for line in lines)
+    if kind == 'quote':
+        return f'<blockquote><p>{body}</p></blockquote>'
+    return f'<p>{body}</p>'
+
+
+def classify(line):
+    """Вид блока строки и её содержимое без маркера."""
+    for kind, pattern in (
+        ('quote', QUOTE_RE), ('ul', BULLET_RE), ('ol', NUMBER_RE)
+    ):
+        match = pattern.match(line)
+        if match:
+            return kind, match.group(1)
+    return 'p', line
+
+
+def render(text):
+    """HTML для текста с разметкой; входной HTML выводится как текст."""
+    text = escape(text.replace('\x00', '').replace('\r\n', '\n'))
+    blocks = []
+    kind, lines = None, []
+
+    def flush():
+        if lines:
+            blocks.append(render_block(kind, lines))
+
+    for line in text.split('\n'):
+        if kind == 'code':
+            if FENCE_RE.match(line):
+                flush()
+                kind, lines = None, []
+            else:
+                lines.append(line)
+            continue
+        if FENCE_RE.match(line):
+            flush()
+            kind, lines = 'code', []
+            continue
+        if not line.strip():
+            flush()
+            kind, lines = None, []
+            continue
+        line_kind, content = classify(line.rstrip())
+        if line_kind != kind:
+            flush()
+            kind, lines = line_kind, []
+        lines.append(content)
+    flush()
+    return '\n'.join(blocks)
@@ -0,0 +1,50 @@
+"""Запуск тестов с отдельными локальными хранилищами.
+
+Файл очереди задач, в котором лежит и журнал сессий, файл подписей
+текстов и файлы общего кэша на время тестов переносятся во временный
+каталог: тесты не оставляют задач в рабочей очереди и не видят рабочий
+кэш.
+"""
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+@contextmanager
+def isolated_storage():
+    """Очередь задач, подписи текстов и файловый кэш во временном
+    каталоге.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        with override_settings(
+            TASKS_QUEUE_PATH=os.path.join(directory, 'tasks.sqlite3'),
+            SPAM_STORE_PATH=os.path.join(directory, 'spam.sqlite3'),
+            CACHES={
+                alias: {
+                    **config,
+                    'LOCATION': os.path.join(directory, f'{alias}.sqlite3'),
+                }
+                if config['BACKEND'] == 'core.cache.SQLiteCache' else config
+                for alias, config in settings.CACHES.items()
+            },
+        ):
+            yield directory
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._storage = isolated_storage()
+        self._storage.__enter__()
+
+    def teardown_test_environment(self, **kwargs):
+        self._storage.__exit__(None, None, None)
+        super().teardown_test_environment(**kwargs)
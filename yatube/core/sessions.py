@@ -0,0 +1,277 @@
+"""Сессии с чтением из кэша и отложенной записью в БД.
+
+Сохранение сессии пишет данные в кэш и в журнал в файле очереди задач.
+Кэш должен быть общим для всех процессов (core.cache.SQLiteCache), иначе
+выход из аккаунта в одном воркере не виден другим.
+Задача ``flush_sessions`` переносит журнал в ``django_session`` одной
+транзакцией, оставляя только последнее состояние каждой сессии, поэтому
+вход и активные пользователи не конкурируют за запись с постами.
+Просроченные строки удаляются лениво: при чтении и пачками при сбросе.
+"""
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.sessions.backends.base import CreateError, SessionBase
+from django.contrib.sessions.models import Session
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+
+from core.tasks import LocalStore, task
+
+JOURNAL_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS session_journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_key TEXT NOT NULL,
+    session_data TEXT,
+    expire_date REAL
+);
+CREATE INDEX IF NOT EXISTS session_journal_key
+    ON session_journal (session_key, id);
+CREATE TABLE IF NOT EXISTS session_flush (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    flush_at REAL NOT NULL DEFAULT 0,
+    locked_until REAL NOT NULL DEFAULT 0
+);
+INSERT OR IGNORE INTO session_flush (id) VALUES (1);
+'''
+# Ограничение SQLite на количество параметров в одном запросе.
+CHUNK_SIZE = 500
+EXPIRED_PER_FLUSH = 100
+
+
+class SessionJournal(LocalStore):
+    """Журнал изменений сессий, ещё не перенесённых в БД."""
+    schema = JOURNAL_SCHEMA
+
+    def write(self, session_key, session_data, expire_date, delay):
+        """Добавить запись; вернуть True, если нужно запланировать сброс.
+
+        Сброс планируется, если срок последнего запланированного уже
+        прошёл: он выполнен или задача потерялась. Ожидающий сброс
+        прочитает журнал целиком, поэтому новая запись его дождётся.
+        """
+        expire_date = expire_date.timestamp() if expire_date else None
+        now = time.time()
+        with self.transaction() as connection:
+            connection.execute(
+                'INSERT INTO session_journal '
+                '(session_key, session_data, expire_date) VALUES (?, ?, ?)',
+                (session_key, session_data, expire_date)
+            )
+            scheduled = connection.execute(
+                'UPDATE session_flush SET flush_at = ? WHERE flush_at <= ?',
+                (now + delay, now)
+            ).rowcount
+        return bool(scheduled)
+
+    def acquire(self, timeout):
+        """Занять журнал для сброса на timeout секунд; True при успехе."""
+        now = time.time()
+        return bool(self.connection.execute(
+            'UPDATE session_flush SET locked_until = ? '
+            'WHERE locked_until <= ?',
+            (now + timeout, now)
+        ).rowcount)
+
+    def release(self):
+        self.connection.execute('UPDATE session_flush SET locked_until = 0')
+
+    def pending(self):
+        """Все записи журнала по порядку."""
+        return self.connection.execute(
+            'SELECT id, session_key, session_data, expire_date '
+            'FROM session_journal ORDER BY id'
+        ).fetchall()
+
+    def discard(self, last_id):
+        """Удалить перенесённые в БД записи."""
+        self.connection.execute(
+            'DELETE FROM session_journal WHERE id <= ?', (last_id,)
+        )
+
+    def lookup(self, session_key):
+        """Последняя запись журнала для сессии или None."""
+        row = self.connection.execute(
+            'SELECT session_data, expire_date FROM session_journal '
+            'WHERE session_key = ? ORDER BY id DESC LIMIT 1',
+            (session_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        session_data, expire_date = row
+        if expire_date is not None:
+            expire_date = datetime.fromtimestamp(expire_date, dt_timezone.utc)
+        return session_data, expire_date
+
+
+_journals = {}
+
+
+def get_journal():
+    path = settings.TASKS_QUEUE_PATH
+    if path not in _journals:
+        _journals[path] = SessionJournal(path)
+    return _journals[path]
+
+
+def _chunks(items):
+    items = list(items)
+    for start in range(0, len(items), CHUNK_SIZE):
+        yield items[start:start + CHUNK_SIZE]
+
+
+@task(max_retries=5, retry_delay=1)
+def flush_sessions():
+    """Перенести журнал сессий в БД.
+
+    Сбросы выполняются строго по очереди, иначе более ранний мог бы
+    записать устаревшее состояние поверх нового. Очередность держится
+    арендой в журнале, а не транзакцией файла очереди: запись в основную
+    БД не блокирует постановку задач и сохранение сессий.
+    """
+    journal = get_journal()
+    if not journal.acquire(settings.TASKS_STALE_TIMEOUT):
+        # Идёт другой сброс; записи, которые он не прочитал, перенесёт
+        # следующий.
+        flush_sessions.apply_async(countdown=settings.SESSION_FLUSH_DELAY)
+        return
+    try:
+        rows = journal.pending()
+        if not rows:
+            return
+        latest = {}
+        for _, session_key, session_data, expire_date in rows:
+            latest[session_key] = (session_data, expire_date)
+        with transaction.atomic():
+            _apply_journal(latest)
+        journal.discard(rows[-1][0])
+    finally:
+        journal.release()
+
+
+def _apply_journal(latest):
+    deleted = [key for key, (data, _) in latest.items() if data is None]
+    for keys in _chunks(deleted):
+        Session.objects.filter(session_key__in=keys).delete()
+    saved = {
+        key: Session(
+            session_key=key,
+            session_data=data,
+            expire_date=datetime.fromtimestamp(expire_date, dt_timezone.utc)
+        )
+        for key, (data, expire_date) in latest.items() if data is not None
+    }
+    existing = set()
+    for keys in _chunks(saved):
+        existing.update(
+            Session.objects.filter(session_key__in=keys)
+            .values_list('session_key', flat=True)
+        )
+    for key in existing:
+        saved[key].save(force_update=True)
+    Session.objects.bulk_create(
+        [session for key, session in saved.items() if key not in existing],
+        batch_size=CHUNK_SIZE
+    )
+    expired = Session.objects.filter(
+        expire_date__lt=timezone.now()
+    ).values_list('session_key', flat=True)[:EXPIRED_PER_FLUSH]
+    Session.objects.filter(session_key__in=list(expired)).delete()
+
+
+class SessionStore(SessionBase):
+    cache_key_prefix = 'core.sessions.'
+
+    def __init__(self, session_key=None):
+        self._cache = caches[settings.SESSION_CACHE_ALIAS]
+        super().__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return self.cache_key_prefix + self._get_or_create_session_key()
+
+    def _load_persisted(self, session_key):
+        """Закодированные данные из журнала или БД; None, если сессии
+        нет или она истекла.
+        """
+        entry = get_journal().lookup(session_key)
+        if entry is None:
+            session = Session.objects.filter(session_key=session_key).first()
+            if session is None:
+                return None
+            entry = (session.session_data, session.expire_date)
+        session_data, expire_date = entry
+        if session_data is None:
+            return None
+        if expire_date <= timezone.now():
+            self.delete(session_key)
+            return None
+        return session_data, expire_date
+
+    def load(self):
+        try:
+            data = self._cache.get(self.cache_key)
+        except Exception:
+            data = None
+        if data is not None:
+            return data
+        entry = self._load_persisted(self.session_key)
+        if entry is None:
+            self._session_key = None
+            return {}
+        session_data, expire_date = entry
+        data = self.decode(session_data)
+        self._cache.set(
+            self.cache_key, data, self.get_expiry_age(expiry=expire_date)
+        )
+        return data
+
+    def exists(self, session_key):
+        return (
+            self.cache_key_prefix + session_key in self._cache
+            or self._load_persisted(session_key) is not None
+        )
+
+    def create(self):
+        while True:
+            self._session_key = self._get_new_session_key()
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                continue
+            self.modified = True
+            return
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+        if must_create and self.exists(self.session_key):
+            raise CreateError
+        data = self._get_session(no_load=must_create)
+        self._cache.set(self.cache_key, data, self.get_expiry_age())
+        self._write_behind(
+            self.session_key, self.encode(data), self.get_expiry_date()
+        )
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        self._cache.delete(self.cache_key_prefix + session_key)
+        self._write_behind(session_key, None, None)
+
+    def _write_behind(self, session_key, session_data, expire_date):
+        if get_journal().write(
+            session_key, session_data, expire_date,
+            settings.SESSION_FLUSH_DELAY
+        ):
+            flush_sessions.apply_async(
+                countdown=settings.SESSION_FLUSH_DELAY
+            )
+
+    @classmethod
+    def clear_expired(cls):
+        Session.objects.filter(expire_date__lt=timezone.now()).delete()
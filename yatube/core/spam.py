@@ -0,0 +1,183 @@
+"""Проверка новых текстов на повторы и рассылки при записи.
+
+Текст разбивается на n-граммы из SPAM_SHINGLE_SIZE слов, по ним
+считается MinHash-подпись. Подписи текстов за последние SPAM_WINDOW
+секунд хранятся в отдельном файле SQLite (SPAM_STORE_PATH), а каждый
+процесс держит по ним два LSH-индекса в памяти:
+
+* общий, с узкими полосами: похожий текст от SPAM_FLOOD_AUTHORS других
+  авторов — рассылка (``FLOOD``);
+* по авторам, с полосами пошире: похожий текст того же автора — повтор
+  (``DUPLICATE``).
+
+Перед проверкой индекс дочитывает из файла строки, записанные другими
+процессами, по возрастанию id, а устаревшие подписи вытесняются. Запись
+подписи — одиночный INSERT без явной транзакции, а вышедшие из окна
+строки удаляются изредка, поэтому публикации не ждут друг друга
+дольше одной вставки. Таблицы постов и комментариев не читаются.
+"""
+import random
+import threading
+import time
+from collections import deque
+
+import numpy as np
+from django.conf import settings
+
+from core.minhash import LSHIndex, MinHasher, shingles, tokenize
+from core.tasks import LocalStore
+
+DUPLICATE = 'duplicate'
+FLOOD = 'flood'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS text_fingerprint (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    author_id INTEGER NOT NULL,
+    signature BLOB NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS text_fingerprint_created_at
+    ON text_fingerprint (created_at);
+'''
+# Доля записей, после которых удаляются строки, вышедшие из окна.
+PRUNE_PROBABILITY = 0.01
+
+
+class FingerprintStore(LocalStore):
+    """Подписи недавних текстов, общие для всех процессов."""
+    schema = SCHEMA
+
+    def add(self, author_id, signature, created_at):
+        """Сохранить подпись; изредка удалить вышедшие из окна."""
+        self.connection.execute(
+            'INSERT INTO text_fingerprint '
+            '(author_id, signature, created_at) VALUES (?, ?, ?)',
+            (author_id, signature.tobytes(), created_at)
+        )
+        if random.random() < PRUNE_PROBABILITY:
+            self.connection.execute(
+                'DELETE FROM text_fingerprint WHERE created_at < ?',
+                (created_at - settings.SPAM_WINDOW,)
+            )
+
+    def since(self, last_id, created_after):
+        """Строки с id больше last_id, созданные после created_after."""
+        return self.connection.execute(
+            'SELECT id, author_id, signature, created_at '
+            'FROM text_fingerprint WHERE id > ? AND created_at >= ? '
+            'ORDER BY id',
+            (last_id, created_after)
+        ).fetchall()
+
+
+class SpamIndex:
+    """Скользящее окно подписей в памяти процесса."""
+
+    def __init__(self, store):
+        self.store = store
+        self.hasher = MinHasher(settings.SPAM_MINHASH_PERMUTATIONS)
+        self.global_index = self.new_index(settings.SPAM_GLOBAL_BANDS)
+        self.author_indexes = {}
+        self.authors = {}
+        self.entries = deque()
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def new_index(bands):
+        return LSHIndex(settings.SPAM_MINHASH_PERMUTATIONS, bands)
+
+    def signature(self, text):
+        """Подпись текста или None, если текст слишком короткий."""
+        features = shingles(tokenize(text), settings.SPAM_SHINGLE_SIZE)
+        if len(features) < settings.SPAM_MIN_SHINGLES:
+            return None
+        return self.hasher.signature(features)
+
+    def insert(self, key, author_id, signature, created_at):
+        self.global_index.insert(key, signature)
+        author_index = self.author_indexes.get(author_id)
+        if author_index is None:
+            author_index = self.new_index(settings.SPAM_AUTHOR_BANDS)
+            self.author_indexes[author_id] = author_index
+        author_index.insert(key, signature)
+        self.authors[key] = author_id
+        self.entries.append((created_at, key))
+
+    def evict(self, before):
+        while self.entries and self.entries[0][0] < before:
+            _, key = self.entries.popleft()
+            author_id = self.authors.pop(key)
+            self.global_index.remove(key)
+            author_index = self.author_indexes[author_id]
+            author_index.remove(key)
+            if not len(author_index):
+                del self.author_indexes[author_id]
+
+    def sync(self, now):
+        """Дочитать новые подписи из файла и вытеснить устаревшие."""
+        start = now - settings.SPAM_WINDOW
+        for key, author_id, signature, created_at in self.store.since(
+            self.last_id, start
+        ):
+            self.insert(
+                key, author_id,
+                np.frombuffer(signature, dtype=np.uint32), created_at
+            )
+            self.last_id = key
+        self.evict(start)
+
+    def verdict(self, author_id, signature, check_author):
+        if check_author and author_id in self.author_indexes:
+            if self.author_indexes[author_id].query(
+                signature, settings.SPAM_AUTHOR_THRESHOLD
+            ):
+                return DUPLICATE
+        others = {
+            self.authors[key]
+            for key, _ in self.global_index.query(
+                signature, settings.SPAM_GLOBAL_THRESHOLD
+            )
+        }
+        others.discard(author_id)
+        if len(others) >= settings.SPAM_FLOOD_AUTHORS:
+            return FLOOD
+        return None
+
+    def check(self, author_id, text, check_author=True, now=None):
+        """Проверить текст автора и запомнить его подпись.
+
+        Возвращает DUPLICATE, FLOOD или None. Отклонённый повтор не
+        запоминается, рассылка запоминается: следующие копии тоже
+        считаются.
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None
+        now = time.time() if now is None else now
+        with self.lock:
+            self.sync(now)
+            verdict = self.verdict(author_id, signature, check_author)
+            if verdict != DUPLICATE:
+                self.store.add(author_id, signature, now)
+                self.sync(now)
+            return verdict
+
+
+_indexes = {}
+
+
+def get_index():
+    """Индекс подписей в файле, заданном настройкой SPAM_STORE_PATH."""
+    path = settings.SPAM_STORE_PATH
+    if path not in _indexes:
+        _indexes[path] = SpamIndex(FingerprintStore(path))
+    return _indexes[path]
+
+
+def check_text(author_id, text, check_author=True):
+    """Вердикт для нового текста; None, если проверка выключена."""
+    if not settings.SPAM_CHECK_ENABLED:
+        return None
+    return get_index().check(author_id, text, check_author)
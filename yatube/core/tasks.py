@@ -0,0 +1,222 @@
+"""Фоновые задачи с долговременной очередью в отдельном файле SQLite.
+
+Функция, обёрнутая декоратором ``task``, ставится в очередь вызовом
+``delay()`` и выполняется воркером ``python manage.py runworker``.
+"""
+import functools
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+PENDING = 'pending'
+RUNNING = 'running'
+DEAD = 'dead'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS task (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_retries INTEGER NOT NULL,
+    retry_delay REAL NOT NULL,
+    run_at REAL NOT NULL,
+    locked_at REAL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS task_status_run_at ON task (status, run_at);
+'''
+
+
+class LocalStore:
+    """Хранилище в отдельном файле SQLite со своим соединением на поток."""
+    schema = ''
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def connection(self):
+        """Соединение текущего потока; после fork открывается заново."""
+        pid, connection = getattr(self._local, 'connection', (None, None))
+        if pid != os.getpid():
+            connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(self.schema)
+            self._local.connection = (os.getpid(), connection)
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+
+class TaskQueue(LocalStore):
+    """Очередь задач в файле SQLite, независимом от основной БД."""
+    schema = SCHEMA
+
+    def push(self, name, args, kwargs, max_retries, retry_delay,
+             countdown=0):
+        """Добавить задачу в очередь и вернуть её идентификатор."""
+        payload = json.dumps({'args': args, 'kwargs': kwargs})
+        cursor = self.connection.execute(
+            'INSERT INTO task (name, payload, max_retries, retry_delay, '
+            'run_at) VALUES (?, ?, ?, ?, ?)',
+            (name, payload, max_retries, retry_delay, time.time() + countdown)
+        )
+        return cursor.lastrowid
+
+    def claim(self, limit):
+        """Забрать до limit готовых к выполнению задач."""
+        now = time.time()
+        with self.transaction() as connection:
+            rows = connection.execute(
+                'SELECT id, name, payload FROM task '
+                'WHERE status = ? AND run_at <= ? ORDER BY run_at LIMIT ?',
+                (PENDING, now, limit)
+            ).fetchall()
+            connection.executemany(
+                'UPDATE task SET status = ?, locked_at = ? WHERE id = ?',
+                [(RUNNING, now, task_id) for task_id, _, _ in rows]
+            )
+        return [
+            (task_id, name, json.loads(payload))
+            for task_id, name, payload in rows
+        ]
+
+    def complete(self, task_id):
+        """Удалить успешно выполненную задачу."""
+        self.connection.execute('DELETE FROM task WHERE id = ?', (task_id,))
+
+    def fail(self, task_id, error):
+        """Отложить повтор задачи с экспоненциальной задержкой.
+
+        Исчерпавшая попытки задача остаётся в очереди со статусом dead.
+        """
+        with self.transaction() as connection:
+            attempts, max_retries, retry_delay = connection.execute(
+                'SELECT attempts, max_retries, retry_delay FROM task '
+                'WHERE id = ?',
+                (task_id,)
+            ).fetchone()
+            attempts += 1
+            status = DEAD if attempts > max_retries else PENDING
+            run_at = time.time() + retry_delay * 2 ** (attempts - 1)
+            connection.execute(
+                'UPDATE task SET status = ?, attempts = ?, run_at = ?, '
+                'locked_at = NULL, last_error = ? WHERE id = ?',
+                (status, attempts, run_at, error, task_id)
+            )
+
+    def requeue_stale(self, timeout):
+        """Вернуть в очередь задачи, зависшие у упавшего воркера."""
+        self.connection.execute(
+            'UPDATE task SET status = ?, locked_at = NULL '
+            'WHERE status = ? AND locked_at < ?',
+            (PENDING, RUNNING, time.time() - timeout)
+        )
+
+    def stats(self):
+        """Количество задач в каждом статусе."""
+        return dict(self.connection.execute(
+            'SELECT status, COUNT(*) FROM task GROUP BY status'
+        ).fetchall())
+
+
+_queues = {}
+
+
+def get_queue():
+    """Очередь, заданная настройкой TASKS_QUEUE_PATH."""
+    path = settings.TASKS_QUEUE_PATH
+    if path not in _queues:
+        _queues[path] = TaskQueue(path)
+    return _queues[path]
+
+
+class Task:
+    """Функция, которую можно выполнить в фоне через ``delay()``."""
+
+    def __init__(self, func, max_retries, retry_delay):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__name__}'
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        """Поставить вызов в очередь; аргументы должны сериализоваться
+        в JSON. При TASKS_ALWAYS_EAGER задача выполняется сразу.
+        """
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=(), kwargs=None, countdown=0):
+        """Как delay(), но с отсрочкой выполнения на countdown секунд.
+
+        Внутри транзакции задача попадает в очередь только после её
+        фиксации, чтобы воркер не увидел ещё не записанные строки или
+        задачу для отменённых изменений; тогда возвращается None.
+        """
+        kwargs = kwargs or {}
+        if settings.TASKS_ALWAYS_EAGER:
+            self.func(*args, **kwargs)
+            return None
+
+        def push():
+            return get_queue().push(
+                self.name, list(args), kwargs, self.max_retries,
+                self.retry_delay, countdown
+            )
+
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(push)
+            return None
+        return push()
+
+
+def task(func=None, *, max_retries=3, retry_delay=5):
+    """Декоратор фоновой задачи."""
+    if func is None:
+        return functools.partial(
+            task, max_retries=max_retries, retry_delay=retry_delay
+        )
+    return Task(func, max_retries, retry_delay)
+
+
+def run_task(name, payload):
+    """Выполнить задачу в процессе воркера.
+
+    Возвращает текст ошибки или None, чтобы исключение не нужно было
+    передавать между процессами.
+    """
+    module_name, func_name = name.rsplit('.', 1)
+    try:
+        task_obj = getattr(importlib.import_module(module_name), func_name)
+        task_obj.func(*payload['args'], **payload['kwargs'])
+    except Exception:
+        return traceback.format_exc()
+    finally:
+        close_old_connections()
+    return None
@@ -0,0 +1,11 @@
+from django import template
+
+from core.reverse import fast_reverse
+
+register = template.Library()
+
+
+@register.simple_tag
+def fast_url(viewname, *args, **kwargs):
+    """Аналог {% url %} на основе fast_reverse."""
+    return fast_reverse(viewname, args=args or None, kwargs=kwargs or None)
@@ -0,0 +1,74 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from core.asgi import WsgiBridge, build_environ, get_cookie, get_query
+
+
+def echo_app(environ, start_response):
+    start_response('201 Created', [('Content-Type', 'text/plain')])
+    body = environ['wsgi.input'].read()
+    return [environ['REQUEST_METHOD'].encode(), b' ', body]
+
+
+def call_asgi(application, scope, chunks):
+    sent = []
+    messages = [
+        {'type': 'http.request', 'body': chunk, 'more_body': more}
+        for chunk, more in chunks
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return sent
+
+
+class AsgiHelpersTests(SimpleTestCase):
+    scope = {
+        'type': 'http',
+        'method': 'POST',
+        'path': '/группа/',
+        'query_string': b'page=2&feed=group&page=3',
+        'client': ('10.0.0.1', 5000),
+        'headers': [
+            (b'host', b'localhost'),
+            (b'content-type', b'text/plain'),
+            (b'cookie', b'sessionid=abc; csrftoken=xyz'),
+            (b'accept', b'text/html'),
+            (b'accept', b'*/*'),
+        ],
+    }
+
+    def test_build_environ(self):
+        """Заголовки и путь переводятся в переменные WSGI."""
+        environ = build_environ(self.scope, b'body')
+        self.assertEqual(environ['REQUEST_METHOD'], 'POST')
+        self.assertEqual(
+            environ['PATH_INFO'], '/группа/'.encode().decode('latin-1')
+        )
+        self.assertEqual(environ['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,*/*')
+        self.assertEqual(environ['REMOTE_ADDR'], '10.0.0.1')
+        self.assertEqual(environ['wsgi.input'].read(), b'body')
+
+    def test_query_and_cookies(self):
+        """Из scope читаются параметры запроса и cookies."""
+        self.assertEqual(get_query(self.scope), {'page': '3', 'feed': 'group'})
+        self.assertEqual(get_cookie(self.scope, 'csrftoken'), 'xyz')
+        self.assertIsNone(get_cookie(self.scope, 'missing'))
+
+    def test_wsgi_bridge(self):
+        """Мост собирает тело запроса по частям и отдаёт ответ WSGI."""
+        sent = call_asgi(
+            WsgiBridge(echo_app),
+            self.scope,
+            [(b'first ', True), (b'second', False)],
+        )
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-length', b'17'), sent[0]['headers'])
+        self.assertEqual(sent[1]['body'], b'POST first second')
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from core.cache import SQLiteCache
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.path = os.path.join(directory, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.path, {})
+
+    def test_basic_operations(self):
+        """Запись, чтение, add, incr и удаление."""
+        self.cache.set('key', {'value': 1})
+        self.assertEqual(self.cache.get('key'), {'value': 1})
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertTrue(self.cache.add('counter', 1))
+        self.assertEqual(self.cache.incr('counter', 2), 3)
+        self.assertEqual(
+            self.cache.get_many(['key', 'counter', 'missing']),
+            {'key': {'value': 1}, 'counter': 3}
+        )
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+        with self.assertRaises(ValueError):
+            self.cache.incr('key')
+        self.cache.clear()
+        self.assertNotIn('counter', self.cache)
+
+    def test_expiry(self):
+        """Просроченная запись не читается и уступает место add()."""
+        now = time.time()
+        self.cache.set('key', 'old', timeout=10)
+        with mock.patch('core.cache.time.time', return_value=now + 20):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new', timeout=10))
+            self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_instances_share_file(self):
+        """Экземпляры на одном файле, как разные процессы, видят общие
+        записи и счётчики.
+        """
+        other = SQLiteCache(self.path, {})
+        self.cache.set('session', 'data')
+        other.delete('session')
+        self.assertIsNone(self.cache.get('session'))
+        self.cache.add('hits', 0)
+        for backend in (self.cache, other, self.cache):
+            backend.incr('hits')
+        self.assertEqual(other.get('hits'), 3)
+
+    def test_cull(self):
+        """При переполнении удаляются записи с ближайшим сроком."""
+        cache = SQLiteCache(
+            self.path, {'OPTIONS': {'MAX_ENTRIES': 4, 'CULL_FREQUENCY': 2}}
+        )
+        with mock.patch('core.cache.CULL_PROBABILITY', 0):
+            for number in range(6):
+                cache.set(f'key{number}', number, timeout=100 + number)
+        with mock.patch('core.cache.CULL_PROBABILITY', 1):
+            cache.set('forever', 'value', timeout=None)
+        self.assertEqual(
+            sorted(cache.get_many([f'key{n}' for n in range(6)]).values()),
+            [3, 4, 5]
+        )
+        self.assertEqual(cache.get('forever'), 'value')
@@ -0,0 +1,132 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
+
+from django.db import connection
+from django.db.utils import OperationalError, load_backend
+from django.test import SimpleTestCase
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+class SQLiteBackendTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.path = os.path.join(TEMP_DIR, f'{self._testMethodName}.sqlite3')
+
+    def _connect(self, **options):
+        settings_dict = {
+            **connection.settings_dict,
+            'ENGINE': 'core.db.sqlite3',
+            'NAME': self.path,
+            'OPTIONS': {'timeout': 0, **options},
+        }
+        db = load_backend('core.db.sqlite3').DatabaseWrapper(
+            settings_dict, 'test_sqlite'
+        )
+        self.addCleanup(db.close)
+        return db
+
+    def test_pragmas_applied(self):
+        """Новое соединение работает в режиме WAL с заданными PRAGMA."""
+        db = self._connect(pragmas={'cache_size': -1000})
+        with db.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            self.assertEqual(cursor.fetchone()[0], 'wal')
+            cursor.execute('PRAGMA cache_size')
+            self.assertEqual(cursor.fetchone()[0], -1000)
+
+    def test_locked_write_is_retried(self):
+        """Запись повторяется, пока другой процесс держит блокировку."""
+        db = self._connect(lock_retries=8, lock_retry_delay=0.01)
+        with db.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        locker = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.addCleanup(locker.close)
+        locker.execute('BEGIN EXCLUSIVE')
+        threading.Timer(0.2, locker.execute, ['COMMIT']).start()
+        with db.cursor() as cursor:
+            cursor.execute('INSERT INTO item (id) VALUES (%s)', [1])
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    def test_lock_error_raised_after_retries(self):
+        """После исчерпания повторов ошибка блокировки пробрасывается."""
+        db = self._connect(lock_retries=1, lock_retry_delay=0)
+        with db.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        locker = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(locker.close)
+        locker.execute('BEGIN EXCLUSIVE')
+        with self.assertRaises(OperationalError):
+            with db.cursor() as cursor:
+                cursor.execute('INSERT INTO item (id) VALUES (%s)', [1])
+        locker.execute('ROLLBACK')
+
+    def test_locked_write_in_transaction_not_retried(self):
+        """Внутри транзакции ошибка блокировки пробрасывается сразу."""
+        db = self._connect(lock_retries=8, lock_retry_delay=10)
+        with db.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        locker = sqlite3.connect(self.path, isolation_level=None)
+        self.addCleanup(locker.close)
+        locker.execute('BEGIN EXCLUSIVE')
+        with mock.patch('core.db.sqlite3.base.time.sleep') as sleep:
+            with self.assertRaises(OperationalError):
+                with db.cursor() as cursor:
+                    cursor.execute('BEGIN')
+                    cursor.execute('INSERT INTO item (id) VALUES (%s)', [1])
+        sleep.assert_not_called()
+        locker.execute('ROLLBACK')
+
+    def test_transaction_takes_write_lock(self):
+        """Транзакция сразу берёт блокировку записи: другой писатель
+        ждёт её конца, а не ломает её первую запись.
+        """
+        db = self._connect()
+        with db.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        other = sqlite3.connect(self.path, isolation_level=None, timeout=0)
+        self.addCleanup(other.close)
+        db.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True
+        )
+        try:
+            with self.assertRaisesMessage(
+                sqlite3.OperationalError, 'database is locked'
+            ):
+                other.execute('BEGIN IMMEDIATE')
+        finally:
+            db.rollback()
+            db.set_autocommit(True)
+
+    def test_locked_begin_is_retried(self):
+        """Начало транзакции повторяется, пока другой процесс пишет."""
+        db = self._connect(lock_retries=8, lock_retry_delay=0.01)
+        with db.cursor() as cursor:
+            cursor.execute('CREATE TABLE item (id INTEGER PRIMARY KEY)')
+        locker = sqlite3.connect(
+            self.path, isolation_level=None, check_same_thread=False
+        )
+        self.addCleanup(locker.close)
+        locker.execute('BEGIN IMMEDIATE')
+        threading.Timer(0.2, locker.execute, ['COMMIT']).start()
+        db.set_autocommit(
+            False, force_begin_transaction_with_broken_autocommit=True
+        )
+        with db.cursor() as cursor:
+            cursor.execute('INSERT INTO item (id) VALUES (%s)', [1])
+        db.commit()
+        db.set_autocommit(True)
+        with db.cursor() as cursor:
+            cursor.execute('SELECT COUNT(*) FROM item')
+            self.assertEqual(cursor.fetchone()[0], 1)
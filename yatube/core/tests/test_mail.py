@@ -0,0 +1,83 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core import mail
+from django.test import SimpleTestCase, override_settings
+
+from core import mail as core_mail
+from core.tasks import get_queue
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    TASKS_QUEUE_PATH=os.path.join(TEMP_DIR, 'tasks.sqlite3')
+)
+class QueuedEmailBackendTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.queue = get_queue()
+        self.queue.connection.execute('DELETE FROM task')
+
+    def _send(self):
+        message = mail.EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@yatube.ru', ['to@yatube.ru']
+        )
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        return message.send()
+
+    def test_messages_are_queued_not_sent(self):
+        """Письмо ставится в очередь, а не отправляется в запросе."""
+        self.assertEqual(self._send(), 1)
+        self.assertEqual(len(mail.outbox), 0)
+        [(_, name, payload)] = self.queue.claim(10)
+        self.assertEqual(name, 'core.mail.deliver_email')
+        self.assertEqual(payload['args'][0]['to'], ['to@yatube.ru'])
+
+    def test_one_task_per_message(self):
+        """Каждое письмо пачки ставится отдельной задачей."""
+        messages = [
+            mail.EmailMessage('Тема', 'Текст', 'from@yatube.ru', [to])
+            for to in ('first@yatube.ru', 'second@yatube.ru')
+        ]
+        self.assertEqual(mail.get_connection().send_messages(messages), 2)
+        tasks = self.queue.claim(10)
+        self.assertEqual(
+            [payload['args'][0]['to'] for _, _, payload in tasks],
+            [['first@yatube.ru'], ['second@yatube.ru']]
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_delivery_restores_message(self):
+        """Задача доставки отправляет письмо настоящим бэкендом."""
+        self._send()
+        self.assertEqual(len(mail.outbox), 1)
+        message = mail.outbox[0]
+        self.assertEqual(message.subject, 'Тема')
+        self.assertEqual(message.to, ['to@yatube.ru'])
+        self.assertEqual(
+            message.alternatives, [('<p>Текст</p>', 'text/html')]
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_deliveries_share_connection(self):
+        """Задачи доставки в одном процессе отправляют письма через одно
+        соединение.
+        """
+        core_mail.reset_delivery_connection()
+        self.addCleanup(core_mail.reset_delivery_connection)
+        with mock.patch(
+            'core.mail.get_connection', wraps=core_mail.get_connection
+        ) as get_connection:
+            for _ in range(3):
+                self._send()
+        self.assertEqual(len(mail.outbox), 3)
+        get_connection.assert_called_once()
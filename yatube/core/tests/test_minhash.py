@@ -0,0 +1,49 @@
+from django.test import SimpleTestCase
+
+from core.minhash import LSHIndex, MinHasher, shingles, similarity, tokenize
+
+
+class MinHashTests(SimpleTestCase):
+    hasher = MinHasher(128)
+
+    def jaccard(self, first, second):
+        return len(first & second) / len(first | second)
+
+    def test_tokens_and_shingles(self):
+        """Текст разбивается на слова и n-граммы слов."""
+        tokens = tokenize('Кот, пёс и кот!', min_length=2)
+        self.assertEqual(tokens, ['кот', 'пёс', 'кот'])
+        self.assertEqual(shingles(tokens, 2), {'кот пёс', 'пёс кот'})
+        self.assertEqual(shingles(['один'], 3), {'один'})
+        self.assertEqual(shingles([], 3), set())
+
+    def test_similarity_estimates_jaccard(self):
+        """Доля совпавших позиций подписей близка к Жаккару."""
+        first = {f'слово{number}' for number in range(100)}
+        second = {f'слово{number}' for number in range(50, 150)}
+        estimate = similarity(
+            self.hasher.signature(first), self.hasher.signature(second)
+        )
+        self.assertAlmostEqual(
+            estimate, self.jaccard(first, second), delta=0.1
+        )
+        self.assertEqual(
+            similarity(
+                self.hasher.signature(first), self.hasher.signature(first)
+            ),
+            1
+        )
+
+    def test_lsh_index(self):
+        """Индекс находит похожие подписи и забывает удалённые."""
+        index = LSHIndex(128, 32)
+        base = {f'слово{number}' for number in range(100)}
+        index.insert('near', self.hasher.signature(base | {'ещё'}))
+        index.insert('far', self.hasher.signature({'совсем', 'другое'}))
+        matches = dict(index.query(self.hasher.signature(base), 0.5))
+        self.assertEqual(set(matches), {'near'})
+        index.remove('near')
+        self.assertEqual(index.query(self.hasher.signature(base), 0.5), [])
+        self.assertEqual(len(index), 1)
+        with self.assertRaises(ValueError):
+            LSHIndex(128, 30)
@@ -0,0 +1,69 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from core.paginator import EstimatedCountPaginator
+
+User = get_user_model()
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(
+            User(username=f'user{number:02}') for number in range(25)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_unfiltered_count_uses_table_statistics(self):
+        """Без фильтров размер берётся из sqlite_stat1 без COUNT(*)."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        paginator = EstimatedCountPaginator(User.objects.all(), 10)
+        with self.assertNumQueries(2):
+            self.assertEqual(paginator.count, 25)
+
+    def test_analyze_command_collects_statistics(self):
+        """Команда analyze_db собирает статистику для оценки размера."""
+        call_command('analyze_db', stdout=StringIO())
+        paginator = EstimatedCountPaginator(User.objects.all(), 10)
+        with self.assertNumQueries(2):
+            self.assertEqual(paginator.count, 25)
+
+    def test_partial_index_statistics_are_ignored(self):
+        """Статистика частичного индекса не занижает размер таблицы."""
+        User.objects.filter(username='user00').update(is_staff=True)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE INDEX user_staff ON auth_user (username) '
+                'WHERE is_staff'
+            )
+            cursor.execute('ANALYZE')
+        paginator = EstimatedCountPaginator(User.objects.all(), 10)
+        self.assertEqual(paginator.count, 25)
+
+    def test_filtered_count_is_cached(self):
+        """Точный COUNT(*) с фильтром выполняется один раз."""
+        queryset = User.objects.filter(username__startswith='user1')
+        self.assertEqual(EstimatedCountPaginator(queryset, 10).count, 10)
+        with self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(queryset, 10).count, 10)
+
+    def test_page_keeps_order(self):
+        """Страница — QuerySet с теми же строками, что и при OFFSET."""
+        queryset = User.objects.filter(
+            username__startswith='user'
+        ).order_by('-username')
+        page = EstimatedCountPaginator(queryset, 10).page(2)
+        self.assertIsInstance(page.object_list, QuerySet)
+        self.assertEqual(
+            [user.username for user in page],
+            [f'user{number:02}' for number in range(14, 4, -1)]
+        )
@@ -0,0 +1,104 @@
+import shutil
+import tempfile
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.middleware.profiling import list_profiles, make_profile_header
+
+User = get_user_model()
+TEMP_PROFILING_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    PROFILING_ENABLED=True,
+    PROFILING_SAMPLE_RATE=0,
+    PROFILING_DIR=TEMP_PROFILING_DIR,
+    PROFILING_MAX_FILES=2
+)
+class ProfilingMiddlewareTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create_user(username='staff', is_staff=True)
+        cls.user = User.objects.create_user(username='noname')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+
+    def setUp(self):
+        shutil.rmtree(TEMP_PROFILING_DIR, ignore_errors=True)
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_request_without_header_is_not_profiled(self):
+        """Запрос без заголовка при нулевой доле не профилируется."""
+        self.guest_client.get(reverse('posts:index'))
+        self.assertEqual(list_profiles(), [])
+
+    def test_signed_header_saves_profile(self):
+        """Запрос с подписанным заголовком сохраняет профиль и стеки."""
+        self.guest_client.get(
+            reverse('posts:index'), HTTP_X_PROFILE=make_profile_header()
+        )
+        profiles = list_profiles()
+        self.assertEqual(len(profiles), 2)
+        self.assertTrue(all('posts.index' in name for name in profiles))
+        self.assertEqual(
+            {name.rsplit('.', 1)[1] for name in profiles},
+            {'prof', 'stacks'}
+        )
+
+    def test_forged_header_is_ignored(self):
+        """Неподписанный заголовок не включает профилирование."""
+        self.guest_client.get(reverse('posts:index'), HTTP_X_PROFILE='1')
+        self.assertEqual(list_profiles(), [])
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_old_profiles_are_rotated(self):
+        """Хранятся только последние PROFILING_MAX_FILES профилей."""
+        for _ in range(3):
+            self.guest_client.get(reverse('about:author'))
+        self.assertEqual(len(list_profiles()), 4)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_profiles_page_for_staff_only(self):
+        """Страница профилей доступна только персоналу."""
+        self.guest_client.get(reverse('about:author'))
+        url = reverse('core:profiles')
+        response = self.staff_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(any(
+            'about.author' in name for name in response.context['profiles']
+        ))
+        response = self.guest_client.get(url)
+        self.assertRedirects(
+            response, f'{reverse("admin:login")}?next={url}'
+        )
+        user_client = Client()
+        user_client.force_login(self.user)
+        response = user_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_profile_download(self):
+        """Файл профиля скачивается, неизвестное имя даёт 404."""
+        self.guest_client.get(reverse('about:author'))
+        name = list_profiles()[0]
+        response = self.staff_client.get(
+            reverse('core:profile_download', kwargs={'name': name})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.staff_client.get(
+            reverse('core:profile_download', kwargs={'name': 'missing.prof'})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from core.ratelimit import hit, parse_rate, ratelimit
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@ratelimit('1/m')
+def limited_view(request):
+    return HttpResponse('ok')
+
+
+class RateLimitTests(TestCase):
+    def setUp(self):
+        caches[settings.RATELIMIT_CACHE_ALIAS].clear()
+
+    def test_parse_rate(self):
+        """Лимит разбирается в количество и период в секундах."""
+        self.assertEqual(parse_rate('10/m'), (10, 60))
+        self.assertEqual(parse_rate('5/30s'), (5, 30))
+        with self.assertRaises(ValueError):
+            parse_rate('10 в минуту')
+
+    def test_sliding_window(self):
+        """Запросы предыдущего окна учитываются пропорционально."""
+        self.assertFalse(hit('test', 'ip:1', '2/10s', now=1000))
+        self.assertFalse(hit('test', 'ip:1', '2/10s', now=1001))
+        self.assertTrue(hit('test', 'ip:1', '2/10s', now=1002))
+        # Середина следующего окна: 3 * 0.5 + 1 > 2.
+        self.assertTrue(hit('test', 'ip:1', '2/10s', now=1015))
+        # Конец следующего окна: 3 * 0.1 + 2 > 2.
+        self.assertTrue(hit('test', 'ip:1', '2/10s', now=1019))
+        self.assertFalse(hit('test', 'ip:2', '2/10s', now=1019))
+
+    def test_decorator(self):
+        """Декоратор отклоняет лишние POST-запросы, но не GET."""
+        factory = RequestFactory()
+        self.assertEqual(limited_view(factory.post('/')).status_code, 200)
+        self.assertEqual(
+            limited_view(factory.post('/')).status_code,
+            HTTPStatus.TOO_MANY_REQUESTS
+        )
+        self.assertEqual(limited_view(factory.get('/')).status_code, 200)
+
+    @override_settings(
+        RATELIMITS={'posts:add_comment': ('2/m', ('POST',))}
+    )
+    def test_middleware_limits_per_user_before_view(self):
+        """Лишний комментарий отклоняется без запросов к БД."""
+        author = User.objects.create_user(username='author')
+        other = User.objects.create_user(username='other')
+        post = Post.objects.create(author=author, text='Пост')
+        url = reverse('posts:add_comment', kwargs={'post_id': post.pk})
+        client = Client()
+        client.force_login(author)
+        for _ in range(2):
+            client.post(url, {'text': 'Комментарий'})
+        with self.assertNumQueries(0):
+            response = client.post(url, {'text': 'Комментарий'})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(Comment.objects.count(), 2)
+        other_client = Client()
+        other_client.force_login(other)
+        other_client.post(url, {'text': 'Комментарий'})
+        self.assertEqual(Comment.objects.count(), 3)
@@ -0,0 +1,54 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase
+from django.urls import NoReverseMatch, reverse
+
+from core.reverse import fast_reverse, get_url_format
+
+
+class FastReverseTests(SimpleTestCase):
+    def test_matches_reverse(self):
+        """fast_reverse строит те же URL, что и reverse()."""
+        cases = (
+            ('posts:index', None, None),
+            ('posts:profile', ['автор пробел'], None),
+            ('posts:post_detail', [42], None),
+            ('posts:post_detail', None, {'post_id': '42'}),
+            ('posts:group_list', ['slug-1'], None),
+            ('users:login', None, None),
+        )
+        for viewname, args, kwargs in cases:
+            with self.subTest(viewname=viewname, args=args, kwargs=kwargs):
+                self.assertEqual(
+                    fast_reverse(viewname, args=args, kwargs=kwargs),
+                    reverse(viewname, args=args, kwargs=kwargs)
+                )
+
+    def test_invalid_values_fall_back_to_reverse(self):
+        """Неподходящие значения дают ту же ошибку, что и reverse()."""
+        for viewname, args in (
+            ('posts:post_detail', ['abc']),
+            ('posts:post_detail', [1, 2]),
+            ('posts:group_list', ['кириллица']),
+            ('posts:unknown', None),
+        ):
+            with self.subTest(viewname=viewname, args=args):
+                with self.assertRaises(NoReverseMatch):
+                    fast_reverse(viewname, args=args)
+
+    def test_url_format_is_cached(self):
+        """Шаблон строки URL вычисляется один раз на имя."""
+        get_url_format.cache_clear()
+        fast_reverse('posts:post_detail', args=[1])
+        fast_reverse('posts:post_detail', args=[2])
+        info = get_url_format.cache_info()
+        self.assertEqual((info.misses, info.hits), (1, 1))
+
+    def test_fast_url_tag(self):
+        """Тег fast_url выводит URL как встроенный тег url."""
+        template = Template(
+            "{% load url_tags %}{% fast_url 'posts:profile' name %}"
+        )
+        self.assertEqual(
+            template.render(Context({'name': 'leo'})),
+            reverse('posts:profile', args=['leo'])
+        )
@@ -0,0 +1,156 @@
+import random
+from html.parser import HTMLParser
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from core.richtext import render
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+ALLOWED_TAGS = {
+    'p', 'br', 'ul', 'ol', 'li', 'blockquote', 'pre', 'code', 'strong',
+    'em', 'a',
+}
+VOID_TAGS = {'br'}
+
+
+class StructureChecker(HTMLParser):
+    """Проверяет теги, атрибуты и вложенность HTML рендера."""
+
+    def __init__(self):
+        super().__init__()
+        self.stack = []
+        self.errors = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in ALLOWED_TAGS:
+            self.errors.append(f'тег {tag}')
+        for name, value in attrs:
+            if name == 'href':
+                if not value.startswith(('https://', 'http://', '/')):
+                    self.errors.append(f'href {value}')
+            elif (name, value) != ('rel', 'nofollow noopener'):
+                self.errors.append(f'атрибут {name}')
+        if tag == 'a' and 'a' in self.stack:
+            self.errors.append('вложенная ссылка')
+        if tag not in VOID_TAGS:
+            self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.stack or self.stack.pop() != tag:
+            self.errors.append(f'закрытие {tag}')
+
+
+def check_structure(html):
+    checker = StructureChecker()
+    checker.feed(html)
+    checker.close()
+    return checker.errors + [f'не закрыт {tag}' for tag in checker.stack]
+
+
+class RenderTests(SimpleTestCase):
+    def test_inline(self):
+        """Строчная разметка, ссылки, теги и упоминания."""
+        self.assertHTMLEqual(
+            render('**жирный**, *курсив*, snake_case, `a*b*c` и '
+                   '[сайт](https://example.com/?a=1&b=2)'),
+            '<p><strong>жирный</strong>, <em>курсив</em>, snake_case, '
+            '<code>a*b*c</code> и <a href="https://example.com/?a=1&b=2" '
+            'rel="nofollow noopener">сайт</a></p>'
+        )
+        self.assertHTMLEqual(
+            render('См. https://ya.ru/a). Привет, @leo. #Тег'),
+            '<p>См. <a href="https://ya.ru/a" rel="nofollow noopener">'
+            'https://ya.ru/a</a>). Привет, <a href="/profile/leo/">@leo</a>. '
+            '<a href="/tags/%D1%82%D0%B5%D0%B3/">#Тег</a></p>'
+        )
+
+    def test_blocks(self):
+        """Абзацы, переносы, списки, цитаты и блоки кода."""
+        self.assertHTMLEqual(
+            render('раз\nдва\n\n- а\n- б\n1. в\n> цитата\n```\n**код**\n```'),
+            '<p>раз<br>два</p><ul><li>а</li><li>б</li></ul>'
+            '<ol><li>в</li></ol><blockquote><p>цитата</p></blockquote>'
+            '<pre><code>**код**</code></pre>'
+        )
+
+    def test_html_escaped(self):
+        """HTML из текста выводится как текст, опасные ссылки — нет."""
+        html = render(
+            '<script>alert(1)</script> [x](javascript:alert(1)) '
+            '"https://a.ru/" onmouseover="x'
+        )
+        self.assertNotIn('<script', html)
+        self.assertNotIn('href="javascript', html)
+        self.assertIn('href="https://a.ru/"', html)
+        self.assertIn('&quot; onmouseover=&quot;x', html)
+
+    def test_nested_constructs(self):
+        """Ссылки и код внутри автоссылок не ломают атрибуты."""
+        html = render(
+            'https://x.y/[a](https://x/onmouseover=onerror=alert;throw-1//)'
+        )
+        self.assertEqual(check_structure(html), [])
+        self.assertNotIn('onmouseover="', html)
+        for text in (
+            'https://x.y/`code`', '[https://a.b/`x`](https://c.d/)',
+            '[[a](https://b.c/)](https://d.e/)', 'https://a.b/#tag@user',
+            '**a *b** c*', '*x **y** z*', '**a _b** c_',
+        ):
+            with self.subTest(text=text):
+                self.assertEqual(check_structure(render(text)), [])
+        self.assertHTMLEqual(
+            render('**a *b** c*'), '<p><strong>a *b</strong> c*</p>'
+        )
+
+    def test_random_input_structure(self):
+        """Случайные сочетания разметки дают корректный HTML."""
+        pieces = [
+            'https://x.y/', '[', ']', '(', ')', '`', '*', '**', '_', '#t',
+            '@u', '\"', "'", '<', '>', '&', 'a', ' ', '\n', '> ', '- ',
+            'on=1', '/',
+        ]
+        generator = random.Random(1)
+        for _ in range(3000):
+            text = ''.join(generator.choices(pieces, k=generator.randint(
+                1, 25
+            )))
+            errors = check_structure(render(text))
+            self.assertEqual(errors, [], text)
+
+
+class RichTextModelTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='noname')
+
+    def test_html_saved_with_text(self):
+        """HTML пересчитывается при сохранении текста."""
+        post = Post.objects.create(author=self.user, text='**один**')
+        self.assertEqual(post.text_html, '<p><strong>один</strong></p>')
+        post.text = '*два*'
+        post.save(update_fields=('text',))
+        post.refresh_from_db()
+        self.assertEqual(post.text_html, '<p><em>два</em></p>')
+        comment = Comment.objects.create(
+            post=post, author=self.user, text='`код`'
+        )
+        self.assertEqual(comment.text_html, '<p><code>код</code></p>')
+
+    def test_pages_use_stored_html(self):
+        """Страницы выводят сохранённый HTML без повторного разбора."""
+        cache.clear()
+        post = Post.objects.create(author=self.user, text='Текст')
+        Post.objects.filter(pk=post.pk).update(text_html='<b>готово</b>')
+        client = Client()
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:post_detail', args=[post.pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(client.get(url), '<b>готово</b>')
@@ -0,0 +1,114 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.cache import SQLiteCache
+
+from core.sessions import SessionStore, flush_sessions, get_journal
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+@override_settings(
+    SESSION_ENGINE='core.sessions',
+    TASKS_QUEUE_PATH=os.path.join(TEMP_DIR, 'tasks.sqlite3')
+)
+class SessionStoreTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.journal = get_journal()
+        self.journal.connection.execute('DELETE FROM session_journal')
+        self.journal.connection.execute(
+            'UPDATE session_flush SET flush_at = 0, locked_until = 0'
+        )
+        cache.clear()
+
+    def _create_session(self):
+        session = SessionStore()
+        session['user'] = 'noname'
+        session.save()
+        return session
+
+    def test_save_does_not_write_to_db(self):
+        """Сохранение сессии не пишет в БД до сброса журнала."""
+        session = self._create_session()
+        self.assertFalse(Session.objects.exists())
+        self.assertEqual(
+            SessionStore(session.session_key)['user'], 'noname'
+        )
+
+    def test_flush_persists_latest_state(self):
+        """Сброс журнала сохраняет последнее состояние сессии."""
+        session = self._create_session()
+        session['user'] = 'author'
+        session.save()
+        flush_sessions()
+        self.assertEqual(Session.objects.count(), 1)
+        cache.clear()
+        self.assertEqual(
+            SessionStore(session.session_key)['user'], 'author'
+        )
+
+    def test_deleted_session_is_not_restored(self):
+        """Удалённая сессия не загружается ни из журнала, ни из БД."""
+        session = self._create_session()
+        flush_sessions()
+        session.delete()
+        cache.clear()
+        self.assertNotIn('user', SessionStore(session.session_key))
+        flush_sessions()
+        self.assertFalse(Session.objects.exists())
+
+    def test_expired_session_is_removed_lazily(self):
+        """Просроченная сессия удаляется при попытке её загрузить."""
+        session = self._create_session()
+        session.set_expiry(-1)
+        session.save()
+        flush_sessions()
+        cache.clear()
+        self.assertNotIn('user', SessionStore(session.session_key))
+        flush_sessions()
+        self.assertFalse(Session.objects.exists())
+
+    def test_logout_seen_by_other_processes(self):
+        """Удаление сессии в одном процессе видно в остальных."""
+        session = self._create_session()
+        other = SessionStore(session.session_key)
+        # Отдельный экземпляр бэкенда на том же файле — как в другом
+        # процессе.
+        other._cache = SQLiteCache(
+            settings.CACHES['default']['LOCATION'], {}
+        )
+        other.delete()
+        self.assertNotIn('user', SessionStore(session.session_key))
+
+    def test_flush_rescheduled_after_lost_task(self):
+        """Сброс планируется снова, если его срок прошёл, а журнал
+        не пуст.
+        """
+        self.assertTrue(self.journal.write('a', 'data', None, 60))
+        self.assertFalse(self.journal.write('b', 'data', None, 60))
+        self.journal.connection.execute(
+            'UPDATE session_flush SET flush_at = 1'
+        )
+        self.assertTrue(self.journal.write('c', 'data', None, 60))
+
+    def test_flushes_do_not_overlap(self):
+        """Пока идёт один сброс, другой не пишет в БД."""
+        self._create_session()
+        self.assertTrue(self.journal.acquire(60))
+        flush_sessions()
+        self.assertFalse(Session.objects.exists())
+        self.journal.release()
+        flush_sessions()
+        self.assertTrue(Session.objects.exists())
+        self.assertEqual(self.journal.pending(), [])
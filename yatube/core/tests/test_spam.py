@@ -0,0 +1,188 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.spam import (
+    DUPLICATE, FLOOD, FingerprintStore, SpamIndex, check_text
+)
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+SPAM = (
+    'Только сегодня огромные скидки на все товары нашего магазина, '
+    'переходите по ссылке и забирайте подарок'
+)
+OTHER = (
+    'Вчера ходили в поход по горам, видели водопад и ночевали '
+    'в палатке у самого озера'
+)
+
+
+class SpamTestMixin:
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.temp_dir = tempfile.mkdtemp()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.temp_dir, ignore_errors=True)
+
+    def setUp(self):
+        # Свой файл подписей на каждый тест.
+        self.path = os.path.join(
+            self.temp_dir, f'{self._testMethodName}.sqlite3'
+        )
+        override = override_settings(SPAM_STORE_PATH=self.path)
+        override.enable()
+        self.addCleanup(override.disable)
+
+
+class SpamIndexTests(SpamTestMixin, TestCase):
+    def new_index(self):
+        return SpamIndex(FingerprintStore(self.path))
+
+    def test_author_duplicate(self):
+        """Повтор своего текста отклоняется и не запоминается."""
+        index = self.new_index()
+        self.assertIsNone(index.check(1, SPAM, now=1000))
+        self.assertEqual(index.check(1, SPAM + '!!!', now=1001), DUPLICATE)
+        self.assertEqual(len(index.global_index), 1)
+        self.assertIsNone(index.check(1, OTHER, now=1002))
+        self.assertIsNone(index.check(1, SPAM, check_author=False, now=1003))
+
+    def test_flood(self):
+        """Один текст от нескольких авторов считается рассылкой."""
+        index = self.new_index()
+        self.assertIsNone(index.check(1, SPAM, now=1000))
+        self.assertIsNone(index.check(2, SPAM, now=1001))
+        self.assertEqual(index.check(3, SPAM, now=1002), FLOOD)
+        self.assertEqual(index.check(4, SPAM, now=1003), FLOOD)
+        self.assertIsNone(index.check(5, OTHER, now=1004))
+
+    def test_short_text_skipped(self):
+        """Короткие тексты не проверяются."""
+        index = self.new_index()
+        for author_id in range(5):
+            self.assertIsNone(index.check(author_id, 'Спасибо!'))
+        self.assertEqual(len(index.global_index), 0)
+
+    @override_settings(SPAM_WINDOW=60)
+    def test_window(self):
+        """Подписи старше окна вытесняются из памяти, а из файла
+        удаляются при очередной чистке.
+        """
+        index = self.new_index()
+        index.check(1, SPAM, now=1000)
+        index.check(2, OTHER, now=1030)
+        with mock.patch('core.spam.random.random', return_value=0):
+            self.assertIsNone(index.check(1, SPAM, now=1070))
+        self.assertEqual([key for _, key in index.entries], [2, 3])
+        self.assertEqual(
+            [row[0] for row in index.store.since(0, 0)], [2, 3]
+        )
+
+    def test_processes_share_store(self):
+        """Индекс дочитывает подписи, записанные другим процессом."""
+        first, second = self.new_index(), self.new_index()
+        first.check(1, SPAM, now=1000)
+        first.check(2, SPAM, now=1001)
+        self.assertEqual(second.check(1, SPAM, now=1002), DUPLICATE)
+        self.assertEqual(second.check(3, SPAM, now=1003), FLOOD)
+
+    @override_settings(SPAM_CHECK_ENABLED=False)
+    def test_disabled(self):
+        check_text(1, SPAM)
+        self.assertIsNone(check_text(1, SPAM))
+
+
+class SpamViewsTests(SpamTestMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.users = [
+            User.objects.create_user(username=f'user{number}')
+            for number in range(3)
+        ]
+
+    def post_as(self, user, url, text):
+        client = Client()
+        client.force_login(user)
+        return client.post(url, {'text': text})
+
+    def test_post_duplicate_rejected(self):
+        """Повтор поста возвращает форму с ошибкой."""
+        url = reverse('posts:post_create')
+        self.post_as(self.users[0], url, SPAM)
+        response = self.post_as(self.users[0], url, SPAM)
+        self.assertFormError(
+            response, 'form', 'text',
+            'Вы недавно уже публиковали почти такой же текст.'
+        )
+        self.assertEqual(Post.objects.count(), 1)
+
+    def test_flood_quarantined(self):
+        """Рассылка сохраняется черновиком и не попадает в ленты."""
+        url = reverse('posts:post_create')
+        for user in self.users:
+            self.post_as(user, url, SPAM)
+        quarantined = Post.objects.get(author=self.users[2])
+        self.assertFalse(quarantined.is_published)
+        self.assertIsNone(quarantined.publish_at)
+        self.assertEqual(Post.objects.published().count(), 2)
+        self.post_as(
+            self.users[2],
+            reverse('posts:post_edit', args=[quarantined.pk]),
+            SPAM + ' Не пропустите!'
+        )
+        quarantined.refresh_from_db()
+        self.assertFalse(quarantined.is_published)
+
+    def test_flood_edit_rejected(self):
+        """Правка опубликованного поста в рассылку возвращает форму
+        с ошибкой, а пост остаётся опубликованным с прежним текстом.
+        """
+        post = Post.objects.create(author=self.users[2], text=OTHER)
+        url = reverse('posts:post_create')
+        for user in self.users[:2]:
+            self.post_as(user, url, SPAM)
+        response = self.post_as(
+            self.users[2], reverse('posts:post_edit', args=[post.pk]), SPAM
+        )
+        self.assertFormError(
+            response, 'form', 'text',
+            'Почти такой же текст недавно публиковали другие авторы.'
+        )
+        post.refresh_from_db()
+        self.assertTrue(post.is_published)
+        self.assertEqual(post.text, OTHER)
+
+    def test_comment_spam_rejected(self):
+        """Повторы и рассылка в комментариях не сохраняются, форма
+        возвращается с ошибкой.
+        """
+        post = Post.objects.create(author=self.users[0], text=OTHER)
+        url = reverse('posts:add_comment', args=[post.pk])
+        for user in self.users[:2]:
+            self.post_as(user, url, SPAM)
+        response = self.post_as(self.users[2], url, SPAM)
+        self.assertFormError(
+            response, 'form', 'text',
+            'Почти такой же текст недавно публиковали другие авторы.'
+        )
+        response = self.post_as(self.users[0], url, SPAM)
+        self.assertFormError(
+            response, 'form', 'text',
+            'Вы недавно уже публиковали почти такой же текст.'
+        )
+        self.assertEqual(
+            list(Comment.objects.values_list('author', flat=True)),
+            [self.users[1].pk, self.users[0].pk]
+        )
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import transaction
+from django.test import (
+    SimpleTestCase, TransactionTestCase, override_settings
+)
+
+from core.tasks import DEAD, PENDING, get_queue, task
+
+TEMP_DIR = tempfile.mkdtemp()
+
+
+@task(max_retries=1, retry_delay=0)
+def write_marker(path, text):
+    with open(path, 'w') as marker:
+        marker.write(text)
+
+
+@task(max_retries=0, retry_delay=0)
+def broken_task():
+    raise ValueError('Ошибка задачи')
+
+
+@override_settings(TASKS_QUEUE_PATH=os.path.join(TEMP_DIR, 'tasks.sqlite3'))
+class TaskQueueTests(SimpleTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def setUp(self):
+        self.queue = get_queue()
+        self.queue.connection.execute('DELETE FROM task')
+
+    def test_delay_puts_task_into_queue(self):
+        """delay() сохраняет вызов в очереди, а не выполняет его."""
+        path = os.path.join(TEMP_DIR, 'delayed.txt')
+        write_marker.delay(path, 'готово')
+        self.assertFalse(os.path.exists(path))
+        [(_, name, payload)] = self.queue.claim(10)
+        self.assertEqual(name, 'core.tests.test_tasks.write_marker')
+        self.assertEqual(payload['args'], [path, 'готово'])
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_mode_runs_task_immediately(self):
+        """При TASKS_ALWAYS_EAGER задача выполняется сразу."""
+        path = os.path.join(TEMP_DIR, 'eager.txt')
+        write_marker.delay(path, 'готово')
+        with open(path) as marker:
+            self.assertEqual(marker.read(), 'готово')
+
+    def test_failed_task_is_retried_then_dead(self):
+        """Упавшая задача откладывается, а после всех попыток — dead."""
+        task_id = write_marker.delay('unused', 'unused')
+        self.queue.claim(10)
+        self.queue.fail(task_id, 'ошибка')
+        self.assertEqual(self.queue.stats(), {PENDING: 1})
+        self.queue.claim(10)
+        self.queue.fail(task_id, 'ошибка')
+        self.assertEqual(self.queue.stats(), {DEAD: 1})
+
+    def test_runworker_executes_tasks(self):
+        """Воркер выполняет задачи и убирает их из очереди."""
+        path = os.path.join(TEMP_DIR, 'worker.txt')
+        write_marker.delay(path, 'из воркера')
+        broken_task.delay()
+        call_command('runworker', once=True, processes=1, stderr=StringIO())
+        with open(path) as marker:
+            self.assertEqual(marker.read(), 'из воркера')
+        self.assertEqual(self.queue.stats(), {DEAD: 1})
+
+
+@override_settings(TASKS_QUEUE_PATH=os.path.join(TEMP_DIR, 'tasks.sqlite3'))
+class TaskTransactionTests(TransactionTestCase):
+    def setUp(self):
+        self.queue = get_queue()
+        self.queue.connection.execute('DELETE FROM task')
+
+    def test_delay_waits_for_commit(self):
+        """В транзакции задача ставится в очередь только после фиксации."""
+        with transaction.atomic():
+            self.assertIsNone(write_marker.delay('unused', 'unused'))
+            self.assertEqual(self.queue.stats(), {})
+        self.assertEqual(self.queue.stats(), {PENDING: 1})
+
+    def test_rolled_back_task_is_dropped(self):
+        """Задача из отменённой транзакции не попадает в очередь."""
+        with self.assertRaises(ValueError):
+            with transaction.atomic():
+                write_marker.delay('unused', 'unused')
+                raise ValueError
+        self.assertEqual(self.queue.stats(), {})
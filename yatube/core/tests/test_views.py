@@ -0,0 +1,42 @@
+from http import HTTPStatus
+
+from django.test import Client, RequestFactory, TestCase
+from django.urls import reverse
+
+from core.memo import get_nav_urls, request_memo
+
+
+class CoreViewTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_nonexist_url_correct(self):
+        """Страница ошибки 404 отображается корректно."""
+        response = self.guest_client.get('/nonexist-page/')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+        self.assertTemplateUsed(response, 'core/404.html')
+
+
+class RequestMemoTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get('/')
+
+    def test_value_computed_once_per_request(self):
+        """Значение вычисляется один раз за запрос."""
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(request_memo(self.request, 'key', factory), 1)
+        self.assertEqual(request_memo(self.request, 'key', factory), 1)
+        other_request = RequestFactory().get('/')
+        self.assertEqual(request_memo(other_request, 'key', factory), 2)
+
+    def test_nav_urls(self):
+        """Адреса шапки совпадают с результатом reverse."""
+        nav_urls = get_nav_urls(self.request)
+        self.assertEqual(nav_urls['posts_index'], reverse('posts:index'))
+        self.assertEqual(nav_urls['users_login'], reverse('users:login'))
+        self.assertIs(get_nav_urls(self.request), nav_urls)
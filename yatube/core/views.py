@@ -1,5 +1,13 @@
+import os
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import FileResponse, Http404
 from django.shortcuts import render
 
+from core.middleware.profiling import list_profiles, make_profile_header
+
 
 def page_not_found(request, exception):
     context = {
@@ -22,3 +30,26 @@ def csrf_failure(request, reason=''):
 
 def bad_request(request, exception):
     return render(request, 'core/400.html', status=400)
+
+
+@staff_member_required
+def profiles(request):
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Профили запросов',
+        'profiles': list_profiles(),
+        'profile_header': make_profile_header(),
+        'profiling_enabled': settings.PROFILING_ENABLED,
+    }
+    return render(request, 'core/profiles.html', context)
+
+
+@staff_member_required
+def profile_download(request, name):
+    if name not in list_profiles():
+        raise Http404('Профиль не найден')
+    return FileResponse(
+        open(os.path.join(settings.PROFILING_DIR, name), 'rb'),
+        as_attachment=True,
+        filename=name
+    )
@@ -1,6 +1,64 @@
+import re
+
+from django import forms
 from django.contrib import admin
+from django.contrib.admin import helpers
+from django.template.response import TemplateResponse
+
+from core.paginator import EstimatedCountPaginator
+from posts.models import Comment, Follow, Group, ModerationJob, Post
+from posts.moderation import create_job, dump_selection
+
+
+class RegroupForm(forms.Form):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        help_text='Пустое значение убирает посты из групп'
+    )
+
+
+class PurgeCommentsForm(forms.Form):
+    pattern = forms.CharField(
+        max_length=200,
+        label='Регулярное выражение',
+        help_text='Будут удалены все комментарии, текст которых подходит '
+                  'под выражение, а не только выбранные'
+    )
+
+    def clean_pattern(self):
+        pattern = self.cleaned_data['pattern']
+        try:
+            re.compile(pattern)
+        except re.error as error:
+            raise forms.ValidationError(f'Некорректное выражение: {error}')
+        return pattern
+
+
+def moderation_form(modeladmin, request, queryset, form, title):
+    """Промежуточная страница действия с формой параметров задания."""
+    context = {
+        **modeladmin.admin_site.each_context(request),
+        'title': title,
+        'opts': modeladmin.model._meta,
+        'form': form,
+        'action': request.POST['action'],
+        'selected': request.POST.getlist(helpers.ACTION_CHECKBOX_NAME),
+        'select_across': request.POST.get('select_across', '0'),
+        'selected_count': queryset.count(),
+        'action_checkbox_name': helpers.ACTION_CHECKBOX_NAME,
+    }
+    return TemplateResponse(
+        request, 'admin/posts/moderation_form.html', context
+    )
+
 
-from posts.models import Comment, Follow, Group, Post
+def submitted_form(request, form_class, **kwargs):
+    """Форма действия, заполненная, только если её отправили."""
+    if 'apply' in request.POST:
+        return form_class(request.POST, **kwargs)
+    return form_class(**kwargs)
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -10,11 +68,55 @@ class PostAdmin(admin.ModelAdmin):
         'pub_date',
         'author',
         'group',
+        'is_published',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    list_filter = ('pub_date', 'is_published')
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     empty_value_display = '-пусто-'
+    actions = ('regroup_posts', 'delete_author_posts')
+
+    def regroup_posts(self, request, queryset):
+        form = submitted_form(request, RegroupForm)
+        if not form.is_valid():
+            return moderation_form(
+                self, request, queryset, form, 'Перенос постов в группу'
+            )
+        group = form.cleaned_data['group']
+        job = create_job(
+            ModerationJob.REGROUP,
+            {
+                'selection': dump_selection(request, queryset),
+                'group_id': group.pk if group else None,
+            },
+            request.user
+        )
+        self.message_user(request, f'Задание «{job}» поставлено в очередь.')
+        return None
+    regroup_posts.short_description = 'Перенести в группу (в фоне)'
+
+    def delete_author_posts(self, request, queryset):
+        form = submitted_form(request, forms.Form)
+        author_ids = sorted(set(queryset.values_list('author_id', flat=True)))
+        if not form.is_bound:
+            return moderation_form(
+                self, request, queryset, form,
+                f'Удалить все посты авторов: {len(author_ids)}'
+            )
+        job = create_job(
+            ModerationJob.DELETE_AUTHOR_POSTS,
+            {'author_ids': author_ids},
+            request.user
+        )
+        self.message_user(request, f'Задание «{job}» поставлено в очередь.')
+        return None
+    delete_author_posts.short_description = (
+        'Удалить все посты авторов выбранных постов (в фоне)'
+    )
 
 
 class GroupAdmin(admin.ModelAdmin):
@@ -34,8 +136,36 @@ class CommentAdmin(admin.ModelAdmin):
         'author',
         'text'
     )
-    search_fields = ('author',)
-    list_filter = ('author',)
+    list_select_related = ('post', 'author')
+    autocomplete_fields = ('post', 'author')
+    search_fields = ('author__username',)
+    date_hierarchy = 'pub_date'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = ('purge_comments',)
+
+    def purge_comments(self, request, queryset):
+        first = queryset.first()
+        form = submitted_form(
+            request, PurgeCommentsForm,
+            initial={'pattern': re.escape(first.text) if first else ''}
+        )
+        if not form.is_valid():
+            return moderation_form(
+                self, request, queryset, form,
+                'Удаление комментариев по шаблону'
+            )
+        pattern = form.cleaned_data['pattern']
+        job = create_job(
+            ModerationJob.PURGE_COMMENTS,
+            {'pattern': pattern},
+            request.user
+        )
+        self.message_user(request, f'Задание «{job}» поставлено в очередь.')
+        return None
+    purge_comments.short_description = (
+        'Удалить комментарии по шаблону (в фоне)'
+    )
 
 
 class FollowAdmin(admin.ModelAdmin):
@@ -44,11 +174,44 @@ class FollowAdmin(admin.ModelAdmin):
         'user',
         'author'
     )
-    search_fields = ('user', 'author')
-    list_filter = ('user', 'author')
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    search_fields = ('user__username', 'author__username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+class ModerationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'action',
+        'status',
+        'processed',
+        'total',
+        'created_by',
+        'created_at',
+        'finished_at',
+    )
+    list_select_related = ('created_by',)
+    list_filter = ('status', 'action')
+    readonly_fields = (
+        'action',
+        'params',
+        'status',
+        'processed',
+        'total',
+        'cursor',
+        'error',
+        'created_by',
+        'finished_at',
+    )
+
+    def has_add_permission(self, request):
+        return False
 
 
 admin.site.register(Post, PostAdmin)
 admin.site.register(Group, GroupAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(Follow, FollowAdmin)
+admin.site.register(ModerationJob, ModerationJobAdmin)
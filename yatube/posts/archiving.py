@@ -0,0 +1,190 @@
+"""Перенос старых и удалённых постов в архивные таблицы.
+
+Команда ``python manage.py archive_posts`` пачками переносит в
+``ArchivedPost`` и ``ArchivedComment`` удалённые посты и посты старше
+POSTS_ARCHIVE_AFTER_DAYS дней вместе с комментариями, а также старые
+комментарии к постам, которые остаются на месте, чтобы таблицы и
+индексы лент оставались небольшими.
+
+Перенесённые посты остаются в месячных счётчиках и сводке профиля:
+профиль и месячные архивы листают сначала живые посты, а затем
+архивные, старые ссылки на посты читают архив. Теги, «похожие посты» и
+уведомления относятся только к живым постам и удаляются при переносе.
+"""
+from datetime import timedelta
+
+from django.db import router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Notification, Post,
+    PostSignature, PostTag, RelatedPost
+)
+from posts.notifications import reset_unread_count
+
+
+class PostsWithArchive:
+    """Живые посты, за которыми идут архивные, как один список для
+    Paginator.
+
+    Архивные посты старше живых, поэтому порядок по убыванию даты
+    сохраняется. Живые посты пересчитываются, только когда страница
+    начинается в архиве.
+    """
+
+    def __init__(self, live, archived, count):
+        self.live = live
+        self.archived = archived
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, key):
+        start, stop = key.start or 0, key.stop
+        posts = list(self.live[start:stop])
+        if len(posts) == stop - start:
+            return posts
+        live_count = start + len(posts) if posts else self.live.count()
+        return posts + list(
+            self.archived[max(start - live_count, 0):stop - live_count]
+        )
+
+
+def archived_posts():
+    """Архивные посты, которые показываются читателям."""
+    return ArchivedPost.objects.filter(
+        deleted_at__isnull=True
+    ).select_related('author', 'group')
+
+
+def get_post_comments(post_id):
+    """Комментарии живого поста, включая перенесённые в архив."""
+    return [
+        *Comment.objects.filter(post_id=post_id).select_related('author'),
+        *ArchivedComment.objects.filter(post_id=post_id)
+        .select_related('author'),
+    ]
+
+
+def raw_delete(queryset):
+    """Удалить строки одним запросом, без сигналов и каскада ORM."""
+    queryset._raw_delete(router.db_for_write(queryset.model))
+
+
+def move_comments(comments):
+    """Перенести комментарии в архив; вернуть их количество."""
+    comments = list(comments)
+    ArchivedComment.objects.bulk_create(
+        ArchivedComment(
+            id=comment.pk,
+            pub_date=comment.pub_date,
+            post_id=comment.post_id,
+            author_id=comment.author_id,
+            text=comment.text,
+            text_html=comment.text_html,
+        )
+        for comment in comments
+    )
+    raw_delete(Comment.objects.filter(pk__in=[c.pk for c in comments]))
+    return len(comments)
+
+
+def remove_posts(post_ids):
+    """Удалить перенесённые посты и всё, что относится только к живым.
+
+    Сигналы post_delete не отправляются: архивные посты остаются в
+    счётчиках архива и профилей.
+    """
+    # Соседи архивных постов лишатся их в списках похожих; подписи
+    # удаляются, чтобы refresh_related пересчитал эти списки.
+    neighbours = list(
+        RelatedPost.objects.filter(related_id__in=post_ids)
+        .values_list('post_id', flat=True)
+    )
+    raw_delete(PostSignature.objects.filter(
+        post_id__in=[*neighbours, *post_ids]
+    ))
+    raw_delete(RelatedPost.objects.filter(
+        Q(post_id__in=post_ids) | Q(related_id__in=post_ids)
+    ))
+    raw_delete(PostTag.objects.filter(post_id__in=post_ids))
+    notifications = Notification.objects.filter(post_id__in=post_ids)
+    recipients = set(
+        notifications.filter(is_read=False)
+        .values_list('recipient_id', flat=True)
+    )
+    raw_delete(notifications)
+    for recipient_id in recipients:
+        reset_unread_count(recipient_id)
+    raw_delete(Post.objects.filter(pk__in=post_ids))
+
+
+def archive_posts(queryset, batch_size):
+    """Перенести в архив до batch_size постов; вернуть их количество."""
+    with transaction.atomic():
+        posts = list(queryset.order_by('pk')[:batch_size])
+        if not posts:
+            return 0
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(
+                id=post.pk,
+                pub_date=post.pub_date,
+                text=post.text,
+                text_html=post.text_html,
+                author_id=post.author_id,
+                group_id=post.group_id,
+                image=post.image.name,
+                deleted_at=post.deleted_at,
+            )
+            for post in posts
+        )
+        post_ids = [post.pk for post in posts]
+        move_comments(Comment.objects.filter(post_id__in=post_ids))
+        remove_posts(post_ids)
+    return len(posts)
+
+
+def archive_comments(queryset, batch_size):
+    """Перенести в архив до batch_size комментариев живых постов."""
+    with transaction.atomic():
+        return move_comments(queryset.order_by('pk')[:batch_size])
+
+
+def get_archivable(days):
+    """Наборы постов для архивации: удалённые и слишком старые."""
+    horizon = timezone.now() - timedelta(days=days)
+    return (
+        Post.objects.filter(is_published=False, deleted_at__isnull=False),
+        Post.objects.published().filter(pub_date__lt=horizon),
+    )
+
+
+def archive_in_batches(archive, queryset, batch_size):
+    archived = 0
+    while True:
+        count = archive(queryset, batch_size)
+        archived += count
+        if count < batch_size:
+            return archived
+
+
+def archive_old_posts(days, batch_size):
+    """Перенести в архив подходящие посты, затем оставшиеся старые
+    комментарии; вернуть количество постов и комментариев.
+    """
+    posts = sum(
+        archive_in_batches(archive_posts, queryset, batch_size)
+        for queryset in get_archivable(days)
+    )
+    horizon = timezone.now() - timedelta(days=days)
+    comments = archive_in_batches(
+        archive_comments,
+        Comment.objects.filter(pub_date__lt=horizon),
+        batch_size
+    )
+    return posts, comments
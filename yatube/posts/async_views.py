@@ -0,0 +1,128 @@
+"""Асинхронные варианты страниц для анонимных читателей.
+
+Работают под ``yatube.asgi`` для анонимных GET-запросов (см.
+``core.asgi.AsyncRouter``): запрос проходит через middleware, а вместо
+обычного view выполняется асинхронный. Каждый запрос к БД уходит в пул
+потоков отдельным вызовом, а цикл событий только ждёт результатов,
+поэтому между запросами страница не держит поток. Независимые запросы
+одной страницы выполняются одновременно: подсчёт постов и строки
+страницы на главной, строки страницы и архив месяцев группы,
+комментарии, похожие посты и теги поста. Профилю нужна сначала сводка
+автора, поэтому его запросы идут друг за другом. Запросы и контекст
+строятся теми же функциями, что и в posts.views, поэтому страницы
+совпадают.
+"""
+import asyncio
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.shortcuts import render
+
+from core.asgi import run_sync
+from posts.archiving import get_post_comments
+from posts.groups import get_group_or_404
+from posts.models import Post
+from posts.pages import index_cache
+from posts.profiles import get_profile_summary
+from posts.related import get_related_posts
+from posts.views import (
+    archived_post_detail, check_post_visible, get_group_buckets,
+    get_group_posts, get_index_posts, get_page_obj, get_post_context,
+    get_post_tags, get_profile_context, get_profile_posts
+)
+
+
+def load_page(request, post_list, count=None):
+    """Страница постов с уже загруженными строками."""
+    page_obj = get_page_obj(request, post_list, count=count)
+    page_obj.object_list = list(page_obj.object_list)
+    return page_obj
+
+
+async def load_counted_page(request, post_list):
+    """Страница постов; COUNT(*) и строки запрошенной страницы читаются
+    одновременно.
+
+    Если номер страницы вне диапазона, строки нужной страницы читаются
+    после подсчёта.
+    """
+    number = request.GET.get('page') or '1'
+    number = int(number) if number.isdigit() and int(number) else 1
+    per_page = settings.POSTS_ON_PAGE
+    bottom = (number - 1) * per_page
+    count, rows = await asyncio.gather(
+        run_sync(post_list.count),
+        run_sync(list, post_list[bottom:bottom + per_page]),
+    )
+    paginator = Paginator(post_list, per_page)
+    paginator.count = count
+    page_obj = paginator.get_page(number)
+    if page_obj.number == number:
+        page_obj.object_list = rows
+    else:
+        page_obj.object_list = await run_sync(list, page_obj.object_list)
+    return page_obj
+
+
+async def index(request):
+    response = await run_sync(index_cache.process_request, request)
+    if response is not None:
+        return response
+    page_obj = await load_counted_page(request, get_index_posts())
+    response = await run_sync(
+        render, request, 'posts/index.html', {'page_obj': page_obj}
+    )
+    return await run_sync(index_cache.process_response, request, response)
+
+
+async def group_posts(request, slug):
+    group = await run_sync(get_group_or_404, slug)
+    page_obj, archive_buckets = await asyncio.gather(
+        run_sync(load_page, request, get_group_posts(group)),
+        run_sync(list, get_group_buckets(group)),
+    )
+    context = {
+        'group': group,
+        'page_obj': page_obj,
+        'archive_buckets': archive_buckets,
+    }
+    return await run_sync(render, request, 'posts/group_list.html', context)
+
+
+async def profile(request, username):
+    summary = await run_sync(get_profile_summary, username)
+    page_obj = await run_sync(
+        load_page, request, get_profile_posts(summary),
+        count=summary.posts_count
+    )
+    context = get_profile_context(summary, page_obj)
+    return await run_sync(render, request, 'posts/profile.html', context)
+
+
+async def post_detail(request, post_id):
+    post = await run_sync(
+        Post.objects.select_related('author', 'group')
+        .filter(pk=post_id).first
+    )
+    if post is None:
+        return await run_sync(archived_post_detail, request, post_id)
+    check_post_visible(request, post)
+    comments, related_posts, tags = await asyncio.gather(
+        run_sync(get_post_comments, post_id),
+        run_sync(get_related_posts, post_id),
+        run_sync(list, get_post_tags(post_id)),
+    )
+    context = await run_sync(
+        get_post_context, post, comments, related_posts, tags
+    )
+    return await run_sync(
+        render, request, 'posts/post_detail.html', context
+    )
+
+
+ASYNC_VIEWS = {
+    'posts:index': index,
+    'posts:group_list': group_posts,
+    'posts:profile': profile,
+    'posts:post_detail': post_detail,
+}
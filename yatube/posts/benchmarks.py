@@ -0,0 +1,330 @@
+"""Сценарии ``python manage.py bench`` для страниц и запросов постов."""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.paginator import Paginator
+from django.core.wsgi import get_wsgi_application
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.test import Client, RequestFactory, override_settings
+from django.urls import reverse
+
+from core import richtext
+from core.asgi import WsgiBridge, build_environ
+from core.benchmarks import benchmark, report, time_calls, timer
+from core.reverse import fast_reverse
+from posts.archiving import get_post_comments
+from posts.models import Comment, Follow, Group, Post
+from posts.ranking import get_candidates, rank_feed, score
+
+
+@contextmanager
+def _file_database(engine, path):
+    """Базой по умолчанию на время блока становится файл path с движком
+    engine и схемой из миграций; потоки открывают к нему свои
+    соединения.
+    """
+    options = settings.DATABASES[DEFAULT_DB_ALIAS]['OPTIONS']
+    if engine != 'core.db.sqlite3':
+        options = {'timeout': options['timeout']}
+    old_settings = connections.databases[DEFAULT_DB_ALIAS]
+    old_connection = connections[DEFAULT_DB_ALIAS]
+    settings_dict = {
+        **old_settings, 'ENGINE': engine, 'NAME': path, 'OPTIONS': options
+    }
+    connections.databases[DEFAULT_DB_ALIAS] = settings_dict
+    connections[DEFAULT_DB_ALIAS] = load_backend(engine).DatabaseWrapper(
+        settings_dict, DEFAULT_DB_ALIAS
+    )
+    try:
+        call_command('migrate', verbosity=0, interactive=False)
+        yield
+    finally:
+        connections[DEFAULT_DB_ALIAS].close()
+        connections.databases[DEFAULT_DB_ALIAS] = old_settings
+        connections[DEFAULT_DB_ALIAS] = old_connection
+
+
+def _run_readers_and_writer(writes, readers_count):
+    """Один поток пишет комментарии через add_comment, остальные читают
+    комментарии поста так же, как страница поста.
+    """
+    author = get_user_model().objects.create_user(username='bench-author')
+    reader = get_user_model().objects.create_user(username='bench-reader')
+    post = Post.objects.create(author=author, text='Пост для комментариев')
+    stop = threading.Event()
+    reads = []
+    errors = []
+
+    def read():
+        done = 0
+        while not stop.is_set():
+            try:
+                get_post_comments(post.pk)
+                done += 1
+            except Exception as error:
+                errors.append(error)
+        connections.close_all()
+        reads.append(done)
+
+    threads = [threading.Thread(target=read) for _ in range(readers_count)]
+    client = Client()
+    client.force_login(reader)
+    url = reverse('posts:add_comment', args=[post.pk])
+    for thread in threads:
+        thread.start()
+    start = time.perf_counter()
+    for number in range(writes):
+        client.post(url, {'text': f'Комментарий {number}'})
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in threads:
+        thread.join()
+    saved = Comment.objects.filter(post=post).count()
+    return sum(reads) / elapsed, elapsed, writes - saved + len(errors)
+
+
+@benchmark('sqlite')
+def sqlite_benchmark(stdout, iterations):
+    """Чтение комментариев во время их записи через add_comment:
+    стандартный бэкенд SQLite с журналом отката против core.db.sqlite3
+    с WAL и BEGIN IMMEDIATE.
+    """
+    rows = []
+    engines = ('django.db.backends.sqlite3', 'core.db.sqlite3')
+    for engine in engines:
+        cache.clear()
+        with tempfile.TemporaryDirectory() as db_dir, \
+                override_settings(RATELIMIT_ENABLED=False), \
+                _file_database(engine, os.path.join(db_dir, 'bench.db')):
+            throughput, elapsed, errors = _run_readers_and_writer(
+                iterations, readers_count=4
+            )
+        rows += [
+            (f'{engine}: чтений в секунду', f'{throughput:.0f}'),
+            (f'{engine}: время записи', elapsed),
+            (f'{engine}: потерянных записей и ошибок', errors),
+        ]
+    report(stdout, f'SQLite, комментариев через add_comment: {iterations}',
+           rows)
+
+
+def _make_posts(count):
+    author, _ = get_user_model().objects.get_or_create(
+        username='bench-author'
+    )
+    group, _ = Group.objects.get_or_create(
+        slug='bench-group',
+        defaults={'title': 'Группа', 'description': 'Описание'}
+    )
+    Post.objects.bulk_create(
+        Post(
+            author=author,
+            group=group,
+            text=f'Пост номер {number}',
+            text_html=richtext.render(f'Пост номер {number}'),
+        )
+        for number in range(count)
+    )
+    return list(Post.objects.select_related('author', 'group')[:count])
+
+
+@benchmark('templates')
+def templates_benchmark(stdout, iterations):
+    """Рендеринг главной страницы из POSTS_ON_PAGE постов без кэша
+    шаблонов и с кэширующим загрузчиком.
+    """
+    posts = _make_posts(settings.POSTS_ON_PAGE)
+    request = RequestFactory().get('/')
+    request.user = AnonymousUser()
+    context = {
+        'page_obj': Paginator(posts, settings.POSTS_ON_PAGE).page(1)
+    }
+    cached = engines['django']
+    options = dict(settings.TEMPLATES[0]['OPTIONS'])
+    options.pop('loaders', None)
+    uncached = DjangoTemplates({
+        'NAME': 'uncached',
+        'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': True,
+        'OPTIONS': options,
+    })
+    rows = [
+        ('страница, без кэша шаблонов', time_calls(
+            lambda: uncached.get_template('posts/index.html').render(
+                context, request
+            ),
+            iterations
+        )),
+        ('страница, кэширующий загрузчик', time_calls(
+            lambda: cached.get_template('posts/index.html').render(
+                context, request
+            ),
+            iterations
+        )),
+    ]
+    report(stdout, f'Шаблоны, рендеров на вариант: {iterations}', rows)
+
+
+def _card_urls(reverse_func, post):
+    return (
+        reverse_func('posts:profile', args=[post.author.username]),
+        reverse_func('posts:post_detail', args=[post.pk]),
+        reverse_func('posts:group_list', args=[post.group.slug]),
+    )
+
+
+@benchmark('urls')
+def urls_benchmark(stdout, iterations):
+    """Построение трёх ссылок карточки поста через reverse() и
+    fast_reverse(), а также рендеринг списка карточек.
+    """
+    posts = _make_posts(settings.POSTS_ON_PAGE)
+    post = posts[0]
+    assert _card_urls(reverse, post) == _card_urls(fast_reverse, post)
+    card_loop = engines['django'].from_string(
+        "{% for post in page_obj %}"
+        "{% include 'posts/includes/post_output.html' %}"
+        "{% endfor %}"
+    )
+    context = {
+        'page_obj': Paginator(posts, settings.POSTS_ON_PAGE).page(1)
+    }
+    rows = [
+        ('ссылки карточки, reverse', time_calls(
+            lambda: _card_urls(reverse, post), iterations
+        )),
+        ('ссылки карточки, fast_reverse', time_calls(
+            lambda: _card_urls(fast_reverse, post), iterations
+        )),
+        (f'{settings.POSTS_ON_PAGE} карточек, fast_url', time_calls(
+            lambda: card_loop.render(context), iterations
+        )),
+    ]
+    report(stdout, f'Ссылки, повторов: {iterations}', rows)
+
+
+async def _asgi_request(application, path):
+    """Выполнить GET-запрос к ASGI-приложению; вернуть статус."""
+    scope = {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': b'',
+        'headers': [(b'host', b'localhost')],
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    return messages[0]['status']
+
+
+@benchmark('asgi')
+def asgi_benchmark(stdout, iterations):
+    """Пропускная способность при BENCH_CLIENTS одновременных клиентах:
+    WSGI-приложение в пуле из ASGI_THREADS потоков против
+    ASGI-приложения с асинхронными views.
+    """
+    from yatube.asgi import application
+
+    _make_posts(settings.POSTS_ON_PAGE * 3)
+    post = Post.objects.first()
+    paths = [
+        '/',
+        '/group/bench-group/',
+        '/profile/bench-author/',
+        f'/posts/{post.pk}/',
+    ]
+    requests = [path for _ in range(iterations) for path in paths]
+    wsgi = WsgiBridge(get_wsgi_application())
+
+    def wsgi_request(path):
+        environ = build_environ({
+            'method': 'GET',
+            'path': path,
+            'headers': [(b'host', b'localhost')],
+        }, b'')
+        return wsgi.call_wsgi(environ)[0]
+
+    async def asgi_requests():
+        clients = asyncio.Semaphore(settings.BENCH_CLIENTS)
+
+        async def client(path):
+            async with clients:
+                return await _asgi_request(application, path)
+        return await asyncio.gather(*(client(path) for path in requests))
+
+    results = {}
+    cache.clear()
+    with timer(results, 'wsgi'):
+        with ThreadPoolExecutor(settings.ASGI_THREADS) as executor:
+            statuses = set(executor.map(wsgi_request, requests))
+    assert statuses == {200}, statuses
+    cache.clear()
+    with timer(results, 'asgi'):
+        statuses = set(asyncio.run(asgi_requests()))
+    assert statuses == {200}, statuses
+    rows = [
+        (f'{label}, запросов в секунду', f'{len(requests) / seconds:.0f}')
+        for label, seconds in results.items()
+    ]
+    report(
+        stdout,
+        f'ASGI и WSGI, запросов: {len(requests)}, '
+        f'клиентов: {settings.BENCH_CLIENTS}, '
+        f'потоков: {settings.ASGI_THREADS}',
+        rows
+    )
+
+
+@benchmark('ranking')
+def ranking_benchmark(stdout, iterations):
+    """Ранжирование FEED_CANDIDATES кандидатов ленты подписок:
+    только оценка массивами NumPy и весь расчёт с запросами к БД.
+    """
+    User = get_user_model()
+    reader, _ = User.objects.get_or_create(username='bench-reader')
+    authors = [
+        User.objects.get_or_create(username=f'bench-ranked-{number}')[0]
+        for number in range(20)
+    ]
+    Follow.objects.bulk_create(
+        Follow(user=reader, author=author) for author in authors
+    )
+    posts = Post.objects.bulk_create(
+        Post(author=authors[number % len(authors)], text=f'Пост {number}')
+        for number in range(settings.FEED_CANDIDATES)
+    )
+    posts = list(Post.objects.filter(author__in=authors)[:len(posts)])
+    Comment.objects.bulk_create(
+        Comment(post=posts[number % 50], author=reader, text='Комментарий')
+        for number in range(500)
+    )
+    candidates = get_candidates(reader.pk)
+    rows = [
+        (f'оценка {len(candidates.post_ids)} кандидатов', time_calls(
+            lambda: score(candidates, reader.pk), iterations
+        )),
+        ('ранжирование с запросами', time_calls(
+            lambda: rank_feed(reader.pk), iterations
+        )),
+    ]
+    report(stdout, f'Лента подписок, повторов: {iterations}', rows)
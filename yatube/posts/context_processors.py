@@ -0,0 +1,14 @@
+from django.utils.functional import SimpleLazyObject
+
+from posts.memo import get_unread_notifications
+
+
+def memo(request):
+    """Добавляет число непрочитанных уведомлений, загружаемое не больше
+    одного раза за запрос.
+    """
+    return {
+        'unread_notifications': SimpleLazyObject(
+            lambda: get_unread_notifications(request)
+        ),
+    }
@@ -0,0 +1,104 @@
+"""Новые посты ленты после курсора.
+
+Курсор — номер публикации (``Post.publish_seq``) самого свежего поста,
+который уже видит клиент. Номер выдаётся в момент публикации тем же
+UPDATE, которым записывается: SQLite выполняет записи по одной, поэтому
+номера растут в порядке фиксации транзакций, и пост, опубликованный
+позже курсора, не окажется перед ним, какой бы ни была его дата.
+Запрос идёт по уникальному индексу номера и читает не больше
+NEW_POSTS_LIMIT + 1 строк, поэтому проверка обходится дешевле
+перезагрузки страницы. Функции используются и JSON-view ``new_posts``,
+и потоком SSE в posts.streams.
+"""
+from django.conf import settings
+from django.db.models import (
+    F, Func, IntegerField, Max, OuterRef, Subquery, Value
+)
+from django.db.models.functions import Coalesce
+from django.http import Http404
+
+from posts.groups import get_group_or_404
+from posts.models import Post
+
+FEEDS = ('index', 'group', 'follow')
+
+
+def assign_publish_seq(post_ids, reassign=True):
+    """Выдать постам следующие номера публикации одним UPDATE.
+
+    Номер поста — последний выданный номер плюс место поста среди
+    post_ids по возрастанию id. Оба слагаемых считаются внутри UPDATE,
+    поэтому параллельные публикации не получат одинаковых номеров. Без
+    ``reassign`` уже пронумерованные посты пропускаются, а их номера
+    остаются пропусками.
+    """
+    last_seq = Post.objects.filter(
+        publish_seq__isnull=False
+    ).order_by('-publish_seq').values('publish_seq')[:1]
+    rank = Post.objects.filter(
+        pk__in=post_ids, pk__lte=OuterRef('pk')
+    ).order_by().annotate(
+        rank=Func(F('pk'), function='COUNT', output_field=IntegerField())
+    ).values('rank')
+    posts = Post.objects.filter(pk__in=post_ids)
+    if not reassign:
+        posts = posts.filter(publish_seq__isnull=True)
+    posts.update(
+        publish_seq=Coalesce(Subquery(last_seq), Value(0)) + Subquery(rank)
+    )
+
+
+def get_last_seq():
+    """Номер последней публикации или 0."""
+    return Post.objects.aggregate(
+        last=Max('publish_seq')
+    )['last'] or 0
+
+
+def get_feed_queryset(feed, user_id=None, slug=None):
+    """Опубликованные посты ленты index, group или follow."""
+    if feed == 'index':
+        return Post.objects.published()
+    if feed == 'group':
+        return Post.objects.published().filter(
+            group_id=get_group_or_404(slug).pk
+        )
+    if feed == 'follow' and user_id is not None:
+        return Post.objects.published().filter(
+            author__following__user_id=user_id
+        )
+    raise Http404('Неизвестная лента.')
+
+
+def parse_cursor(value):
+    """Номер публикации из курсора или None."""
+    value = value or ''
+    return int(value) if value.isdigit() else None
+
+
+def get_new_posts(queryset, cursor):
+    """Количество и id постов новее курсора и следующий курсор.
+
+    Количество ограничено NEW_POSTS_LIMIT; ``more`` сообщает, что новых
+    постов больше. Без курсора возвращается только текущий курсор.
+    """
+    since = parse_cursor(cursor)
+    newest = queryset.filter(publish_seq__isnull=False).order_by(
+        '-publish_seq'
+    ).values_list('pk', 'publish_seq')
+    if since is None:
+        latest = newest.first()
+        return {
+            'count': 0,
+            'ids': [],
+            'more': False,
+            'cursor': str(latest[1]) if latest else None,
+        }
+    limit = settings.NEW_POSTS_LIMIT
+    rows = list(newest.filter(publish_seq__gt=since)[:limit + 1])
+    return {
+        'count': min(len(rows), limit),
+        'ids': [pk for pk, _ in rows[:limit]],
+        'more': len(rows) > limit,
+        'cursor': str(rows[0][1]) if rows else str(since),
+    }
@@ -1,13 +1,58 @@
 from django import forms
+from django.utils import timezone
+from django.utils.formats import get_format
 
 from posts.models import Post, Comment
 
+DATETIME_LOCAL_FORMAT = '%Y-%m-%dT%H:%M'
+PAST_PUBLISH_AT_ERROR = 'Время публикации уже прошло.'
+
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group', 'image')
 
+    def __init__(self, *args, groups=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if groups is not None:
+            # Список групп берётся из уже загруженных групп, без запроса
+            # к таблице при выводе формы.
+            field = self.fields['group']
+            field.choices = [
+                ('', field.empty_label),
+                *((group.pk, str(group)) for group in groups),
+            ]
+
+
+class ScheduledPostForm(PostForm):
+    """Черновик или пост, который опубликуется в заданное время."""
+
+    class Meta(PostForm.Meta):
+        fields = PostForm.Meta.fields + ('publish_at',)
+        widgets = {
+            'publish_at': forms.DateTimeInput(
+                attrs={'type': 'datetime-local'},
+                format=DATETIME_LOCAL_FORMAT
+            ),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['publish_at'].input_formats = (
+            DATETIME_LOCAL_FORMAT,
+            *get_format('DATETIME_INPUT_FORMATS'),
+        )
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at is None or 'publish_at' not in self.changed_data:
+            return publish_at
+        # Время вводится с точностью до минуты, текущая минута допустима.
+        if publish_at < timezone.now().replace(second=0, microsecond=0):
+            raise forms.ValidationError(PAST_PUBLISH_AT_ERROR)
+        return publish_at
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
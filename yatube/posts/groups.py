@@ -0,0 +1,112 @@
+"""Кэш групп в памяти процесса.
+
+Группы меняются редко, а нужны на каждой странице группы, поэтому
+словарь slug → Group хранится в памяти процесса. Сохранение или удаление
+группы меняет версию в общем кэше, и каждый процесс, заметив новую
+версию, перечитывает группы одним запросом. Массовые ``update()`` мимо
+сигналов должны вызывать ``invalidate_groups()`` сами. Счётчики
+постов каталога групп берутся из месячных счётчиков и кэшируются в
+общем кэше на короткое время.
+"""
+import threading
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import Http404
+
+from posts.models import ArchivedPost, Group, Post, PostArchiveBucket
+
+VERSION_KEY = 'posts.groups.version'
+DIRECTORY_KEY = 'posts.groups.directory'
+
+_lock = threading.Lock()
+_state = {'version': None, 'groups': {}}
+
+
+def get_version():
+    """Текущая версия групп; после очистки кэша появляется новая."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_groups():
+    """Сбросить кэш групп и счётчики каталога во всех процессах."""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+    cache.delete(DIRECTORY_KEY)
+
+
+def get_group_map():
+    """Словарь slug → Group, актуальный для текущей версии."""
+    version = get_version()
+    if _state['version'] != version:
+        with _lock:
+            if _state['version'] != version:
+                groups = {group.slug: group for group in Group.objects.all()}
+                _state.update(version=version, groups=groups)
+    return _state['groups']
+
+
+def get_group_or_404(slug):
+    """Группа по слагу без запроса к БД, если кэш актуален."""
+    group = get_group_map().get(slug)
+    if group is None:
+        raise Http404('Группа не найдена.')
+    return group
+
+
+def get_group_stats():
+    """Количество постов и дата последнего по id группы.
+
+    Количество складывается из месячных счётчиков группы, поэтому, как
+    и в профиле, включает посты, перенесённые в архив. Дата последнего
+    поста для каждой группы читается по её индексу, а если живых постов
+    нет — из архива. Результат общий для всех процессов и
+    пересчитывается не чаще раза в GROUP_DIRECTORY_TIMEOUT секунд.
+    """
+    stats = cache.get(DIRECTORY_KEY)
+    if stats is None:
+        counts = dict(
+            PostArchiveBucket.objects.filter(group__isnull=False)
+            .values('group_id')
+            .annotate(posts_count=Sum('posts_count'))
+            .values_list('group_id', 'posts_count')
+            .order_by()
+        )
+        live = Post.objects.published().filter(
+            group=OuterRef('pk')
+        ).order_by('-pub_date').values('pub_date')[:1]
+        archived = ArchivedPost.objects.filter(
+            group=OuterRef('pk'), deleted_at__isnull=True
+        ).order_by('-pub_date').values('pub_date')[:1]
+        stats = {
+            group_id: {
+                'posts_count': counts.get(group_id, 0),
+                'last_pub_date': last_pub_date,
+            }
+            for group_id, last_pub_date in Group.objects.annotate(
+                last_pub_date=Coalesce(Subquery(live), Subquery(archived))
+            ).values_list('pk', 'last_pub_date').order_by()
+            if counts.get(group_id) or last_pub_date
+        }
+        cache.set(DIRECTORY_KEY, stats, settings.GROUP_DIRECTORY_TIMEOUT)
+    return stats
+
+
+def get_group_directory():
+    """Группы по алфавиту с количеством постов и датой последнего."""
+    stats = get_group_stats()
+    directory = []
+    for group in sorted(get_group_map().values(), key=lambda g: g.title):
+        row = stats.get(group.pk, {})
+        directory.append({
+            'group': group,
+            'posts_count': row.get('posts_count', 0),
+            'last_pub_date': row.get('last_pub_date'),
+        })
+    return directory
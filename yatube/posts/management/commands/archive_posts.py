@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.archiving import archive_old_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит удалённые и старые посты и старые комментарии в '
+        'архивные таблицы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=settings.POSTS_ARCHIVE_AFTER_DAYS,
+            help='Возраст поста в днях, после которого он уходит в архив.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=settings.POSTS_ARCHIVE_BATCH,
+            help='Сколько постов переносить одной транзакцией.'
+        )
+
+    def handle(self, *args, **options):
+        posts, comments = archive_old_posts(
+            options['days'], options['batch']
+        )
+        self.stdout.write(f'Перенесено в архив постов: {posts}')
+        self.stdout.write(f'Перенесено в архив комментариев: {comments}')
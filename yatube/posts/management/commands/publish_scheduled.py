@@ -0,0 +1,53 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts.scheduling import get_next_publish_at, publish_due_posts
+
+
+class Command(BaseCommand):
+    help = 'Публикует отложенные посты, когда наступает их время.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.SCHEDULER_BATCH,
+            help='Сколько постов публиковать одним запросом.'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float,
+            default=settings.SCHEDULER_POLL_INTERVAL,
+            help='Как часто в секундах перечитывать расписание из БД.'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Опубликовать наступившие посты и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            self._work(options)
+        except KeyboardInterrupt:
+            self.stdout.write('Планировщик остановлен.')
+
+    def _publish(self, batch):
+        published = publish_due_posts(batch)
+        if published:
+            self.stdout.write(f'Опубликовано постов: {len(published)}')
+
+    def _work(self, options):
+        poll_interval = options['poll_interval']
+        while True:
+            close_old_connections()
+            self._publish(options['batch'])
+            if options['once']:
+                return
+            # Ближайший момент перечитывается после каждого пробуждения,
+            # поэтому новые и перенесённые посты учитываются не позже
+            # чем через poll_interval.
+            wake_at = time.time() + poll_interval
+            next_publish_at = get_next_publish_at()
+            if next_publish_at is not None:
+                wake_at = min(wake_at, next_publish_at)
+            time.sleep(max(wake_at - time.time(), 0))
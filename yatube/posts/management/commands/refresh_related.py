@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.related import refresh_related
+
+
+class Command(BaseCommand):
+    help = 'Находит похожие посты для новых и изменённых постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать похожие посты для всех постов.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=settings.RELATED_POSTS_BATCH,
+            help='Сколько постов обрабатывать одной транзакцией.'
+        )
+
+    def handle(self, *args, **options):
+        refreshed = refresh_related(options['all'], options['batch'])
+        self.stdout.write(f'Обновлены похожие посты: {refreshed}')
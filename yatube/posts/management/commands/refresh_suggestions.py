@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.suggestions import get_all_followers, refresh_suggestions
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации «Кого почитать» для пользователей, '
+        'чьи подписки изменились.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать рекомендации всех подписчиков.'
+        )
+        parser.add_argument(
+            '--batch', type=int, default=settings.SUGGESTIONS_BATCH,
+            help='Сколько пользователей считать одним умножением матриц.'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = get_all_followers() if options['all'] else None
+        refreshed = refresh_suggestions(user_ids, options['batch'])
+        self.stdout.write(f'Обновлены рекомендации пользователей: {refreshed}')
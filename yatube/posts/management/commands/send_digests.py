@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.notifications import send_digests
+
+
+class Command(BaseCommand):
+    help = (
+        'Отправляет пользователям письма со сводкой непрочитанных '
+        'уведомлений.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch', type=int, default=settings.NOTIFICATIONS_DIGEST_BATCH,
+            help='Сколько получателей обрабатывать за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        sent = send_digests(options['batch'])
+        self.stdout.write(f'Отправлено сводок: {sent}')
@@ -0,0 +1,51 @@
+from django.conf import settings
+
+from core.memo import request_memo
+from posts.groups import get_group_map
+from posts.models import Follow
+from posts.notifications import get_unread_count
+from posts.suggestions import get_suggested_authors
+
+
+def is_following(request, author_id):
+    """Подписан ли пользователь на автора.
+
+    Каждый автор проверяется одним запросом EXISTS за весь запрос, без
+    загрузки всех подписок.
+    """
+    statuses = request_memo(request, 'following', dict)
+    if author_id not in statuses:
+        statuses[author_id] = (
+            request.user.is_authenticated
+            and Follow.objects.filter(
+                user=request.user, author_id=author_id
+            ).exists()
+        )
+    return statuses[author_id]
+
+
+def get_groups(request):
+    """Группы из кэша групп в порядке ключей, один снимок на запрос."""
+    return request_memo(request, 'groups', lambda: sorted(
+        get_group_map().values(), key=lambda group: group.pk
+    ))
+
+
+def get_unread_notifications(request):
+    """Количество непрочитанных событий пользователя за запрос."""
+    def load():
+        if not request.user.is_authenticated:
+            return 0
+        return get_unread_count(request.user.pk)
+    return request_memo(request, 'unread_notifications', load)
+
+
+def get_suggestions(request):
+    """Рекомендуемые авторы, на которых пользователь ещё не подписан."""
+    def load():
+        if not request.user.is_authenticated:
+            return []
+        return get_suggested_authors(
+            request.user, settings.SUGGESTIONS_ON_PAGE
+        )
+    return request_memo(request, 'suggestions', load)
@@ -0,0 +1,71 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:35
+
+from collections import Counter
+
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+import django.db.models.deletion
+
+
+def fill_archive_buckets(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    PostArchiveBucket = apps.get_model('posts', 'PostArchiveBucket')
+    by_author = Counter()
+    by_group = Counter()
+    posts = Post.objects.values_list('author_id', 'group_id', 'pub_date')
+    for author_id, group_id, pub_date in posts.iterator():
+        pub_date = timezone.localtime(pub_date)
+        by_author[author_id, pub_date.year, pub_date.month] += 1
+        if group_id:
+            by_group[group_id, pub_date.year, pub_date.month] += 1
+    buckets = [
+        PostArchiveBucket(
+            author_id=author_id, year=year, month=month, posts_count=count
+        )
+        for (author_id, year, month), count in by_author.items()
+    ] + [
+        PostArchiveBucket(
+            group_id=group_id, year=year, month=month, posts_count=count
+        )
+        for (group_id, year, month), count in by_group.items()
+    ]
+    PostArchiveBucket.objects.bulk_create(buckets, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0013_auto_20230112_1803'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostArchiveBucket',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Количество постов')),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archive_buckets', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archive_buckets', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Архивный счётчик',
+                'verbose_name_plural': 'Архивные счётчики',
+                'ordering': ('-year', '-month'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postarchivebucket',
+            constraint=models.UniqueConstraint(fields=('author', 'year', 'month'), name='author_month_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='postarchivebucket',
+            constraint=models.UniqueConstraint(fields=('group', 'year', 'month'), name='group_month_unique'),
+        ),
+        migrations.RunPython(
+            fill_archive_buckets, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0014_post_archive_bucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='is_published',
+            field=models.BooleanField(default=True, verbose_name='Опубликован'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='publish_at',
+            field=models.DateTimeField(blank=True, help_text='Оставьте пустым, чтобы сохранить черновик', null=True, verbose_name='Время публикации'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_published=True), fields=['-pub_date'], name='post_published_feed'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_published=True), fields=['author', '-pub_date'], name='post_published_author'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_published=True), fields=['group', '-pub_date'], name='post_published_group'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(is_published=False), fields=['publish_at'], name='post_scheduled'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:54
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0015_post_scheduling'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Время удаления'),
+        ),
+        migrations.CreateModel(
+            name='ArchivedPost',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('pub_date', models.DateTimeField(verbose_name='Дата создания')),
+                ('text', models.TextField(verbose_name='Текст поста')),
+                ('image', models.ImageField(blank=True, upload_to='posts/', verbose_name='Изображение')),
+                ('deleted_at', models.DateTimeField(blank=True, null=True, verbose_name='Время удаления')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Время переноса в архив')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_posts', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_posts', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Архивный пост',
+                'verbose_name_plural': 'Архивные посты',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedComment',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('pub_date', models.DateTimeField(verbose_name='Дата создания')),
+                ('text', models.TextField(verbose_name='Текст комментария')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_comments', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.ArchivedPost', verbose_name='Пост')),
+            ],
+            options={
+                'verbose_name': 'Архивный комментарий',
+                'verbose_name_plural': 'Архивные комментарии',
+                'ordering': ('-pub_date',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedpost',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True), fields=['author', '-pub_date'], name='archived_post_author'),
+        ),
+    ]
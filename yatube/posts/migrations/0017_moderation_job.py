@@ -0,0 +1,37 @@
+# Generated by Django 2.2.16 on 2026-10-19 08:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0016_post_archive'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModerationJob',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('regroup', 'Перенос постов в группу'), ('delete_author_posts', 'Удаление постов авторов'), ('purge_comments', 'Удаление комментариев по шаблону')], max_length=32, verbose_name='Операция')),
+                ('params', models.TextField(verbose_name='Параметры (JSON)')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершено')], default='pending', max_length=16, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Обработано')),
+                ('cursor', models.BigIntegerField(default=0, help_text='Последний обработанный ключ или индекс', verbose_name='Позиция')),
+                ('error', models.TextField(blank=True, verbose_name='Последняя ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создано')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершено')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='moderation_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Модератор')),
+            ],
+            options={
+                'verbose_name': 'Задание модерации',
+                'verbose_name_plural': 'Задания модерации',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:08
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0017_moderation_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Notification',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('comment', 'Комментарий'), ('follow', 'Подписка')], max_length=16, verbose_name='Вид')),
+                ('count', models.PositiveIntegerField(default=1, verbose_name='Количество событий')),
+                ('is_read', models.BooleanField(default=False, verbose_name='Прочитано')),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Последнее событие')),
+                ('emailed_at', models.DateTimeField(blank=True, null=True, verbose_name='Отправлено в сводке')),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Последний автор события')),
+                ('post', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to='posts.Post', verbose_name='Пост')),
+                ('recipient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notifications', to=settings.AUTH_USER_MODEL, verbose_name='Получатель')),
+            ],
+            options={
+                'verbose_name': 'Уведомление',
+                'verbose_name_plural': 'Уведомления',
+                'ordering': ('-updated_at',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-updated_at'], name='notification_recipient'),
+        ),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(is_read=False), fields=('recipient', 'kind', 'post'), name='notification_unread_unique'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0018_notification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaleSuggestions',
+            fields=[
+                ('user_id', models.IntegerField(primary_key=True, serialize=False, verbose_name='Пользователь')),
+                ('marked_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Отмечено')),
+            ],
+            options={
+                'verbose_name': 'Устаревшие рекомендации',
+                'verbose_name_plural': 'Устаревшие рекомендации',
+            },
+        ),
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Оценка')),
+                ('suggested', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Рекомендуемый автор')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Рекомендация подписки',
+                'verbose_name_plural': 'Рекомендации подписок',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='followsuggestion',
+            index=models.Index(fields=['user', '-score'], name='suggestion_user_score'),
+        ),
+        migrations.AddConstraint(
+            model_name='followsuggestion',
+            constraint=models.UniqueConstraint(fields=('user', 'suggested'), name='suggestion_unique'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:14
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0019_follow_suggestions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSignature',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='signature', serialize=False, to='posts.Post', verbose_name='Пост')),
+                ('signature', models.BinaryField(verbose_name='Подпись')),
+            ],
+            options={
+                'verbose_name': 'Подпись поста',
+                'verbose_name_plural': 'Подписи постов',
+            },
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Сходство')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_posts', to='posts.Post', verbose_name='Пост')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Похожий пост')),
+            ],
+            options={
+                'verbose_name': 'Похожий пост',
+                'verbose_name_plural': 'Похожие посты',
+                'ordering': ('-score',),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='relatedpost',
+            index=models.Index(fields=['post', '-score'], name='related_post_score'),
+        ),
+        migrations.AddConstraint(
+            model_name='relatedpost',
+            constraint=models.UniqueConstraint(fields=('post', 'related'), name='related_post_unique'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:21
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0020_related_posts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Тег')),
+            ],
+            options={
+                'verbose_name': 'Тег',
+                'verbose_name_plural': 'Теги',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(choices=[('comment', 'Комментарий'), ('follow', 'Подписка'), ('mention', 'Упоминание')], max_length=16, verbose_name='Вид'),
+        ),
+        migrations.CreateModel(
+            name='PostTag',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Post', verbose_name='Пост')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='post_tags', to='posts.Tag', verbose_name='Тег')),
+            ],
+            options={
+                'verbose_name': 'Тег поста',
+                'verbose_name_plural': 'Теги постов',
+                'ordering': ('-pub_date', '-post_id'),
+            },
+        ),
+        migrations.AddIndex(
+            model_name='posttag',
+            index=models.Index(fields=['tag', '-pub_date', '-post'], name='post_tag_feed'),
+        ),
+        migrations.AddConstraint(
+            model_name='posttag',
+            constraint=models.UniqueConstraint(fields=('tag', 'post'), name='post_tag_unique'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:23
+
+from django.db import migrations, models
+
+from posts.migrations._richtext import render
+
+MODELS = ('Post', 'Comment', 'ArchivedPost', 'ArchivedComment')
+
+
+def render_texts(apps, schema_editor):
+    """Заполнить HTML текстов замороженной версией разборщика."""
+    for name in MODELS:
+        model = apps.get_model('posts', name)
+        batch = []
+        for row in model.objects.only('pk', 'text').iterator():
+            row.text_html = render(row.text)
+            batch.append(row)
+            if len(batch) == 500:
+                model.objects.bulk_update(batch, ('text_html',))
+                batch = []
+        model.objects.bulk_update(batch, ('text_html',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0021_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedcomment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='archivedpost',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.RunPython(render_texts, migrations.RunPython.noop),
+    ]
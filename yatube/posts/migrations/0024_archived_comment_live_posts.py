@@ -0,0 +1,19 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0022_text_html'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='archivedcomment',
+            name='post',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='posts.ArchivedPost', verbose_name='Пост'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:49
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicates(apps, schema_editor):
+    """Сложить повторные непрочитанные уведомления без поста в самое
+    новое из них.
+    """
+    Notification = apps.get_model('posts', 'Notification')
+    unread = Notification.objects.filter(is_read=False, post__isnull=True)
+    duplicates = (
+        unread.values('recipient_id', 'kind')
+        .annotate(rows=Count('id')).filter(rows__gt=1)
+    )
+    for row in duplicates:
+        notifications = list(
+            unread.filter(recipient_id=row['recipient_id'], kind=row['kind'])
+            .order_by('-updated_at', '-pk')
+        )
+        latest = notifications[0]
+        latest.count = sum(item.count for item in notifications)
+        latest.save(update_fields=('count',))
+        Notification.objects.filter(
+            pk__in=[item.pk for item in notifications[1:]]
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0024_archived_comment_live_posts'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_read', False), ('post__isnull', True)), fields=('recipient', 'kind'), name='notification_unread_no_post_unique'),
+        ),
+    ]
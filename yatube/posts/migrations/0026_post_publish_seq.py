@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:55
+
+from django.db import migrations, models
+
+
+def number_published(apps, schema_editor):
+    """Пронумеровать опубликованные посты в порядке дат публикации."""
+    Post = apps.get_model('posts', 'Post')
+    posts = Post.objects.filter(is_published=True).order_by('pub_date', 'pk')
+    batch = []
+    for seq, post in enumerate(posts.only('pk').iterator(), 1):
+        post.publish_seq = seq
+        batch.append(post)
+        if len(batch) == 500:
+            Post.objects.bulk_update(batch, ('publish_seq',))
+            batch = []
+    Post.objects.bulk_update(batch, ('publish_seq',))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0025_notification_unread_no_post'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='publish_seq',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, unique=True, verbose_name='Номер публикации'),
+        ),
+        migrations.RunPython(number_published, migrations.RunPython.noop),
+    ]
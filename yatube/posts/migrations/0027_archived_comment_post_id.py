@@ -0,0 +1,31 @@
+# Generated by Django 2.2.16 on 2026-10-19 10:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Внешний ключ без ограничения становится числовым полем.
+
+    Столбец post_id и его индекс в базе остаются прежними, меняется
+    только состояние моделей.
+    """
+
+    dependencies = [
+        ('posts', '0026_post_publish_seq'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveField(
+                    model_name='archivedcomment',
+                    name='post',
+                ),
+                migrations.AddField(
+                    model_name='archivedcomment',
+                    name='post_id',
+                    field=models.IntegerField(db_index=True, verbose_name='id поста'),
+                ),
+            ],
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.contrib.auth import get_user_model
 from django.db import models
-from django.urls import reverse
+from django.utils import timezone
 
-from core.models import CreatedModel
+from core.models import CreatedModel, RichTextModel
+from core.reverse import fast_reverse
 
 User = get_user_model()
 
@@ -29,7 +30,21 @@ class Group(models.Model):
         return self.title
 
 
-class Post(CreatedModel):
+class PostQuerySet(models.QuerySet):
+    def published(self):
+        """Опубликованные посты; только их показывают в лентах."""
+        return self.filter(is_published=True)
+
+    def due(self, now):
+        """Отложенные посты, время публикации которых наступило."""
+        return self.filter(is_published=False, publish_at__lte=now)
+
+    def drafts(self):
+        """Черновики и отложенные посты, кроме удалённых."""
+        return self.filter(is_published=False, deleted_at__isnull=True)
+
+
+class Post(CreatedModel, RichTextModel):
     text = models.TextField(
         verbose_name='Текст поста',
         help_text='Текст нового поста'
@@ -56,9 +71,55 @@ class Post(CreatedModel):
         blank=True,
         verbose_name='Изображение'
     )
+    is_published = models.BooleanField(
+        default=True,
+        verbose_name='Опубликован'
+    )
+    publish_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Время публикации',
+        help_text='Оставьте пустым, чтобы сохранить черновик'
+    )
+    deleted_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Время удаления'
+    )
+    publish_seq = models.BigIntegerField(
+        blank=True,
+        null=True,
+        unique=True,
+        editable=False,
+        verbose_name='Номер публикации'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('-pub_date',),
+                name='post_published_feed',
+                condition=models.Q(is_published=True)
+            ),
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='post_published_author',
+                condition=models.Q(is_published=True)
+            ),
+            models.Index(
+                fields=('group', '-pub_date'),
+                name='post_published_group',
+                condition=models.Q(is_published=True)
+            ),
+            models.Index(
+                fields=('publish_at',),
+                name='post_scheduled',
+                condition=models.Q(is_published=False)
+            ),
+        )
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
 
@@ -66,10 +127,21 @@ class Post(CreatedModel):
         return self.text[:15]
 
     def get_absolute_url(self):
-        return reverse('posts:post_detail', kwargs={'post_id': self.pk})
+        return fast_reverse('posts:post_detail', kwargs={'post_id': self.pk})
+
+    def soft_delete(self):
+        """Скрыть пост из всех лент; строку уберёт команда archive_posts.
+
+        Снятый с публикации пост выпадает из частичных индексов лент,
+        а сигналы post_save обновляют счётчики.
+        """
+        self.is_published = False
+        self.publish_at = None
+        self.deleted_at = timezone.now()
+        self.save(update_fields=('is_published', 'publish_at', 'deleted_at'))
 
 
-class Comment(CreatedModel):
+class Comment(CreatedModel, RichTextModel):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
@@ -132,3 +204,492 @@ class Follow(models.Model):
             f'relation: {self.user.get_username()} '
             f'- {self.author.get_username()}'
         )
+
+
+class PostArchiveBucket(models.Model):
+    """Количество постов автора или группы за календарный месяц.
+
+    Счётчики поддерживаются сигналами при сохранении и удалении Post,
+    поэтому архивные страницы не выполняют GROUP BY по таблице постов.
+    """
+    author = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='archive_buckets',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='archive_buckets',
+        verbose_name='Группа'
+    )
+    year = models.PositiveSmallIntegerField(verbose_name='Год')
+    month = models.PositiveSmallIntegerField(verbose_name='Месяц')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество постов'
+    )
+
+    class Meta:
+        constraints = (
+            models.UniqueConstraint(
+                fields=('author', 'year', 'month'),
+                name='author_month_unique'
+            ),
+            models.UniqueConstraint(
+                fields=('group', 'year', 'month'),
+                name='group_month_unique'
+            ),
+        )
+        ordering = ('-year', '-month')
+        verbose_name = 'Архивный счётчик'
+        verbose_name_plural = 'Архивные счётчики'
+
+    def __str__(self) -> str:
+        return f'{self.month:02}.{self.year}: {self.posts_count}'
+
+
+class ArchivedPost(RichTextModel):
+    """Пост, перенесённый из posts_post командой archive_posts.
+
+    Первичный ключ совпадает с ключом исходного поста, поэтому старые
+    ссылки продолжают работать через post_detail.
+    """
+    id = models.IntegerField(primary_key=True)
+    pub_date = models.DateTimeField(verbose_name='Дата создания')
+    text = models.TextField(verbose_name='Текст поста')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField(
+        upload_to='posts/',
+        blank=True,
+        verbose_name='Изображение'
+    )
+    deleted_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Время удаления'
+    )
+    archived_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Время переноса в архив'
+    )
+
+    class Meta:
+        ordering = ('-pub_date',)
+        indexes = (
+            models.Index(
+                fields=('author', '-pub_date'),
+                name='archived_post_author',
+                condition=models.Q(deleted_at__isnull=True)
+            ),
+        )
+        verbose_name = 'Архивный пост'
+        verbose_name_plural = 'Архивные посты'
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+    def get_absolute_url(self):
+        return fast_reverse('posts:post_detail', kwargs={'post_id': self.pk})
+
+
+class ArchivedComment(RichTextModel):
+    """Комментарий, перенесённый в архив.
+
+    Старые комментарии переносятся и у постов, которые остаются живыми,
+    поэтому ``post_id`` — не внешний ключ, а id поста: строки в Post,
+    пока пост живой, и строки в ArchivedPost с тем же ключом, когда он
+    уйдёт в архив. Комментарии удаляются сигналами удаления обоих
+    постов.
+    """
+    id = models.IntegerField(primary_key=True)
+    pub_date = models.DateTimeField(verbose_name='Дата создания')
+    post_id = models.IntegerField(db_index=True, verbose_name='id поста')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Текст комментария')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        verbose_name = 'Архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+
+    def __str__(self) -> str:
+        return self.text[:15]
+
+
+class ModerationJob(models.Model):
+    """Массовая операция модерации, которую воркер выполняет частями."""
+    REGROUP = 'regroup'
+    DELETE_AUTHOR_POSTS = 'delete_author_posts'
+    PURGE_COMMENTS = 'purge_comments'
+    ACTIONS = (
+        (REGROUP, 'Перенос постов в группу'),
+        (DELETE_AUTHOR_POSTS, 'Удаление постов авторов'),
+        (PURGE_COMMENTS, 'Удаление комментариев по шаблону'),
+    )
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершено'),
+    )
+
+    action = models.CharField(
+        max_length=32,
+        choices=ACTIONS,
+        verbose_name='Операция'
+    )
+    params = models.TextField(verbose_name='Параметры (JSON)')
+    status = models.CharField(
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING,
+        verbose_name='Статус'
+    )
+    total = models.PositiveIntegerField(default=0, verbose_name='Всего')
+    processed = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Обработано'
+    )
+    cursor = models.BigIntegerField(
+        default=0,
+        verbose_name='Позиция',
+        help_text='Последний обработанный ключ или индекс'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='Последняя ошибка'
+    )
+    created_by = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='moderation_jobs',
+        verbose_name='Модератор'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Создано'
+    )
+    finished_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Завершено'
+    )
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name = 'Задание модерации'
+        verbose_name_plural = 'Задания модерации'
+
+    def __str__(self) -> str:
+        return f'{self.get_action_display()}: {self.processed}/{self.total}'
+
+
+class Notification(models.Model):
+    """Уведомление пользователя о комментариях, подписчиках и
+    упоминаниях.
+
+    Непрочитанные события одного вида об одном посте складываются в одну
+    строку со счётчиком ``count``, поэтому популярный пост порождает не
+    больше одной непрочитанной строки у автора.
+    """
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    MENTION = 'mention'
+    KINDS = (
+        (COMMENT, 'Комментарий'),
+        (FOLLOW, 'Подписка'),
+        (MENTION, 'Упоминание'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель'
+    )
+    kind = models.CharField(
+        max_length=16,
+        choices=KINDS,
+        verbose_name='Вид'
+    )
+    post = models.ForeignKey(
+        Post,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Пост'
+    )
+    actor = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Последний автор события'
+    )
+    count = models.PositiveIntegerField(
+        default=1,
+        verbose_name='Количество событий'
+    )
+    is_read = models.BooleanField(
+        default=False,
+        verbose_name='Прочитано'
+    )
+    updated_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Последнее событие'
+    )
+    emailed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Отправлено в сводке'
+    )
+
+    class Meta:
+        ordering = ('-updated_at',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipient', 'kind', 'post'),
+                name='notification_unread_unique',
+                condition=models.Q(is_read=False)
+            ),
+            # NULL не равен NULL, поэтому уведомления без поста
+            # (о подписчиках) нужна отдельная проверка.
+            models.UniqueConstraint(
+                fields=('recipient', 'kind'),
+                name='notification_unread_no_post_unique',
+                condition=models.Q(is_read=False, post__isnull=True)
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('recipient', '-updated_at'),
+                name='notification_recipient'
+            ),
+        )
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+    def __str__(self) -> str:
+        return f'{self.get_kind_display()}: {self.count}'
+
+    def message(self):
+        """Текст уведомления для страницы и письма."""
+        actor = self.actor.username if self.actor else 'кто-то'
+        if self.kind == self.COMMENT:
+            post = self.post.text[:30]
+            if self.count == 1:
+                return f'{actor} прокомментировал ваш пост «{post}»'
+            return (
+                f'Новых комментариев к посту «{post}»: {self.count}, '
+                f'последний — от {actor}'
+            )
+        if self.kind == self.MENTION:
+            return f'{actor} упомянул вас в посте «{self.post.text[:30]}»'
+        if self.count == 1:
+            return f'{actor} подписался на вас'
+        return f'Новых подписчиков: {self.count}, последний — {actor}'
+
+
+class FollowSuggestion(models.Model):
+    """Автор, на которого стоит подписаться пользователю.
+
+    Заполняется командой refresh_suggestions по графу подписок.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name='Пользователь'
+    )
+    suggested = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Рекомендуемый автор'
+    )
+    score = models.FloatField(verbose_name='Оценка')
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'suggested'),
+                name='suggestion_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('user', '-score'),
+                name='suggestion_user_score'
+            ),
+        )
+        verbose_name = 'Рекомендация подписки'
+        verbose_name_plural = 'Рекомендации подписок'
+
+    def __str__(self) -> str:
+        return f'{self.user_id} -> {self.suggested_id}: {self.score:.2f}'
+
+
+class StaleSuggestions(models.Model):
+    """Пользователь, чьи подписки изменились после расчёта рекомендаций.
+
+    Хранит id без внешнего ключа: отметка может появиться, когда
+    подписки удаляются вместе с самим пользователем.
+    """
+    user_id = models.IntegerField(
+        primary_key=True,
+        verbose_name='Пользователь'
+    )
+    marked_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Отмечено'
+    )
+
+    class Meta:
+        verbose_name = 'Устаревшие рекомендации'
+        verbose_name_plural = 'Устаревшие рекомендации'
+
+
+class PostSignature(models.Model):
+    """MinHash-подпись текста поста для поиска похожих постов."""
+    post = models.OneToOneField(
+        Post,
+        primary_key=True,
+        on_delete=models.CASCADE,
+        related_name='signature',
+        verbose_name='Пост'
+    )
+    signature = models.BinaryField(verbose_name='Подпись')
+
+    class Meta:
+        verbose_name = 'Подпись поста'
+        verbose_name_plural = 'Подписи постов'
+
+
+class RelatedPost(models.Model):
+    """Похожий пост, найденный командой refresh_related."""
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='related_posts',
+        verbose_name='Пост'
+    )
+    related = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий пост'
+    )
+    score = models.FloatField(verbose_name='Сходство')
+
+    class Meta:
+        ordering = ('-score',)
+        constraints = (
+            models.UniqueConstraint(
+                fields=('post', 'related'),
+                name='related_post_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('post', '-score'),
+                name='related_post_score'
+            ),
+        )
+        verbose_name = 'Похожий пост'
+        verbose_name_plural = 'Похожие посты'
+
+    def __str__(self) -> str:
+        return f'{self.post_id} ~ {self.related_id}: {self.score:.2f}'
+
+
+class Tag(models.Model):
+    """Хештег из текстов постов; имя хранится в нижнем регистре."""
+    name = models.CharField(
+        max_length=50,
+        unique=True,
+        verbose_name='Тег'
+    )
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'Тег'
+        verbose_name_plural = 'Теги'
+
+    def __str__(self) -> str:
+        return f'#{self.name}'
+
+    def get_absolute_url(self):
+        return fast_reverse('posts:tag_posts', kwargs={'name': self.name})
+
+
+class PostTag(models.Model):
+    """Тег опубликованного поста.
+
+    Строки есть только у опубликованных постов, а дата публикации
+    скопирована из поста, поэтому страница тега читает индекс
+    ``post_tag_feed`` без сортировки и фильтра по таблице постов.
+    """
+    tag = models.ForeignKey(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Тег'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='post_tags',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date', '-post_id')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('tag', 'post'),
+                name='post_tag_unique'
+            ),
+        )
+        indexes = (
+            models.Index(
+                fields=('tag', '-pub_date', '-post'),
+                name='post_tag_feed'
+            ),
+        )
+        verbose_name = 'Тег поста'
+        verbose_name_plural = 'Теги постов'
+
+    def __str__(self) -> str:
+        return f'{self.post_id}: {self.tag_id}'
@@ -0,0 +1,243 @@
+"""Массовые операции модерации, выполняемые воркером частями.
+
+Админка только создаёт ``ModerationJob`` и ставит задачу
+``run_moderation_job``. Задача сначала считает, сколько строк затронет
+задание, а затем обрабатывает несколько порций по MODERATION_CHUNK_SIZE
+строк: каждая порция — один ``UPDATE`` или ``DELETE`` на таблицу в своей
+транзакции вместе с обновлением прогресса. Удаление идёт без сигналов
+ORM, а счётчики архивов, уведомления и кэши поправляются один раз на
+порцию. Параметры задания — обычный JSON: ключи строк или фильтры
+списка админки, по которым воркер заново строит выборку. Позиция
+хранится в ``cursor``, поэтому прерванное задание продолжается с места
+остановки. Если работа осталась, задача ставит себя в очередь снова.
+"""
+import json
+import traceback
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Max
+from django.utils import timezone
+
+from core.tasks import task
+from posts.archiving import raw_delete, remove_posts
+from posts.models import ArchivedComment, Comment, ModerationJob, Post
+from posts.notifications import discount_comments
+from posts.signals import (
+    change_archive_bucket, count_post, month_start, reset_groups,
+    reset_profiles
+)
+
+# Параметры списка постов в админке, которые переносятся в задание
+# при выборе всех подходящих строк.
+POST_FILTERS = (
+    'pub_date__gte',
+    'pub_date__lt',
+    'pub_date__year',
+    'pub_date__month',
+    'pub_date__day',
+    'is_published__exact',
+)
+
+
+def dump_selection(request, queryset):
+    """Выбранные в списке постов строки в виде параметров задания.
+
+    Отмеченные строки хранятся ключами. Выбор «всех подходящих»
+    хранится фильтрами и поиском списка вместе с наибольшим ключом на
+    момент выбора: задание не раздувается и не захватывает посты,
+    созданные позже.
+    """
+    if request.POST.get('select_across') != '1':
+        return {'post_ids': sorted(queryset.values_list('pk', flat=True))}
+    return {
+        'filters': {
+            name: request.GET[name]
+            for name in POST_FILTERS if name in request.GET
+        },
+        'search': request.GET.get('q', ''),
+        'max_pk': queryset.aggregate(max_pk=Max('pk'))['max_pk'] or 0,
+    }
+
+
+def load_selection(params):
+    """Посты, выбранные в админке, по параметрам из dump_selection."""
+    if 'post_ids' in params:
+        return Post.objects.filter(pk__in=params['post_ids'])
+    posts = Post.objects.filter(
+        pk__lte=params['max_pk'], **params['filters']
+    )
+    # Поиск устроен как в PostAdmin: каждое слово должно быть в тексте.
+    for word in params['search'].split():
+        posts = posts.filter(text__icontains=word)
+    return posts
+
+
+def create_job(action, params, user):
+    """Создать задание и поставить его в очередь."""
+    job = ModerationJob.objects.create(
+        action=action,
+        params=json.dumps(params),
+        created_by=user,
+    )
+    run_moderation_job.delay(job.pk)
+    return job
+
+
+def regrouped_posts(params):
+    return load_selection(params['selection'])
+
+
+def regroup_chunk(job, params, size):
+    """Перенести следующую порцию выбранных постов в группу."""
+    group_id = params['group_id']
+    rows = list(
+        regrouped_posts(params).filter(pk__gt=job.cursor).order_by('pk')
+        .values_list('pk', 'group_id', 'pub_date', 'is_published')[:size]
+    )
+    moved = [row for row in rows if row[1] != group_id]
+    Post.objects.filter(pk__in=[pk for pk, _, _, _ in moved]).update(
+        group_id=group_id
+    )
+    # update() не отправляет post_save, поэтому счётчики архивов групп
+    # пересчитываются здесь одним изменением на группу и месяц.
+    months = Counter()
+    for _, old_group_id, pub_date, is_published in moved:
+        if not is_published:
+            continue
+        if old_group_id:
+            months[old_group_id, month_start(pub_date)] -= 1
+        if group_id:
+            months[group_id, month_start(pub_date)] += 1
+    for (scope_id, month), delta in months.items():
+        if delta:
+            change_archive_bucket(month, delta, group_id=scope_id)
+    if moved:
+        reset_groups()
+    return len(rows), rows[-1][0] if rows else job.cursor
+
+
+def author_posts(params):
+    return Post.objects.filter(author_id__in=params['author_ids'])
+
+
+def delete_author_posts_chunk(job, params, size):
+    """Удалить следующую порцию постов выбранных авторов."""
+    rows = list(
+        author_posts(params).filter(pk__gt=job.cursor).order_by('pk')
+        .values_list('pk', 'author_id', 'group_id', 'pub_date',
+                     'is_published')[:size]
+    )
+    post_ids = [row[0] for row in rows]
+    months = Counter(
+        (author_id, group_id, month_start(pub_date))
+        for _, author_id, group_id, pub_date, is_published in rows
+        if is_published
+    )
+    for (author_id, group_id, month), count in months.items():
+        count_post(author_id, group_id, month, -count)
+    raw_delete(Comment.objects.filter(post_id__in=post_ids))
+    raw_delete(ArchivedComment.objects.filter(post_id__in=post_ids))
+    remove_posts(post_ids)
+    reset_profiles(*{row[1] for row in rows})
+    return len(post_ids), post_ids[-1] if post_ids else job.cursor
+
+
+def purged_comments(params):
+    return Comment.objects.filter(text__iregex=params['pattern'])
+
+
+def purged_archived_comments(params):
+    return ArchivedComment.objects.filter(text__iregex=params['pattern'])
+
+
+def purge_targets(params):
+    return purged_comments(params), purged_archived_comments(params)
+
+
+def purge_comments_chunk(job, params, size):
+    """Удалить следующую порцию комментариев, подходящих под шаблон.
+
+    Живые и архивные комментарии делят одну последовательность ключей,
+    поэтому обе таблицы обходятся одним курсором.
+    """
+    rows = sorted(
+        row
+        for queryset in purge_targets(params)
+        for row in queryset.filter(pk__gt=job.cursor).order_by('pk')
+        .values_list('pk', 'post_id', 'author_id', 'pub_date')[:size]
+    )[:size]
+    comment_ids = [row[0] for row in rows]
+    discount_comments(rows)
+    raw_delete(Comment.objects.filter(pk__in=comment_ids))
+    raw_delete(ArchivedComment.objects.filter(pk__in=comment_ids))
+    return len(comment_ids), comment_ids[-1] if comment_ids else job.cursor
+
+
+HANDLERS = {
+    ModerationJob.REGROUP: regroup_chunk,
+    ModerationJob.DELETE_AUTHOR_POSTS: delete_author_posts_chunk,
+    ModerationJob.PURGE_COMMENTS: purge_comments_chunk,
+}
+# Наборы строк, которые затронет задание; считаются в воркере, а не в
+# запросе админки: поиск по регулярному выражению читает всю таблицу.
+TARGETS = {
+    ModerationJob.REGROUP: lambda params: [regrouped_posts(params)],
+    ModerationJob.DELETE_AUTHOR_POSTS: lambda params: [author_posts(params)],
+    ModerationJob.PURGE_COMMENTS: purge_targets,
+}
+
+
+def start_job(job):
+    """Посчитать строки задания и перевести его в работу."""
+    total = sum(
+        queryset.count()
+        for queryset in TARGETS[job.action](json.loads(job.params))
+    )
+    ModerationJob.objects.filter(pk=job.pk).update(
+        total=total, status=ModerationJob.RUNNING
+    )
+    job.refresh_from_db()
+
+
+def process_chunk(job):
+    """Обработать одну порцию; вернуть True, если задание завершено."""
+    size = settings.MODERATION_CHUNK_SIZE
+    with transaction.atomic():
+        count, cursor = HANDLERS[job.action](
+            job, json.loads(job.params), size
+        )
+        done = count < size
+        ModerationJob.objects.filter(pk=job.pk).update(
+            processed=F('processed') + count,
+            cursor=cursor,
+            status=ModerationJob.DONE if done else ModerationJob.RUNNING,
+            finished_at=timezone.now() if done else None,
+        )
+    job.refresh_from_db()
+    return done
+
+
+@task(max_retries=3, retry_delay=30)
+def run_moderation_job(job_id):
+    """Выполнить несколько порций задания и при необходимости
+    поставить продолжение в очередь.
+    """
+    job = ModerationJob.objects.filter(pk=job_id).first()
+    if job is None or job.status == ModerationJob.DONE:
+        return
+    try:
+        if job.status == ModerationJob.PENDING:
+            start_job(job)
+        for _ in range(settings.MODERATION_CHUNKS_PER_TASK):
+            if process_chunk(job):
+                return
+    except Exception:
+        # Ошибка остаётся видна в админке, а повтор задачи продолжит
+        # с сохранённой позиции.
+        ModerationJob.objects.filter(pk=job_id).update(
+            error=traceback.format_exc()
+        )
+        raise
+    run_moderation_job.delay(job_id)
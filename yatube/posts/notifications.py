@@ -0,0 +1,179 @@
+"""Уведомления о новых комментариях и подписчиках.
+
+События складываются при записи: новый комментарий к посту увеличивает
+счётчик уже существующего непрочитанного уведомления об этом посте,
+а не добавляет строку. Количество непрочитанных событий пользователя
+хранится в кэше и пересчитывается после сброса. Команда
+``python manage.py send_digests`` отправляет по одному письму на
+пользователя со всеми событиями, которых ещё не было в сводках.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Q, Sum
+from django.utils import timezone
+
+from posts.models import Notification, Post, User
+
+UNREAD_KEY = 'posts.notifications.unread.{}'
+
+
+def notify(recipient_id, kind, actor_id, post_id=None):
+    """Учесть событие в непрочитанном уведомлении получателя."""
+    if recipient_id == actor_id:
+        return
+    now = timezone.now()
+    unread = Notification.objects.filter(
+        recipient_id=recipient_id, kind=kind, post_id=post_id, is_read=False
+    )
+    updated = unread.update(
+        count=F('count') + 1, actor_id=actor_id, updated_at=now
+    )
+    if not updated:
+        try:
+            with transaction.atomic():
+                Notification.objects.create(
+                    recipient_id=recipient_id,
+                    kind=kind,
+                    post_id=post_id,
+                    actor_id=actor_id,
+                    updated_at=now,
+                )
+        except IntegrityError:
+            # Уведомление успел создать параллельный запрос.
+            unread.update(
+                count=F('count') + 1, actor_id=actor_id, updated_at=now
+            )
+    reset_unread_count(recipient_id)
+
+
+def discount_comments(comments):
+    """Убрать удалённые комментарии из непрочитанных уведомлений.
+
+    comments — строки (id, id поста, id автора, дата) комментариев,
+    удалённых без сигналов. Непрочитанное уведомление о посте считает
+    комментарии после последнего прочитанного уведомления о нём, кроме
+    комментариев самого автора поста; уведомление без оставшихся
+    событий удаляется.
+    """
+    post_authors = dict(
+        Post.objects.filter(pk__in={row[1] for row in comments})
+        .values_list('pk', 'author_id')
+    )
+    unread = {
+        notification.post_id: notification
+        for notification in Notification.objects.filter(
+            kind=Notification.COMMENT, is_read=False,
+            post_id__in=post_authors
+        )
+    }
+    read_until = dict(
+        Notification.objects.filter(
+            kind=Notification.COMMENT, is_read=True, post_id__in=unread
+        ).values('post_id').annotate(last=Max('updated_at'))
+        .values_list('post_id', 'last')
+    )
+    removed = Counter(
+        post_id for _, post_id, author_id, pub_date in comments
+        if post_id in unread
+        and author_id != post_authors[post_id]
+        and (post_id not in read_until or pub_date > read_until[post_id])
+    )
+    for post_id, count in removed.items():
+        notification = unread[post_id]
+        if count >= notification.count:
+            notification.delete()
+        else:
+            Notification.objects.filter(pk=notification.pk).update(
+                count=F('count') - count
+            )
+        reset_unread_count(notification.recipient_id)
+
+
+def invalidate_unread_count(user_id):
+    cache.delete(UNREAD_KEY.format(user_id))
+
+
+def reset_unread_count(user_id):
+    """Сбросить счётчик сразу и ещё раз после фиксации транзакции."""
+    invalidate_unread_count(user_id)
+    transaction.on_commit(lambda: invalidate_unread_count(user_id))
+
+
+def get_unread_count(user_id):
+    """Количество непрочитанных событий пользователя."""
+    key = UNREAD_KEY.format(user_id)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient_id=user_id, is_read=False
+        ).aggregate(total=Sum('count'))['total'] or 0
+        cache.set(key, count, settings.NOTIFICATIONS_COUNT_TIMEOUT)
+    return count
+
+
+def mark_read(user_id, notification_ids):
+    """Отметить прочитанными показанные уведомления пользователя."""
+    Notification.objects.filter(
+        recipient_id=user_id, pk__in=notification_ids, is_read=False
+    ).update(is_read=True)
+    reset_unread_count(user_id)
+
+
+def get_pending_digest():
+    """Непрочитанные уведомления, изменившиеся после последней сводки."""
+    return Notification.objects.filter(is_read=False).filter(
+        Q(emailed_at__isnull=True) | Q(updated_at__gt=F('emailed_at'))
+    )
+
+
+def build_digest(user, notifications):
+    lines = '\n'.join(
+        f'— {notification.message()}' for notification in notifications
+    )
+    return EmailMessage(
+        subject='Новые события в Yatube',
+        body=f'Здравствуйте, {user.username}!\n\n{lines}\n',
+        to=[user.email],
+    )
+
+
+def send_digests(batch_size):
+    """Отправить сводки пачками по batch_size получателей.
+
+    Возвращает количество отправленных писем.
+    """
+    sent = 0
+    last_id = 0
+    connection = get_connection()
+    while True:
+        recipient_ids = list(
+            get_pending_digest().filter(recipient_id__gt=last_id)
+            .order_by('recipient_id')
+            .values_list('recipient_id', flat=True)
+            .distinct()[:batch_size]
+        )
+        if not recipient_ids:
+            return sent
+        last_id = recipient_ids[-1]
+        now = timezone.now()
+        notifications = list(
+            get_pending_digest().filter(recipient_id__in=recipient_ids)
+            .select_related('actor', 'post')
+            .order_by('recipient_id', '-updated_at')
+        )
+        users = User.objects.filter(pk__in=recipient_ids).exclude(email='')
+        by_user = {user.pk: (user, []) for user in users}
+        for notification in notifications:
+            if notification.recipient_id in by_user:
+                by_user[notification.recipient_id][1].append(notification)
+        messages = [
+            build_digest(user, items) for user, items in by_user.values()
+        ]
+        sent += connection.send_messages(messages) or 0
+        Notification.objects.filter(
+            pk__in=[notification.pk for notification in notifications]
+        ).update(emailed_at=now)
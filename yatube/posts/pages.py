@@ -0,0 +1,66 @@
+"""Кэш страниц главной ленты.
+
+Главная страница кэшируется целиком на CACHE_DURABILITY секунд, и
+обычный новый пост появляется на ней по истечении этого срока.
+Отложенные посты публикует отдельный процесс, поэтому к префиксу
+ключа страницы добавлена версия из общего кэша: ``invalidate_index()``
+меняет её, и все процессы перестают отдавать старые страницы.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.middleware.cache import CacheMiddleware
+from django.utils.decorators import decorator_from_middleware_with_args
+
+INDEX_CACHE_PREFIX = 'index_page'
+VERSION_KEY = 'posts.index.version'
+
+
+def get_version():
+    """Текущая версия страниц; после очистки кэша появляется новая."""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_index():
+    """Сбросить закэшированные страницы главной ленты во всех
+    процессах.
+    """
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+class IndexCacheMiddleware(CacheMiddleware):
+    """CacheMiddleware с версией страниц в префиксе ключа.
+
+    Кэш берётся по псевдониму при каждом обращении, а не при создании
+    middleware: декоратор создаётся при импорте views, и подмена CACHES
+    в тестах и ``manage.py bench`` иначе не дошла бы до него.
+    """
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    @cache.setter
+    def cache(self, value):
+        pass
+
+    @property
+    def key_prefix(self):
+        return f'{self.base_key_prefix}.{get_version()}'
+
+    @key_prefix.setter
+    def key_prefix(self, value):
+        self.base_key_prefix = value
+
+
+index_cache = IndexCacheMiddleware(
+    cache_timeout=settings.CACHE_DURABILITY, key_prefix=INDEX_CACHE_PREFIX
+)
+cache_index = decorator_from_middleware_with_args(IndexCacheMiddleware)(
+    cache_timeout=settings.CACHE_DURABILITY, key_prefix=INDEX_CACHE_PREFIX
+)
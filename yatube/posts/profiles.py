@@ -0,0 +1,100 @@
+"""Кэшированная шапка профиля автора.
+
+Для страницы профиля нужны имя автора, счётчики постов и подписок,
+дата последнего поста и месяцы архива. Всё это собирается в
+``ProfileSummary`` и хранится в кэше по id пользователя, а имя
+пользователя отображается на id отдельным ключом. Сигналы сохранения
+и удаления User, Post и Follow удаляют сводки затронутых пользователей.
+Кэш общий для всех процессов, поэтому сброс из команд (публикация по
+расписанию, модерация) виден веб-процессам, и счётчик постов из сводки
+можно отдавать пагинатору профиля.
+"""
+from typing import List, NamedTuple, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Max
+from django.http import Http404
+
+from posts.models import (
+    ArchivedPost, Follow, Post, PostArchiveBucket, User
+)
+
+SUMMARY_KEY = 'posts.profile.{}'
+USERNAME_KEY = 'posts.profile_id.{}'
+
+
+class ProfileSummary(NamedTuple):
+    user_id: int
+    username: str
+    first_name: str
+    last_name: str
+    display_name: str
+    posts_count: int
+    followers_count: int
+    following_count: int
+    last_pub_date: Optional[object]
+    archive_buckets: List[dict]
+
+    @property
+    def user(self):
+        """Экземпляр User с полями из сводки, без запроса к БД."""
+        return User(
+            pk=self.user_id,
+            username=self.username,
+            first_name=self.first_name,
+            last_name=self.last_name,
+        )
+
+
+def build_profile_summary(user):
+    """Собрать сводку профиля запросами к БД.
+
+    Количество постов берётся из месячных счётчиков, поэтому включает
+    посты, перенесённые в архив.
+    """
+    archive_buckets = list(
+        PostArchiveBucket.objects.filter(author=user, posts_count__gt=0)
+        .values('year', 'month', 'posts_count')
+    )
+    last_pub_date = (
+        Post.objects.published().filter(author=user)
+        .aggregate(Max('pub_date'))['pub_date__max']
+        or ArchivedPost.objects.filter(author=user, deleted_at__isnull=True)
+        .aggregate(Max('pub_date'))['pub_date__max']
+    )
+    return ProfileSummary(
+        user_id=user.pk,
+        username=user.username,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        display_name=user.get_full_name() or user.username,
+        posts_count=sum(item['posts_count'] for item in archive_buckets),
+        followers_count=Follow.objects.filter(author=user).count(),
+        following_count=Follow.objects.filter(user=user).count(),
+        last_pub_date=last_pub_date,
+        archive_buckets=archive_buckets,
+    )
+
+
+def get_profile_summary(username):
+    """Сводка профиля по имени пользователя; 404, если его нет."""
+    user_id = cache.get(USERNAME_KEY.format(username))
+    if user_id is not None:
+        summary = cache.get(SUMMARY_KEY.format(user_id))
+        if summary is not None and summary.username == username:
+            return summary
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        raise Http404('Пользователь не найден.')
+    summary = build_profile_summary(user)
+    cache.set_many({
+        USERNAME_KEY.format(username): user.pk,
+        SUMMARY_KEY.format(user.pk): summary,
+    }, settings.PROFILE_SUMMARY_TIMEOUT)
+    return summary
+
+
+def invalidate_profiles(*user_ids):
+    """Удалить сводки профилей пользователей из кэша."""
+    cache.delete_many([SUMMARY_KEY.format(user_id) for user_id in user_ids])
@@ -0,0 +1,170 @@
+"""Ранжированная лента подписок.
+
+Кандидаты — свежие опубликованные посты авторов, на которых подписан
+пользователь (не больше FEED_CANDIDATES за FEED_CANDIDATE_DAYS дней).
+Каждый оценщик из FEED_SCORERS получает признаки кандидатов массивами
+NumPy и возвращает массив оценок от 0 до 1; итоговая оценка — сумма
+оценок с весами. Порядок id хранится в кэше под случайным токеном, а
+курсор ``<токен>:<смещение>`` листает именно этот порядок, даже если
+лента тем временем была ранжирована заново.
+"""
+import functools
+import uuid
+from datetime import timedelta
+from typing import NamedTuple
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from posts.models import Comment, Post
+
+CURRENT_KEY = 'posts.ranked_feed.{}'
+ORDER_KEY = 'posts.ranked_feed.{}.{}'
+
+
+class Candidates(NamedTuple):
+    post_ids: np.ndarray
+    author_ids: np.ndarray
+    ages: np.ndarray
+    comments: np.ndarray
+
+
+def get_candidates(user_id, now=None):
+    """Признаки постов-кандидатов, от новых к старым."""
+    now = now or timezone.now()
+    since = now - timedelta(days=settings.FEED_CANDIDATE_DAYS)
+    rows = list(
+        Post.objects.published()
+        .filter(author__following__user_id=user_id, pub_date__gte=since)
+        .order_by('-pub_date')
+        .annotate(comments_count=Count('comments'))
+        .values_list('pk', 'author_id', 'pub_date', 'comments_count')
+        [:settings.FEED_CANDIDATES]
+    )
+    return Candidates(
+        post_ids=np.array([row[0] for row in rows], dtype=np.int64),
+        author_ids=np.array([row[1] for row in rows], dtype=np.int64),
+        ages=np.array(
+            [(now - row[2]).total_seconds() for row in rows],
+            dtype=np.float64
+        ),
+        comments=np.array([row[3] for row in rows], dtype=np.float64),
+    )
+
+
+def normalize(values):
+    """Логарифмическая шкала от 0 до 1."""
+    values = np.log1p(values)
+    top = values.max(initial=0)
+    return values / top if top > 0 else values
+
+
+def recency(candidates, user_id):
+    """Экспоненциальное затухание с полураспадом FEED_RECENCY_HALF_LIFE."""
+    return np.exp2(-candidates.ages / settings.FEED_RECENCY_HALF_LIFE)
+
+
+def affinity(candidates, user_id):
+    """Насколько часто пользователь комментирует автора поста."""
+    rows = (
+        Comment.objects
+        .filter(
+            author_id=user_id,
+            post__author_id__in=set(candidates.author_ids.tolist())
+        )
+        .values_list('post__author_id')
+        .annotate(comments_count=Count('id'))
+        .order_by('post__author_id')
+    )
+    authors = np.array([row[0] for row in rows], dtype=np.int64)
+    counts = np.array([row[1] for row in rows], dtype=np.float64)
+    if not len(authors):
+        return np.zeros(len(candidates.post_ids))
+    positions = np.searchsorted(authors, candidates.author_ids)
+    positions = positions.clip(max=len(authors) - 1)
+    found = authors[positions] == candidates.author_ids
+    return normalize(np.where(found, counts[positions], 0))
+
+
+def discussion(candidates, user_id):
+    """Количество комментариев к посту."""
+    return normalize(candidates.comments)
+
+
+@functools.lru_cache(maxsize=None)
+def load_scorers(scorers):
+    return [(import_string(path), weight) for path, weight in scorers]
+
+
+def score(candidates, user_id):
+    """Итоговые оценки кандидатов."""
+    total = np.zeros(len(candidates.post_ids))
+    for scorer, weight in load_scorers(tuple(settings.FEED_SCORERS)):
+        total += weight * scorer(candidates, user_id)
+    return total
+
+
+def rank_feed(user_id, now=None):
+    """Id постов ленты подписок по убыванию оценки."""
+    candidates = get_candidates(user_id, now)
+    # Кандидаты упорядочены от новых к старым, устойчивая сортировка
+    # оставляет более новый пост выше при равных оценках.
+    order = np.argsort(-score(candidates, user_id), kind='stable')
+    return candidates.post_ids[order].tolist()
+
+
+def get_ranked_order(user_id, token=None):
+    """Токен и порядок id: по токену курсора или текущий."""
+    if token:
+        post_ids = cache.get(ORDER_KEY.format(user_id, token))
+        if post_ids is not None:
+            return token, post_ids
+    token = cache.get(CURRENT_KEY.format(user_id))
+    post_ids = None
+    if token is not None:
+        post_ids = cache.get(ORDER_KEY.format(user_id, token))
+    if post_ids is None:
+        token = uuid.uuid4().hex
+        post_ids = rank_feed(user_id)
+        cache.set(
+            ORDER_KEY.format(user_id, token),
+            post_ids,
+            settings.FEED_CURSOR_TIMEOUT
+        )
+        cache.set(
+            CURRENT_KEY.format(user_id), token, settings.FEED_RANK_TIMEOUT
+        )
+    return token, post_ids
+
+
+def parse_cursor(cursor):
+    token, _, offset = (cursor or '').partition(':')
+    if not offset.isdigit():
+        return None, 0
+    return token, int(offset)
+
+
+def get_ranked_page(user_id, cursor=None, per_page=None):
+    """Посты страницы ранжированной ленты и курсор следующей страницы.
+
+    Если порядок из курсора уже удалён из кэша, лента начинается
+    сначала с новым порядком.
+    """
+    per_page = per_page or settings.POSTS_ON_PAGE
+    token, offset = parse_cursor(cursor)
+    current, post_ids = get_ranked_order(user_id, token)
+    if current != token:
+        offset = 0
+    page_ids = post_ids[offset:offset + per_page]
+    posts = Post.objects.published().select_related(
+        'author', 'group'
+    ).in_bulk(page_ids)
+    next_offset = offset + per_page
+    next_cursor = (
+        f'{current}:{next_offset}' if next_offset < len(post_ids) else None
+    )
+    return [posts[pk] for pk in page_ids if pk in posts], next_cursor
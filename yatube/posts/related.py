@@ -0,0 +1,144 @@
+"""Похожие посты по MinHash-подписям текстов.
+
+Команда ``python manage.py refresh_related`` считает подписи новых
+опубликованных постов (множество слов не короче
+RELATED_MIN_WORD_LENGTH букв), собирает LSH-индекс всех подписей и для
+каждого нового поста сохраняет RELATED_POSTS_COUNT самых похожих в
+RelatedPost. Старые посты, у которых нашёлся новый сосед или чей сосед
+изменился, пересчитываются по тому же индексу в памяти. Изменение
+текста удаляет подпись, и пост считается заново при следующем запуске.
+Страница поста читает готовый список одним запросом по индексу
+``related_post_score``.
+"""
+import functools
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+
+from core.minhash import MAX_HASH, LSHIndex, MinHasher, tokenize
+from posts.models import Post, PostSignature, RelatedPost
+
+
+@functools.lru_cache(maxsize=None)
+def get_hasher(num_perm):
+    return MinHasher(num_perm)
+
+
+def text_signature(text):
+    features = set(tokenize(text, settings.RELATED_MIN_WORD_LENGTH))
+    return get_hasher(settings.RELATED_MINHASH_PERMUTATIONS).signature(
+        features
+    )
+
+
+def compute_signatures(batch_size):
+    """Посчитать подписи опубликованных постов без подписи; вернуть id."""
+    computed = []
+    last_id = 0
+    while True:
+        rows = list(
+            Post.objects.published()
+            .filter(pk__gt=last_id, signature__isnull=True)
+            .order_by('pk')
+            .values_list('pk', 'text')[:batch_size]
+        )
+        if not rows:
+            return computed
+        PostSignature.objects.bulk_create(
+            PostSignature(post_id=pk, signature=text_signature(text).tobytes())
+            for pk, text in rows
+        )
+        last_id = rows[-1][0]
+        computed += [pk for pk, _ in rows]
+
+
+def load_index():
+    index = LSHIndex(
+        settings.RELATED_MINHASH_PERMUTATIONS, settings.RELATED_LSH_BANDS
+    )
+    signatures = PostSignature.objects.filter(
+        post__is_published=True
+    ).values_list('post_id', 'signature')
+    for post_id, signature in signatures.iterator():
+        signature = np.frombuffer(signature, dtype=np.uint32)
+        # Подпись текста без слов одинакова у всех таких постов; похожих
+        # у них нет. Подпись хранится, чтобы пост не считался заново.
+        if (signature == MAX_HASH).all():
+            continue
+        index.insert(post_id, signature)
+    return index
+
+
+def find_related(index, post_id):
+    """Все соседи поста не ниже RELATED_POSTS_MIN_SCORE по убыванию."""
+    matches = [
+        (key, score)
+        for key, score in index.query(
+            index.signatures[post_id], settings.RELATED_POSTS_MIN_SCORE
+        )
+        if key != post_id
+    ]
+    # При равном сходстве выше более новый пост.
+    matches.sort(key=lambda match: (-match[1], -match[0]))
+    return matches
+
+
+def store_related(related):
+    """Заменить списки похожих постов: словарь post_id -> пары."""
+    with transaction.atomic():
+        RelatedPost.objects.filter(post_id__in=list(related)).delete()
+        RelatedPost.objects.bulk_create(
+            RelatedPost(post_id=post_id, related_id=related_id, score=score)
+            for post_id, items in related.items()
+            for related_id, score in items
+        )
+
+
+def refresh_related(rebuild=False, batch_size=None):
+    """Обновить похожие посты новых (или всех) постов.
+
+    Возвращает количество постов, чьи списки были пересчитаны.
+    """
+    batch_size = batch_size or settings.RELATED_POSTS_BATCH
+    limit = settings.RELATED_POSTS_COUNT
+    computed = compute_signatures(batch_size)
+    if not computed and not rebuild:
+        return 0
+    index = load_index()
+    targets = list(index.signatures) if rebuild else computed
+    targets = [post_id for post_id in targets if post_id in index.signatures]
+    # Посты без слов не попадают в индекс; прежние списки у них
+    # удаляются.
+    empty = [
+        post_id for post_id in computed if post_id not in index.signatures
+    ]
+    store_related({post_id: [] for post_id in empty})
+    affected = set(targets)
+    # Прежние соседи изменённых постов: сходство могло пропасть.
+    affected.update(
+        RelatedPost.objects.filter(related_id__in=[*targets, *empty])
+        .values_list('post_id', flat=True)
+    )
+    affected &= set(index.signatures)
+    for post_id in targets:
+        affected.update(key for key, _ in find_related(index, post_id))
+    affected = sorted(affected)
+    for start in range(0, len(affected), batch_size):
+        store_related({
+            post_id: find_related(index, post_id)[:limit]
+            for post_id in affected[start:start + batch_size]
+        })
+    return len(affected)
+
+
+def get_related_posts(post_id):
+    """Похожие опубликованные посты одним запросом."""
+    return [
+        item.related for item in
+        RelatedPost.objects.filter(
+            post_id=post_id, related__is_published=True
+        ).select_related(
+            'related__author', 'related__group'
+        )[:settings.RELATED_POSTS_COUNT]
+    ]
@@ -0,0 +1,79 @@
+"""Публикация отложенных постов.
+
+Отложенный пост хранится с ``is_published=False`` и заполненным
+``publish_at``. Команда ``python manage.py publish_scheduled`` спит до
+ближайшего момента публикации, но не дольше интервала опроса, а сами
+посты выбирает запросом по частичному индексу ``post_scheduled`` и
+публикует пачками одним ``update()``.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.utils import timezone
+
+from posts.feeds import assign_publish_seq
+from posts.models import Post
+from posts.signals import count_post, month_start, posts_published
+
+
+def publish_posts(queryset, batch_size):
+    """Опубликовать до batch_size постов из queryset; вернуть их id.
+
+    Дата публикации поста — момент фактической публикации, а не
+    ``publish_at``: пост, опубликованный с опозданием, не должен встать
+    в ленту за уже показанными постами.
+    """
+    with transaction.atomic():
+        posts = list(
+            queryset.filter(is_published=False)
+            .order_by('publish_at')
+            .values_list('pk', 'author_id', 'group_id')[:batch_size]
+        )
+        if not posts:
+            return []
+        post_ids = [pk for pk, _, _ in posts]
+        now = timezone.now()
+        Post.objects.filter(pk__in=post_ids).update(
+            is_published=True, pub_date=now
+        )
+        assign_publish_seq(post_ids)
+        months = Counter(
+            (author_id, group_id) for _, author_id, group_id in posts
+        )
+        for (author_id, group_id), delta in months.items():
+            count_post(author_id, group_id, month_start(now), delta)
+    posts_published.send(
+        sender=Post,
+        post_ids=post_ids,
+        author_ids={author_id for _, author_id, _ in posts},
+    )
+    return post_ids
+
+
+def publish_if_due(post):
+    """Сразу опубликовать пост, если его время уже наступило."""
+    due = Post.objects.due(timezone.now()).filter(pk=post.pk)
+    if publish_posts(due, 1):
+        post.refresh_from_db()
+
+
+def publish_due_posts(batch_size, now=None):
+    """Опубликовать все наступившие посты пачками по batch_size."""
+    now = now or timezone.now()
+    published = []
+    while True:
+        post_ids = publish_posts(Post.objects.due(now), batch_size)
+        published += post_ids
+        if len(post_ids) < batch_size:
+            return published
+
+
+def get_next_publish_at():
+    """Ближайший момент публикации (timestamp) или None."""
+    publish_at = (
+        Post.objects.filter(is_published=False, publish_at__isnull=False)
+        .order_by('publish_at')
+        .values_list('publish_at', flat=True)
+        .first()
+    )
+    return publish_at.timestamp() if publish_at else None
@@ -0,0 +1,249 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from posts.feeds import assign_publish_seq
+from posts.groups import invalidate_groups
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Follow, Group, Notification, Post,
+    PostArchiveBucket, PostSignature, User
+)
+from posts.notifications import notify
+from posts.pages import invalidate_index
+from posts.suggestions import mark_stale
+from posts.profiles import invalidate_profiles
+from posts.tags import index_published, notify_mentions, sync_post_tags
+from posts.tasks import mark_audience_stale
+
+# Отправляется после пакетной публикации отложенных постов, которая
+# обновляет строки через update() без сигналов post_save.
+posts_published = Signal(providing_args=['post_ids', 'author_ids'])
+
+
+def month_start(value):
+    """Начало месяца value в местном времени."""
+    return timezone.localtime(value).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def change_archive_bucket(pub_date, delta, **scope):
+    """Изменить счётчик постов за месяц публикации на delta."""
+    pub_date = timezone.localtime(pub_date)
+    lookup = dict(scope, year=pub_date.year, month=pub_date.month)
+    buckets = PostArchiveBucket.objects.filter(**lookup)
+    updated = buckets.update(posts_count=F('posts_count') + delta)
+    if not updated and delta > 0:
+        try:
+            with transaction.atomic():
+                PostArchiveBucket.objects.create(**lookup, posts_count=delta)
+        except IntegrityError:
+            # Счётчик за месяц успел создать параллельный запрос.
+            buckets.update(posts_count=F('posts_count') + delta)
+
+
+def count_post(author_id, group_id, pub_date, delta):
+    """Изменить счётчики автора и группы поста на delta."""
+    change_archive_bucket(pub_date, delta, author_id=author_id)
+    if group_id:
+        change_archive_bucket(pub_date, delta, group_id=group_id)
+
+
+@receiver(pre_save, sender=Post)
+def remember_post_state(sender, instance, **kwargs):
+    """Запомнить группу, дату, статус и текст поста до сохранения."""
+    instance._stored_state = None
+    instance._stored_text = None
+    if instance.pk is None:
+        return
+    stored = (
+        Post.objects.filter(pk=instance.pk)
+        .values_list('group_id', 'pub_date', 'is_published', 'text')
+        .first()
+    )
+    if stored is not None:
+        instance._stored_state = stored[:3]
+        instance._stored_text = stored[3]
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    """Учесть в архивных счётчиках публикацию поста или смену группы.
+
+    Черновики и отложенные посты в счётчиках не участвуют.
+    """
+    if raw:
+        return
+    stored = None if created else getattr(instance, '_stored_state', None)
+    current = (instance.group_id, instance.pub_date, instance.is_published)
+    if stored == current:
+        return
+    if stored is not None and stored[2]:
+        count_post(instance.author_id, stored[0], stored[1], -1)
+    if instance.is_published:
+        count_post(
+            instance.author_id, instance.group_id, instance.pub_date, 1
+        )
+
+
+@receiver(post_save, sender=Post)
+def number_published_post(sender, instance, raw=False, **kwargs):
+    """Выдать номер публикации опубликованному посту без номера."""
+    if raw or not instance.is_published or instance.publish_seq is not None:
+        return
+    assign_publish_seq([instance.pk], reassign=False)
+    # Следующий save() экземпляра не должен стереть номер.
+    instance.publish_seq = Post.objects.filter(
+        pk=instance.pk
+    ).values_list('publish_seq', flat=True).first()
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    """Убрать удалённый пост из архивных счётчиков."""
+    if instance.is_published:
+        count_post(
+            instance.author_id, instance.group_id, instance.pub_date, -1
+        )
+
+
+@receiver(post_delete, sender=Post)
+def delete_archived_comments(sender, instance, **kwargs):
+    """Удалить архивные комментарии удалённого живого поста.
+
+    Перенос поста в архив удаляет его без сигналов, и комментарии
+    остаются при архивном посте.
+    """
+    ArchivedComment.objects.filter(post_id=instance.pk).delete()
+
+
+@receiver(post_delete, sender=ArchivedPost)
+def delete_archived_post_comments(sender, instance, **kwargs):
+    """Удалить комментарии архивного поста, например вместе с автором."""
+    ArchivedComment.objects.filter(post_id=instance.pk).delete()
+
+
+def reset_groups():
+    """Сбросить кэш групп сразу и ещё раз после фиксации транзакции."""
+    invalidate_groups()
+    transaction.on_commit(invalidate_groups)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def reset_group_cache(sender, **kwargs):
+    reset_groups()
+
+
+def reset_profiles(*user_ids):
+    """Удалить сводки профилей сразу и ещё раз после фиксации."""
+    invalidate_profiles(*user_ids)
+    transaction.on_commit(lambda: invalidate_profiles(*user_ids))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def reset_user_profile(sender, instance, raw=False, **kwargs):
+    if not raw:
+        reset_profiles(instance.pk)
+
+
+@receiver(post_save, sender=Post)
+def reset_author_profile(sender, instance, raw=False, **kwargs):
+    if not raw:
+        reset_profiles(instance.author_id)
+
+
+@receiver(post_delete, sender=Post)
+def reset_deleted_post_author_profile(sender, instance, **kwargs):
+    reset_profiles(instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_follow_profiles(sender, instance, raw=False, **kwargs):
+    if not raw:
+        reset_profiles(instance.user_id, instance.author_id)
+
+
+@receiver(posts_published)
+def reset_published_profiles(sender, author_ids, **kwargs):
+    reset_profiles(*author_ids)
+
+
+@receiver(posts_published)
+def reset_published_pages(sender, **kwargs):
+    """Показать опубликованные посты на главной и в каталоге групп."""
+    invalidate_index()
+    invalidate_groups()
+
+
+@receiver(post_save, sender=Comment)
+def notify_post_author(sender, instance, created, raw=False, **kwargs):
+    """Уведомить автора поста о новом комментарии."""
+    if created and not raw:
+        notify(
+            instance.post.author_id,
+            Notification.COMMENT,
+            instance.author_id,
+            post_id=instance.post_id,
+        )
+
+
+@receiver(post_save, sender=Follow)
+def notify_followed_author(sender, instance, created, raw=False, **kwargs):
+    """Уведомить автора о новом подписчике."""
+    if created and not raw:
+        notify(instance.author_id, Notification.FOLLOW, instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def mark_suggestions_stale(sender, instance, raw=False, **kwargs):
+    """Отметить для пересчёта рекомендаций подписчика сразу, а
+    остальных затронутых читателей — в фоне.
+    """
+    if not raw:
+        mark_stale([instance.user_id])
+        mark_audience_stale.delay(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def reset_post_signature(sender, instance, created, raw=False,
+                         update_fields=None, **kwargs):
+    """Удалить подпись изменённого текста; её пересчитает
+    refresh_related.
+    """
+    if created or raw:
+        return
+    if update_fields is not None and 'text' not in update_fields:
+        return
+    if getattr(instance, '_stored_text', None) != instance.text:
+        PostSignature.objects.filter(post_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Post)
+def index_post_text(sender, instance, created, raw=False, **kwargs):
+    """Обновить теги поста и уведомить упомянутых пользователей."""
+    if raw:
+        return
+    stored = None if created else getattr(instance, '_stored_state', None)
+    was_published = bool(stored and stored[2])
+    previous_text = getattr(instance, '_stored_text', None) or ''
+    if (
+        stored is not None and previous_text == instance.text
+        and was_published == instance.is_published
+    ):
+        return
+    sync_post_tags(instance)
+    if instance.is_published:
+        notify_mentions(
+            instance, previous_text if was_published else ''
+        )
+
+
+@receiver(posts_published)
+def index_published_posts(sender, post_ids, **kwargs):
+    index_published(post_ids)
@@ -0,0 +1,201 @@
+"""Поток новых постов ленты (server-sent events).
+
+Клиент открывает ``/stream/posts/?feed=index|group|follow&slug=...`` и
+держит соединение. Номер последней публикации (см. posts.feeds) раз в
+SSE_POLL_INTERVAL секунд проверяет один общий для процесса
+``PublishWatcher``, а ленту своего клиента поток запрашивает, только
+когда этот номер вырос, и при появлении постов новее курсора
+отправляет событие ``posts`` с их количеством и id. Первое событие
+отправляется сразу: в нём текущий курсор и посты, опубликованные после
+курсора клиента, например пока страница лежала в кэше. Курсор
+передаётся в ``id`` события, поэтому переподключившийся EventSource
+продолжит с места обрыва по заголовку ``Last-Event-ID``.
+
+Запросы к БД выполняются в общем пуле потоков core.asgi, цикл событий
+занят только ожиданием, и одно соединение почти ничего не стоит серверу.
+"""
+import asyncio
+import json
+import weakref
+from importlib import import_module
+
+from django.conf import settings
+from django.http import Http404
+
+from core.asgi import (
+    get_cookie, get_header, get_query, run_sync, send_response
+)
+from core.ratelimit import SESSION_USER_KEY
+from posts.feeds import get_feed_queryset, get_last_seq, get_new_posts
+
+STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+def get_session_user_id(session_key):
+    """Id пользователя из сессии, без запроса к таблице пользователей."""
+    if not session_key:
+        return None
+    engine = import_module(settings.SESSION_ENGINE)
+    return engine.SessionStore(session_key).get(SESSION_USER_KEY)
+
+
+def check_feed(feed, user_id, slug, cursor):
+    return get_new_posts(
+        get_feed_queryset(feed, user_id=user_id, slug=slug), cursor
+    )
+
+
+def format_event(result):
+    data = json.dumps(result, separators=(',', ':'))
+    return f'id: {result["cursor"] or ""}\nevent: posts\ndata: {data}\n\n'
+
+
+async def send_event(send, body):
+    await send({
+        'type': 'http.response.body',
+        'body': body.encode(),
+        'more_body': True,
+    })
+
+
+class PublishWatcher:
+    """Номер последней публикации, общий для потоков одного цикла
+    событий.
+
+    Проверка идёт, пока есть хотя бы один подписчик; каждое увеличение
+    номера будит всех ждущих.
+    """
+
+    def __init__(self):
+        self.seq = None
+        self.listeners = 0
+        self.changed = asyncio.Event()
+        self.task = None
+
+    def subscribe(self):
+        self.listeners += 1
+        if self.task is None:
+            self.task = asyncio.ensure_future(self.run())
+
+    def unsubscribe(self):
+        self.listeners -= 1
+
+    async def run(self):
+        try:
+            while self.listeners:
+                seq = await run_sync(get_last_seq)
+                if self.seq is None or seq > self.seq:
+                    self.seq = seq
+                    changed, self.changed = self.changed, asyncio.Event()
+                    changed.set()
+                await asyncio.sleep(settings.SSE_POLL_INTERVAL)
+        finally:
+            self.task = None
+
+    async def wait(self, seq, timeout):
+        """Дождаться номера больше seq не дольше timeout секунд."""
+        if self.seq is not None and self.seq > seq:
+            return
+        try:
+            await asyncio.wait_for(self.changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+_watchers = weakref.WeakKeyDictionary()
+
+
+def get_watcher():
+    loop = asyncio.get_running_loop()
+    watcher = _watchers.get(loop)
+    if watcher is None:
+        watcher = _watchers[loop] = PublishWatcher()
+    return watcher
+
+
+async def push_new_posts(send, disconnected, feed, user_id, slug, cursor,
+                         checked):
+    """Проверять ленту до отключения клиента и отправлять события.
+
+    checked — номер последней публикации, уже учтённый курсором.
+    """
+    loop = asyncio.get_running_loop()
+    watcher = get_watcher()
+    watcher.subscribe()
+    last_sent = loop.time()
+    try:
+        while not disconnected.is_set():
+            timeout = max(
+                settings.SSE_HEARTBEAT_INTERVAL - (loop.time() - last_sent),
+                0
+            )
+            waiter = asyncio.ensure_future(watcher.wait(checked, timeout))
+            stop = asyncio.ensure_future(disconnected.wait())
+            await asyncio.wait(
+                {waiter, stop}, return_when=asyncio.FIRST_COMPLETED
+            )
+            waiter.cancel()
+            stop.cancel()
+            if disconnected.is_set():
+                return
+            if watcher.seq is not None and watcher.seq > checked:
+                checked = watcher.seq
+                result = await run_sync(
+                    check_feed, feed, user_id, slug, cursor
+                )
+                cursor = result['cursor']
+                if result['count']:
+                    await send_event(send, format_event(result))
+                    last_sent = loop.time()
+                    continue
+            if loop.time() - last_sent >= settings.SSE_HEARTBEAT_INTERVAL:
+                # Комментарий не даёт прокси закрыть простаивающее
+                # соединение.
+                await send_event(send, ': ping\n\n')
+                last_sent = loop.time()
+    finally:
+        watcher.unsubscribe()
+
+
+async def posts_stream(scope, receive, send):
+    query = get_query(scope)
+    feed = query.get('feed', 'index')
+    slug = query.get('slug')
+    cursor = get_header(scope, 'last-event-id') or query.get('since')
+    user_id = await run_sync(
+        get_session_user_id, get_cookie(scope, settings.SESSION_COOKIE_NAME)
+    )
+    # Номер берётся до проверки ленты: всё, что опубликовано позже,
+    # получит номер больше и будет проверено снова.
+    checked = await run_sync(get_last_seq)
+    try:
+        result = await run_sync(check_feed, feed, user_id, slug, cursor)
+    except Http404:
+        await send_response(send, 404, 'Лента не найдена.'.encode())
+        return
+
+    disconnected = asyncio.Event()
+
+    async def watch_disconnect():
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+        disconnected.set()
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': STREAM_HEADERS,
+        })
+        await send_event(send, format_event(result))
+        await push_new_posts(
+            send, disconnected, feed, user_id, slug,
+            result['cursor'] or str(checked), checked
+        )
+    finally:
+        watcher.cancel()
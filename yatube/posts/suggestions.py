@@ -0,0 +1,246 @@
+"""Рекомендации «Кого почитать» по графу подписок.
+
+Подписки загружаются в разреженную матрицу ``A`` (строка — подписчик,
+столбец — автор). Для пачки пользователей ``R`` считаются две оценки:
+
+* друзья друзей: ``A[R] @ A`` — сколькими путями через своих авторов
+  пользователь приходит к автору;
+* совместные подписки: ``S @ A``, где ``S`` — косинусная близость
+  пользователей по общим авторам (``A[R] @ A.T``, делённое на корни
+  из числа подписок).
+
+Каждая оценка нормируется по максимуму строки, затем складываются с
+весами SUGGESTIONS_WEIGHTS. Уже отслеживаемые авторы и сам пользователь
+исключаются, остаётся SUGGESTIONS_TOP_K лучших. Сигналы Follow отмечают
+в StaleSuggestions подписчика, а фоновая задача — всех читателей, чьи
+оценки зависят от его строки матрицы (см. get_audience). Команда
+``refresh_suggestions`` пересчитывает только отмеченных.
+"""
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from scipy import sparse
+
+from posts.models import Follow, FollowSuggestion, StaleSuggestions
+
+
+class FollowGraph:
+    """Граф подписок в виде разреженной матрицы."""
+
+    def __init__(self, edges):
+        edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+        self.user_ids, inverse = np.unique(edges, return_inverse=True)
+        inverse = inverse.reshape(-1, 2)
+        size = len(self.user_ids)
+        self.matrix = sparse.csr_matrix(
+            (np.ones(len(edges)), (inverse[:, 0], inverse[:, 1])),
+            shape=(size, size),
+        )
+        degrees = np.asarray(self.matrix.sum(axis=1)).ravel()
+        with np.errstate(divide='ignore'):
+            self.inverse_norms = np.where(
+                degrees > 0, 1 / np.sqrt(degrees), 0
+            )
+
+    @classmethod
+    def load(cls, user_ids=None):
+        """Граф всех подписок или только той части, от которой зависят
+        оценки для user_ids.
+
+        Оценкам пользователя нужны его подписки, подписки его авторов
+        (друзья друзей) и подписки всех, кто читает тех же авторов
+        (совместные подписки): строки остальных в расчёт не входят.
+        """
+        edges = Follow.objects.all()
+        if user_ids is not None:
+            authors = Follow.objects.filter(
+                user_id__in=user_ids
+            ).values('author_id')
+            cofollowers = Follow.objects.filter(
+                author_id__in=authors
+            ).values('user_id')
+            edges = edges.filter(
+                Q(user_id__in=user_ids)
+                | Q(user_id__in=authors)
+                | Q(user_id__in=cofollowers)
+            )
+        return cls(edges.values_list('user_id', 'author_id'))
+
+    def rows(self, user_ids):
+        """Номера строк матрицы для пользователей из графа."""
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        if not len(self.user_ids):
+            return user_ids[:0], user_ids[:0]
+        positions = np.searchsorted(self.user_ids, user_ids)
+        positions = positions.clip(max=len(self.user_ids) - 1)
+        found = self.user_ids[positions] == user_ids
+        return user_ids[found], positions[found]
+
+    def scores(self, rows):
+        """Итоговые оценки авторов для строк rows (разреженная матрица)."""
+        follows = self.matrix[rows]
+        friends = follows @ self.matrix
+        norms = sparse.diags(self.inverse_norms)
+        similarity = sparse.diags(self.inverse_norms[rows]) @ (
+            follows @ self.matrix.T
+        ) @ norms
+        cofollow = similarity @ self.matrix
+        weights = settings.SUGGESTIONS_WEIGHTS
+        return (
+            weights['friends'] * normalize_rows(friends)
+            + weights['cofollow'] * normalize_rows(cofollow)
+        ).tocsr()
+
+
+def normalize_rows(matrix):
+    """Разделить каждую строку на её максимум."""
+    matrix = sparse.csr_matrix(matrix)
+    top = np.asarray(matrix.max(axis=1).todense()).ravel()
+    with np.errstate(divide='ignore'):
+        scale = np.where(top > 0, 1 / top, 0)
+    return sparse.diags(scale) @ matrix
+
+
+def top_suggestions(graph, user_ids, limit):
+    """Словарь user_id -> список пар (id автора, оценка)."""
+    user_ids, rows = graph.rows(user_ids)
+    if not len(rows):
+        return {}
+    scores = graph.scores(rows)
+    following = graph.matrix[rows]
+    suggestions = {}
+    for number, user_id in enumerate(user_ids.tolist()):
+        start, end = scores.indptr[number], scores.indptr[number + 1]
+        columns = scores.indices[start:end]
+        values = scores.data[start:end]
+        followed = following.indices[
+            following.indptr[number]:following.indptr[number + 1]
+        ]
+        keep = (
+            (values > 0)
+            & (graph.user_ids[columns] != user_id)
+            & ~np.isin(columns, followed)
+        )
+        columns, values = columns[keep], values[keep]
+        if len(values) > limit:
+            best = np.argpartition(-values, limit)[:limit]
+            columns, values = columns[best], values[best]
+        order = np.argsort(-values, kind='stable')
+        suggestions[user_id] = list(zip(
+            graph.user_ids[columns[order]].tolist(),
+            values[order].tolist(),
+        ))
+    return suggestions
+
+
+def store_suggestions(user_ids, suggestions):
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(
+            FollowSuggestion(user_id=user_id, suggested_id=author_id,
+                             score=score)
+            for user_id, items in suggestions.items()
+            for author_id, score in items
+        )
+
+
+def refresh_suggestions(user_ids=None, batch_size=None):
+    """Пересчитать рекомендации отмеченных (или указанных) пользователей.
+
+    Возвращает количество обработанных пользователей.
+    """
+    batch_size = batch_size or settings.SUGGESTIONS_BATCH
+    started = timezone.now()
+    if user_ids is None:
+        user_ids = list(
+            StaleSuggestions.objects.filter(marked_at__lte=started)
+            .values_list('user_id', flat=True)
+        )
+    user_ids = sorted(user_ids)
+    if not user_ids:
+        return 0
+    # Одну пачку дешевле считать по её части графа, много пачек — по
+    # всему графу, загруженному один раз.
+    graph = FollowGraph.load(
+        user_ids if len(user_ids) <= batch_size else None
+    )
+    for start in range(0, len(user_ids), batch_size):
+        batch = user_ids[start:start + batch_size]
+        store_suggestions(
+            batch,
+            top_suggestions(graph, batch, settings.SUGGESTIONS_TOP_K)
+        )
+        # Отметки, поставленные во время расчёта, остаются до следующего.
+        StaleSuggestions.objects.filter(
+            user_id__in=batch, marked_at__lte=started
+        ).delete()
+    return len(user_ids)
+
+
+def get_all_followers():
+    return list(
+        Follow.objects.order_by().values_list('user_id', flat=True)
+        .distinct()
+    )
+
+
+def mark_stale(user_ids):
+    """Отметить пользователей для пересчёта рекомендаций."""
+    user_ids = list(user_ids)
+    now = timezone.now()
+    StaleSuggestions.objects.filter(
+        user_id__in=user_ids
+    ).update(marked_at=now)
+    StaleSuggestions.objects.bulk_create(
+        (StaleSuggestions(user_id=user_id, marked_at=now)
+         for user_id in user_ids),
+        ignore_conflicts=True
+    )
+
+
+def get_audience(user_id, author_id):
+    """Читатели, чьи оценки зависят от подписки user_id на author_id.
+
+    Подписка меняет строку user_id: от неё зависят друзья друзей у его
+    подписчиков, а близость user_id с любым читателем, у которого есть
+    общий с ним автор, нормирована на число всех его подписок. Поэтому
+    затронуты подписчики user_id и читатели author_id и всех остальных
+    его авторов.
+    """
+    authors = Follow.objects.filter(user_id=user_id).values('author_id')
+    return (
+        Follow.objects.filter(
+            Q(author_id=user_id)
+            | Q(author_id=author_id)
+            | Q(author_id__in=authors)
+        )
+        .exclude(user_id=user_id)
+        .order_by('user_id').values_list('user_id', flat=True).distinct()
+    )
+
+
+def mark_audience_stale(user_id, author_id, batch_size=None):
+    """Отметить читателей из get_audience пачками."""
+    batch_size = batch_size or settings.SUGGESTIONS_BATCH
+    last_id = 0
+    while True:
+        batch = list(
+            get_audience(user_id, author_id)
+            .filter(user_id__gt=last_id)[:batch_size]
+        )
+        if not batch:
+            return
+        mark_stale(batch)
+        last_id = batch[-1]
+
+
+def get_suggested_authors(user, limit):
+    """Сохранённые рекомендации пользователя без авторов, на которых он
+    подписался после расчёта.
+    """
+    suggestions = FollowSuggestion.objects.filter(user=user).exclude(
+        suggested__following__user=user
+    ).select_related('suggested')[:limit]
+    return [suggestion.suggested for suggestion in suggestions]
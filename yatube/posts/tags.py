@@ -0,0 +1,123 @@
+"""Хештеги и упоминания в текстах постов.
+
+Текст разбирается один раз при сохранении поста (сигналы в
+posts.signals) или при пакетной публикации: ``#тег`` попадает в Tag и
+PostTag, ``@username`` — в уведомление упомянутому пользователю. Строки
+PostTag есть только у опубликованных постов и хранят дату публикации,
+поэтому страница тега листается курсором ``<id>,<дата>`` по индексу
+``post_tag_feed`` без OFFSET.
+"""
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from core.richtext import MENTION_RE, TAG_RE
+from posts.models import Notification, Post, PostTag, Tag, User
+from posts.notifications import notify
+
+
+def parse_tags(text):
+    """Имена тегов текста в нижнем регистре, без повторов."""
+    return list(dict.fromkeys(
+        name.lower() for name in TAG_RE.findall(text)
+    ))
+
+
+def parse_mentions(text):
+    """Имена упомянутых пользователей; точка в конце не входит в имя."""
+    return {
+        name.rstrip('.') for name in MENTION_RE.findall(text)
+    } - {''}
+
+
+def get_tag_ids(names):
+    """id тегов по именам; недостающие теги создаются."""
+    tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+    missing = [name for name in names if name not in tags]
+    if missing:
+        Tag.objects.bulk_create(
+            [Tag(name=name) for name in missing], ignore_conflicts=True
+        )
+        tags.update(
+            Tag.objects.filter(name__in=missing).values_list('name', 'pk')
+        )
+    return [tags[name] for name in names]
+
+
+def sync_post_tags(post):
+    """Привести PostTag поста в соответствие с его текстом и статусом."""
+    rows = PostTag.objects.filter(post_id=post.pk)
+    if not post.is_published:
+        rows.delete()
+        return
+    tag_ids = set(get_tag_ids(parse_tags(post.text)))
+    rows.exclude(tag_id__in=tag_ids).delete()
+    tag_ids -= set(rows.values_list('tag_id', flat=True))
+    PostTag.objects.bulk_create(
+        PostTag(tag_id=tag_id, post_id=post.pk, pub_date=post.pub_date)
+        for tag_id in tag_ids
+    )
+
+
+def notify_mentions(post, previous_text=''):
+    """Уведомить пользователей, упомянутых в посте впервые."""
+    usernames = parse_mentions(post.text) - parse_mentions(previous_text)
+    if not usernames:
+        return
+    recipients = User.objects.filter(
+        username__in=usernames
+    ).values_list('pk', flat=True)
+    for recipient_id in recipients:
+        notify(
+            recipient_id, Notification.MENTION, post.author_id,
+            post_id=post.pk
+        )
+
+
+def index_published(post_ids):
+    """Теги и упоминания постов, опубликованных через update()."""
+    for post in Post.objects.filter(pk__in=post_ids).only(
+        'pk', 'author_id', 'text', 'pub_date', 'is_published'
+    ):
+        sync_post_tags(post)
+        notify_mentions(post)
+
+
+def parse_date(value):
+    """Дата из строки ISO 8601 или None, если строка пуста или
+    некорректна.
+    """
+    try:
+        return parse_datetime(value or '')
+    except ValueError:
+        return None
+
+
+def parse_page_cursor(cursor):
+    """Пара (id поста, дата) из курсора или None."""
+    post_id, _, date = (cursor or '').partition(',')
+    date = parse_date(date)
+    if not post_id.isdigit() or date is None:
+        return None
+    return int(post_id), date
+
+
+def get_tag_page(tag, cursor=None, per_page=None):
+    """Посты страницы тега и курсор следующей страницы."""
+    per_page = per_page or settings.POSTS_ON_PAGE
+    rows = PostTag.objects.filter(tag=tag)
+    position = parse_page_cursor(cursor)
+    if position is not None:
+        post_id, date = position
+        rows = rows.filter(
+            Q(pub_date__lt=date) | Q(pub_date=date, post_id__lt=post_id)
+        )
+    rows = list(
+        rows.order_by('-pub_date', '-post_id')
+        .select_related('post__author', 'post__group')[:per_page + 1]
+    )
+    next_cursor = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        next_cursor = f'{last.post_id},{last.pub_date.isoformat()}'
+    return [row.post for row in rows[:per_page]], next_cursor
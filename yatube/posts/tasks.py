@@ -0,0 +1,26 @@
+from sorl.thumbnail import get_thumbnail
+
+from core.tasks import task
+from posts import suggestions
+from posts.models import Post
+
+THUMBNAIL_GEOMETRY = '960x339'
+
+
+@task(max_retries=3, retry_delay=10)
+def warm_post_thumbnail(post_id):
+    """Заранее создать миниатюру изображения, которую выводят шаблоны."""
+    post = Post.objects.filter(pk=post_id).only('image').first()
+    if post is None or not post.image:
+        return
+    get_thumbnail(
+        post.image, THUMBNAIL_GEOMETRY, crop='center', upscale=True
+    )
+
+
+@task(max_retries=3, retry_delay=10)
+def mark_audience_stale(user_id, author_id):
+    """Отметить для пересчёта рекомендации читателей, которых затронула
+    подписка или отписка.
+    """
+    suggestions.mark_audience_stale(user_id, author_id)
@@ -0,0 +1,227 @@
+import json
+from http import HTTPStatus
+from urllib.parse import urlencode
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.archiving import move_comments
+from posts.groups import get_group_stats
+from posts.models import (
+    ArchivedComment, Comment, Follow, Group, ModerationJob, Notification,
+    Post
+)
+from posts.notifications import get_unread_count
+
+User = get_user_model()
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.author = User.objects.create_user(username='author')
+        group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        for number in range(3):
+            post = Post.objects.create(
+                author=cls.author, group=group, text=f'Пост {number}'
+            )
+            Comment.objects.create(
+                author=cls.author, post=post, text='Комментарий'
+            )
+        Follow.objects.create(user=cls.admin, author=cls.author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def test_changelists_open(self):
+        """Списки постов, комментариев и подписок открываются."""
+        for model in ('post', 'comment', 'follow'):
+            with self.subTest(model=model):
+                response = self.client.get(
+                    reverse(f'admin:posts_{model}_changelist')
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def _count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от количества строк."""
+        for model in ('post', 'comment', 'follow'):
+            with self.subTest(model=model):
+                url = reverse(f'admin:posts_{model}_changelist')
+                queries_count = self._count_queries(url)
+                for number in range(3):
+                    user = User.objects.create_user(
+                        username=f'{model}{number}'
+                    )
+                    post = Post.objects.create(author=user, text='Пост')
+                    Comment.objects.create(
+                        author=user, post=post, text='Комментарий'
+                    )
+                    Follow.objects.create(user=user, author=self.author)
+                self.assertEqual(self._count_queries(url), queries_count)
+
+
+@override_settings(
+    TASKS_ALWAYS_EAGER=True,
+    MODERATION_CHUNK_SIZE=2,
+    MODERATION_CHUNKS_PER_TASK=1
+)
+class ModerationActionsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.spam = [
+            Post.objects.create(author=cls.spammer, text=f'Спам {number}')
+            for number in range(5)
+        ]
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def _run_action(self, model, action, selected, query='', **data):
+        url = reverse(f'admin:posts_{model}_changelist') + query
+        payload = {
+            'action': action,
+            'index': 0,
+            ACTION_CHECKBOX_NAME: [obj.pk for obj in selected],
+        }
+        response = self.client.post(url, payload)
+        self.assertTemplateUsed(response, 'admin/posts/moderation_form.html')
+        response = self.client.post(url, {**payload, 'apply': 1, **data})
+        self.assertRedirects(response, url)
+        # Задача выполняется сразу (TASKS_ALWAYS_EAGER).
+        job = ModerationJob.objects.get()
+        self.assertEqual(job.status, ModerationJob.DONE)
+        self.assertEqual(job.processed, job.total)
+        return job
+
+    def test_regroup_posts(self):
+        """Выбранные посты переносятся в группу порциями."""
+        job = self._run_action(
+            'post', 'regroup_posts', self.spam, group=self.group.pk
+        )
+        self.assertEqual(job.total, 5)
+        self.assertEqual(self.group.posts.count(), 5)
+        self.assertEqual(
+            self.group.archive_buckets.get().posts_count, 5
+        )
+
+    def test_regroup_all_matching_posts(self):
+        """При выборе всех строк задание хранит фильтр, а не ключи."""
+        job = self._run_action(
+            'post', 'regroup_posts', self.spam[:1],
+            group=self.group.pk, select_across=1
+        )
+        self.assertNotIn('post_ids', job.params)
+        self.assertEqual(job.total, 6)
+        self.assertEqual(self.group.posts.count(), 6)
+
+    def test_regroup_keeps_changelist_filters(self):
+        """Выбор всех строк учитывает поиск и фильтры списка."""
+        Post.objects.create(
+            author=self.spammer, text='Спам-черновик', is_published=False
+        )
+        job = self._run_action(
+            'post', 'regroup_posts', self.spam[:1],
+            query='?' + urlencode({'q': 'Спам', 'is_published__exact': 1}),
+            group=self.group.pk, select_across=1
+        )
+        params = json.loads(job.params)['selection']
+        self.assertEqual(params['filters'], {'is_published__exact': '1'})
+        self.assertEqual(job.total, 5)
+        self.assertEqual(
+            set(self.group.posts.all()), set(self.spam)
+        )
+
+    def test_regroup_refreshes_group_directory(self):
+        """После переноса каталог групп показывает новые счётчики."""
+        self.assertEqual(get_group_stats(), {})
+        self._run_action(
+            'post', 'regroup_posts', self.spam, group=self.group.pk
+        )
+        self.assertEqual(
+            get_group_stats()[self.group.pk]['posts_count'], 5
+        )
+
+    def test_delete_author_posts(self):
+        """Удаляются все посты авторов выбранных постов."""
+        Comment.objects.create(
+            author=self.author, post=self.spam[0], text='Ответ спамеру'
+        )
+        job = self._run_action('post', 'delete_author_posts', self.spam[:1])
+        self.assertEqual(job.total, 5)
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertFalse(Comment.objects.exists())
+        # Счётчики уменьшены пачкой, без сигналов для каждого поста.
+        self.assertEqual(
+            list(self.spammer.archive_buckets.values_list(
+                'posts_count', flat=True
+            )),
+            [0]
+        )
+
+    def test_purge_comments(self):
+        """Комментарии, подходящие под шаблон, удаляются."""
+        comments = [
+            Comment.objects.create(
+                author=self.spammer, post=self.post, text=text
+            )
+            for text in ('Купи СЛОН', 'купи слон!', 'Хороший пост')
+        ]
+        job = self._run_action(
+            'comment', 'purge_comments', comments[:1], pattern='купи слон'
+        )
+        self.assertEqual(job.total, 2)
+        self.assertEqual(list(Comment.objects.all()), [comments[2]])
+
+    def test_purge_archived_comments_and_notifications(self):
+        """Архивные комментарии тоже удаляются, а уведомление автора
+        поста больше не считает удалённые.
+        """
+        comments = [
+            Comment.objects.create(
+                author=self.spammer, post=self.post, text=text
+            )
+            for text in ('Купи слон', 'Купи слон', 'Хороший пост')
+        ]
+        move_comments(comments[:1])
+        job = self._run_action(
+            'comment', 'purge_comments', comments[1:2], pattern='купи слон'
+        )
+        self.assertEqual(job.total, 2)
+        self.assertFalse(ArchivedComment.objects.exists())
+        self.assertEqual(list(Comment.objects.all()), [comments[2]])
+        self.assertEqual(
+            Notification.objects.get(recipient=self.author).count, 1
+        )
+        self.assertEqual(get_unread_count(self.author.pk), 1)
@@ -0,0 +1,246 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.groups import get_group_directory
+from posts.models import (
+    ArchivedComment, ArchivedPost, Comment, Group, Notification, Post,
+    PostArchiveBucket, PostSignature, PostTag, RelatedPost
+)
+from posts.signals import count_post
+
+User = get_user_model()
+
+
+class PostArchivingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+        self.post = Post.objects.create(author=self.user, text='Старый пост')
+        self.comment = Comment.objects.create(
+            author=self.user, post=self.post, text='Комментарий'
+        )
+
+    def _make_old(self, post, days=400):
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=timezone.now() - timedelta(days=days)
+        )
+
+    def test_author_soft_deletes_post(self):
+        """Удалённый автором пост скрыт, а счётчики уменьшены."""
+        response = self.author_client.post(
+            reverse('posts:post_delete', kwargs={'post_id': self.post.pk})
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.post.refresh_from_db()
+        self.assertIsNotNone(self.post.deleted_at)
+        self.assertFalse(Post.objects.published().exists())
+        self.assertFalse(
+            PostArchiveBucket.objects.filter(posts_count__gt=0).exists()
+        )
+        response = self.author_client.get(self.post.get_absolute_url())
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_archive_posts_moves_old_and_deleted_posts(self):
+        """Команда переносит в архив старые и удалённые посты."""
+        self._make_old(self.post)
+        deleted = Post.objects.create(author=self.user, text='Удалённый')
+        deleted.soft_delete()
+        fresh = Post.objects.create(author=self.user, text='Свежий пост')
+        stdout = StringIO()
+        call_command('archive_posts', days=365, batch=1, stdout=stdout)
+        self.assertIn('Перенесено в архив постов: 2', stdout.getvalue())
+        self.assertEqual(list(Post.objects.all()), [fresh])
+        self.assertCountEqual(
+            ArchivedPost.objects.values_list('pk', flat=True),
+            [self.post.pk, deleted.pk]
+        )
+        archived_comment = ArchivedComment.objects.get(pk=self.comment.pk)
+        self.assertEqual(archived_comment.post_id, self.post.pk)
+        self.assertFalse(Comment.objects.exists())
+
+    def test_archived_post_read_through(self):
+        """Архивный пост доступен по старой ссылке и в профиле."""
+        self._make_old(self.post)
+        call_command('archive_posts', days=365, stdout=StringIO())
+        response = self.guest_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['is_archived'])
+        self.assertEqual(response.context['post'].text, self.post.text)
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [self.comment.text]
+        )
+
+    def test_archived_post_deletion_removes_comments(self):
+        """Удаление архивного поста вместе с автором удаляет и чужие
+        комментарии к нему.
+        """
+        author = User.objects.create_user(username='leaving')
+        post = Post.objects.create(author=author, text='Уходящий пост')
+        Comment.objects.create(author=self.user, post=post, text='Ответ')
+        self._make_old(post)
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertTrue(
+            ArchivedComment.objects.filter(post_id=post.pk).exists()
+        )
+        author.delete()
+        self.assertFalse(ArchivedPost.objects.filter(pk=post.pk).exists())
+        self.assertFalse(
+            ArchivedComment.objects.filter(post_id=post.pk).exists()
+        )
+
+    @override_settings(POSTS_ON_PAGE=2)
+    def test_profile_pages_continue_into_archive(self):
+        """Профиль и месячный архив листают архивные посты следом за
+        живыми, а счётчики их учитывают.
+        """
+        self._make_old(self.post)
+        old = [self.post]
+        for number in range(2):
+            post = Post.objects.create(
+                author=self.user, text=f'Старый {number}'
+            )
+            self._make_old(post, days=401 + number)
+            old.append(post)
+        fresh = [
+            Post.objects.create(author=self.user, text=f'Новый {number}')
+            for number in range(3)
+        ]
+        # Даты изменены через update(), поэтому счётчики пересобираются.
+        PostArchiveBucket.objects.all().delete()
+        for post in Post.objects.all():
+            count_post(post.author_id, post.group_id, post.pub_date, 1)
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertEqual(Post.objects.count(), 3)
+        cache.clear()
+        url = reverse('posts:profile', kwargs={'username': self.user})
+        response = self.guest_client.get(url)
+        self.assertEqual(response.context['summary'].posts_count, 6)
+        seen = []
+        for page in range(1, 4):
+            response = self.guest_client.get(url, {'page': page})
+            seen += [post.pk for post in response.context['page_obj']]
+        self.assertEqual(
+            seen, [post.pk for post in fresh[::-1] + old]
+        )
+        month = timezone.localtime(
+            ArchivedPost.objects.get(pk=old[0].pk).pub_date
+        )
+        response = self.guest_client.get(reverse(
+            'posts:profile_archive',
+            args=[self.user.username, month.year, month.month]
+        ))
+        self.assertIn(
+            old[0].pk, [post.pk for post in response.context['page_obj']]
+        )
+
+    def test_archiving_keeps_counters_and_drops_live_only_rows(self):
+        """Перенос не трогает счётчики и удаляет теги, уведомления и
+        связи похожих постов.
+        """
+        reader = User.objects.create_user(username='reader')
+        self.post.text = 'Старый #пост для @reader'
+        self.post.save()
+        self._make_old(self.post)
+        neighbour = Post.objects.create(author=self.user, text='Сосед')
+        PostSignature.objects.create(post=neighbour, signature=b'')
+        RelatedPost.objects.create(
+            post=neighbour, related=self.post, score=0.5
+        )
+        buckets = list(PostArchiveBucket.objects.values_list(
+            'pk', 'posts_count'
+        ))
+        call_command('archive_posts', days=365, stdout=StringIO())
+        self.assertEqual(
+            list(PostArchiveBucket.objects.values_list(
+                'pk', 'posts_count'
+            )),
+            buckets
+        )
+        self.assertFalse(PostTag.objects.exists())
+        self.assertFalse(RelatedPost.objects.exists())
+        self.assertFalse(PostSignature.objects.exists())
+        self.assertFalse(
+            Notification.objects.filter(recipient=reader).exists()
+        )
+
+    def test_group_directory_counts_archived_posts(self):
+        """Каталог групп, как и профиль, считает посты в архиве."""
+        group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        post = Post.objects.create(
+            author=self.user, group=group, text='Пост группы'
+        )
+        self._make_old(post)
+        call_command('archive_posts', days=365, stdout=StringIO())
+        cache.clear()
+        [item] = get_group_directory()
+        self.assertEqual(item['posts_count'], 1)
+        archived = ArchivedPost.objects.get(pk=post.pk)
+        self.assertEqual(item['last_pub_date'], archived.pub_date)
+
+    def test_bucket_created_concurrently(self):
+        """Счётчик месяца, созданный параллельным запросом, увеличивается,
+        а не ломает сохранение поста.
+        """
+        pub_date = timezone.localtime() - timedelta(days=800)
+
+        def atomic_after_other():
+            PostArchiveBucket.objects.create(
+                author=self.user, year=pub_date.year, month=pub_date.month,
+                posts_count=1
+            )
+            return transaction.atomic()
+
+        with mock.patch('posts.signals.transaction') as signals_transaction:
+            signals_transaction.atomic.side_effect = atomic_after_other
+            count_post(self.user.pk, None, pub_date, 1)
+        bucket = PostArchiveBucket.objects.get(
+            author=self.user, year=pub_date.year, month=pub_date.month
+        )
+        self.assertEqual(bucket.posts_count, 2)
+
+    def test_old_comments_of_live_posts_archived(self):
+        """Старые комментарии живого поста переносятся и остаются
+        на его странице.
+        """
+        Comment.objects.filter(pk=self.comment.pk).update(
+            pub_date=timezone.now() - timedelta(days=400)
+        )
+        fresh = Comment.objects.create(
+            author=self.user, post=self.post, text='Новый комментарий'
+        )
+        stdout = StringIO()
+        call_command('archive_posts', days=365, stdout=stdout)
+        self.assertIn('Перенесено в архив комментариев: 1', stdout.getvalue())
+        self.assertEqual(list(Comment.objects.all()), [fresh])
+        response = self.guest_client.get(self.post.get_absolute_url())
+        self.assertEqual(
+            [comment.text for comment in response.context['comments']],
+            [fresh.text, self.comment.text]
+        )
+        self.post.delete()
+        self.assertFalse(ArchivedComment.objects.exists())
@@ -0,0 +1,190 @@
+import asyncio
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.http import HttpResponse
+from django.test import TransactionTestCase, override_settings
+
+from core.asgi import AsyncRouter, WsgiBridge
+from posts.models import Comment, Group, Post
+from yatube.asgi import application
+
+User = get_user_model()
+
+
+class AsyncViewsTests(TransactionTestCase):
+    """Запросы к БД выполняются в пуле потоков, поэтому данные должны
+    быть сохранены в базе, а не в транзакции теста.
+    """
+
+    def setUp(self):
+        cache.clear()
+        caches[settings.RATELIMIT_CACHE_ALIAS].clear()
+        self.author = User.objects.create_user(username='author')
+        self.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Тестовый пост'
+        )
+        Comment.objects.create(
+            post=self.post, author=self.author, text='Комментарий'
+        )
+
+    def get_response(self, path, query=b'', cookie=None, profile=None):
+        headers = [(b'host', b'localhost')]
+        if cookie:
+            headers.append((b'cookie', cookie))
+        if profile:
+            headers.append((b'x-profile', profile))
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': query,
+            'headers': headers,
+        }
+        sent = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        return sent[0]['status'], sent[0]['headers'], sent[1]['body']
+
+    def get(self, path, query=b'', cookie=None, profile=None):
+        status, _, body = self.get_response(path, query, cookie, profile)
+        return status, body.decode()
+
+    def test_pages(self):
+        """Асинхронные views отдают те же страницы, что и обычные."""
+        pages = {
+            '/': 'Тестовый пост',
+            f'/group/{self.group.slug}/': self.group.description,
+            f'/profile/{self.author.username}/': 'Тестовый пост',
+            f'/posts/{self.post.pk}/': 'Комментарий',
+        }
+        for path, text in pages.items():
+            with self.subTest(path=path):
+                with mock.patch.object(WsgiBridge, 'call_wsgi') as call_wsgi:
+                    status, body = self.get(path)
+                call_wsgi.assert_not_called()
+                self.assertEqual(status, HTTPStatus.OK)
+                self.assertIn(text, body)
+
+    def test_index_shares_page_cache(self):
+        """Главная страница берётся из того же кэша, что и обычная."""
+        self.get('/')
+        Post.objects.create(author=self.author, text='Новый пост')
+        self.assertNotIn('Новый пост', self.get('/')[1])
+        cache.clear()
+        self.assertIn('Новый пост', self.get('/')[1])
+
+    def test_index_page_out_of_range(self):
+        """Номер страницы вне диапазона даёт последнюю страницу."""
+        status, body = self.get('/', query=b'page=99')
+        self.assertEqual(status, HTTPStatus.OK)
+        self.assertIn('Тестовый пост', body)
+
+    def test_draft_checked_before_loading_parts(self):
+        """Для черновика комментарии, похожие посты и теги не читаются."""
+        draft = Post.objects.create(
+            author=self.author, text='Черновик', is_published=False
+        )
+        with mock.patch(
+            'posts.async_views.get_post_comments'
+        ) as get_post_comments:
+            status, _ = self.get(f'/posts/{draft.pk}/')
+        self.assertEqual(status, HTTPStatus.NOT_FOUND)
+        get_post_comments.assert_not_called()
+
+    def test_waiting_views_do_not_hold_threads(self):
+        """Ожидающие view не занимают потоки: одновременных запросов
+        может быть больше, чем потоков в пуле.
+        """
+        clients = settings.ASGI_THREADS * 2
+        entered = []
+        everyone_entered = asyncio.Event()
+
+        async def waiting_view(request):
+            entered.append(request)
+            if len(entered) == clients:
+                everyone_entered.set()
+            await everyone_entered.wait()
+            return HttpResponse('ok')
+
+        router = AsyncRouter({'posts:index': waiting_view}, WsgiBridge(None))
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': '/',
+            'query_string': b'', 'headers': [(b'host', b'localhost')],
+        }
+
+        async def request():
+            sent = []
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                sent.append(message)
+
+            await router(scope, receive, send)
+            return sent[0]['status']
+
+        async def run():
+            return await asyncio.wait_for(
+                asyncio.gather(*(request() for _ in range(clients))), 10
+            )
+
+        self.assertEqual(set(asyncio.run(run())), {HTTPStatus.OK})
+
+    def test_middleware(self):
+        """Ответы асинхронных views проходят через middleware."""
+        path = f'/posts/{self.post.pk}/'
+        headers = {
+            name.lower(): value for name, value in self.get_response(path)[1]
+        }
+        self.assertEqual(headers[b'x-frame-options'], b'SAMEORIGIN')
+        self.assertEqual(headers[b'vary'], b'Cookie')
+        limits = {'posts:post_detail': ('1/m', ('GET',))}
+        with override_settings(RATELIMITS=limits, RATELIMIT_ENABLED=True):
+            self.assertEqual(self.get(path)[0], HTTPStatus.OK)
+            self.assertEqual(
+                self.get(path)[0], HTTPStatus.TOO_MANY_REQUESTS
+            )
+
+    def test_not_found(self):
+        """Отсутствующие группа и пост дают 404 асинхронного view."""
+        for path in ('/group/missing/', '/posts/999/'):
+            with self.subTest(path=path):
+                with mock.patch.object(WsgiBridge, 'call_wsgi') as call_wsgi:
+                    status, _ = self.get(path)
+                call_wsgi.assert_not_called()
+                self.assertEqual(status, HTTPStatus.NOT_FOUND)
+
+    def test_fallback_to_wsgi(self):
+        """Запросы с сессией или заголовком X-Profile и страницы без
+        асинхронного view обслуживает WSGI.
+        """
+        requests = (
+            ('/groups/', None, None),
+            (f'/group/{self.group.slug}/', b'sessionid=missing', None),
+            ('/', None, b'signed'),
+        )
+        for path, cookie, profile in requests:
+            with self.subTest(path=path):
+                with mock.patch.object(
+                    WsgiBridge, 'call_wsgi',
+                    autospec=True, side_effect=WsgiBridge.call_wsgi
+                ) as call_wsgi:
+                    status, _ = self.get(path, cookie=cookie, profile=profile)
+                call_wsgi.assert_called_once()
+                self.assertEqual(status, HTTPStatus.OK)
@@ -0,0 +1,251 @@
+import asyncio
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, TransactionTestCase
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Follow, Group, Post
+from posts.scheduling import publish_due_posts
+from posts.streams import check_feed, posts_stream
+
+User = get_user_model()
+
+
+class NewPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.old_post = Post.objects.create(
+            author=cls.author, text='Старый пост'
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+        self.since = str(self.old_post.publish_seq)
+
+    def create_post(self, **kwargs):
+        post = Post.objects.create(
+            author=self.author, text='Новый пост', **kwargs
+        )
+        # pub_date заполняется автоматически, сдвигаем его вперёд.
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=self.old_post.pub_date + timedelta(seconds=post.pk)
+        )
+        return post
+
+    def get_new_posts(self, **params):
+        response = self.client.get(reverse('posts:new_posts'), params)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return response.json()
+
+    def test_without_cursor_returns_latest(self):
+        """Без курсора возвращается курсор самого свежего поста."""
+        result = self.get_new_posts()
+        self.assertEqual(result['count'], 0)
+        self.assertEqual(result['cursor'], self.since)
+
+    def test_new_posts_after_cursor(self):
+        """Возвращаются только опубликованные посты новее курсора."""
+        post = self.create_post()
+        self.create_post(is_published=False)
+        result = self.get_new_posts(since=self.since)
+        self.assertEqual(result['count'], 1)
+        self.assertEqual(result['ids'], [post.pk])
+        post.refresh_from_db()
+        self.assertEqual(result['cursor'], str(post.publish_seq))
+        result = self.get_new_posts(since=result['cursor'])
+        self.assertEqual(result['count'], 0)
+
+    def test_backdated_post_after_cursor(self):
+        """Пост, опубликованный после курсора с более ранней датой,
+        тоже считается новым.
+        """
+        post = self.create_post()
+        Post.objects.filter(pk=post.pk).update(
+            pub_date=self.old_post.pub_date - timedelta(days=1)
+        )
+        result = self.get_new_posts(since=self.since)
+        self.assertEqual(result['ids'], [post.pk])
+
+    def test_scheduled_post_gets_next_number(self):
+        """Отложенный пост получает номер в момент публикации."""
+        draft = self.create_post(
+            is_published=False,
+            publish_at=timezone.now() - timedelta(minutes=1)
+        )
+        newer = self.create_post()
+        self.assertIsNone(Post.objects.get(pk=draft.pk).publish_seq)
+        publish_due_posts(batch_size=10)
+        draft.refresh_from_db()
+        newer.refresh_from_db()
+        self.assertGreater(draft.publish_seq, newer.publish_seq)
+
+    def test_group_and_follow_feeds(self):
+        """Ленты группы и подписок учитывают только свои посты."""
+        in_group = self.create_post(group=self.group)
+        stranger = User.objects.create_user(username='stranger')
+        Post.objects.create(author=stranger, text='Чужой пост')
+        result = self.get_new_posts(
+            feed='group', slug=self.group.slug, since=self.since
+        )
+        self.assertEqual(result['ids'], [in_group.pk])
+        result = self.get_new_posts(feed='follow', since=self.since)
+        self.assertEqual(result['ids'], [in_group.pk])
+
+    @override_settings(NEW_POSTS_LIMIT=2)
+    def test_count_is_limited(self):
+        """Количество ограничено NEW_POSTS_LIMIT, есть флаг more."""
+        for _ in range(3):
+            self.create_post()
+        result = self.get_new_posts(since=self.since)
+        self.assertEqual(result['count'], 2)
+        self.assertTrue(result['more'])
+
+    def test_unknown_feeds(self):
+        """Неизвестная лента, группа и подписки гостя дают 404."""
+        guest = Client()
+        cases = (
+            (self.client, {'feed': 'unknown'}),
+            (self.client, {'feed': 'group', 'slug': 'missing'}),
+            (guest, {'feed': 'follow'}),
+        )
+        for client, params in cases:
+            with self.subTest(params=params):
+                response = client.get(reverse('posts:new_posts'), params)
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_feed_pages_include_cursor(self):
+        """Первая страница ленты передаёт скрипту курсор."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, f'data-since="{self.since}"')
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertContains(response, 'data-feed="follow"')
+
+
+class PostsStreamTests(TransactionTestCase):
+    """Поток запускается в цикле событий, запросы идут в других потоках."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author')
+        self.post = Post.objects.create(author=self.author, text='Пост')
+
+    def run_stream(self, query_string, on_body):
+        """Прочитать поток; on_body решает, пора ли отключиться."""
+        sent = []
+        disconnect = asyncio.Event()
+
+        async def receive():
+            await disconnect.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+            if message['type'] == 'http.response.body':
+                if on_body(message['body'].decode()):
+                    disconnect.set()
+
+        scope = {
+            'type': 'http',
+            'path': '/stream/posts/',
+            'query_string': query_string.encode(),
+            'headers': [],
+        }
+        asyncio.run(
+            asyncio.wait_for(posts_stream(scope, receive, send), 5)
+        )
+        return sent
+
+    @override_settings(SSE_POLL_INTERVAL=0.05)
+    def test_stream_pushes_new_posts(self):
+        """Поток сообщает курсор, затем id новых постов."""
+        events = []
+
+        def on_body(body):
+            events.append(body)
+            if len(events) == 1:
+                new_post = Post.objects.create(
+                    author=self.author, text='Новый пост'
+                )
+                Post.objects.filter(pk=new_post.pk).update(
+                    pub_date=timezone.now() + timedelta(minutes=1)
+                )
+                self.new_post_id = new_post.pk
+            return len(events) == 2
+
+        sent = self.run_stream('feed=index', on_body)
+        self.assertEqual(sent[0]['status'], HTTPStatus.OK)
+        first = json.loads(events[0].split('data: ')[1])
+        self.assertEqual(first['count'], 0)
+        self.post.refresh_from_db()
+        self.assertEqual(first['cursor'], str(self.post.publish_seq))
+        self.assertIn('event: posts', events[1])
+        second = json.loads(events[1].split('data: ')[1])
+        self.assertEqual(second['ids'], [self.new_post_id])
+
+    def test_first_event_reports_posts_after_cursor(self):
+        """Посты, опубликованные между отрисовкой страницы и открытием
+        потока, приходят в первом событии.
+        """
+        self.post.refresh_from_db()
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        events = []
+
+        def on_body(body):
+            events.append(body)
+            return True
+
+        self.run_stream(f'feed=index&since={self.post.publish_seq}', on_body)
+        first = json.loads(events[0].split('data: ')[1])
+        self.assertEqual(first['count'], 1)
+        self.assertEqual(first['ids'], [new_post.pk])
+
+    @override_settings(SSE_POLL_INTERVAL=0.01, SSE_HEARTBEAT_INTERVAL=0)
+    def test_stream_sends_heartbeat(self):
+        """Без новых постов поток отправляет комментарий-пинг."""
+        events = []
+
+        def on_body(body):
+            events.append(body)
+            return len(events) == 2
+
+        self.run_stream('feed=index', on_body)
+        self.assertEqual(events[1], ': ping\n\n')
+
+    @override_settings(SSE_POLL_INTERVAL=0.01, SSE_HEARTBEAT_INTERVAL=0.1)
+    def test_stream_checks_feed_only_after_publication(self):
+        """Без новых публикаций лента клиента не запрашивается."""
+        events = []
+
+        def on_body(body):
+            events.append(body)
+            return len(events) == 2
+
+        with mock.patch(
+            'posts.streams.check_feed', side_effect=check_feed
+        ) as checked:
+            self.run_stream('feed=index', on_body)
+        self.assertEqual(events[1], ': ping\n\n')
+        self.assertEqual(checked.call_count, 1)
+
+    def test_stream_unknown_group(self):
+        """Поток несуществующей группы отвечает 404."""
+        sent = self.run_stream('feed=group&slug=missing', lambda body: True)
+        self.assertEqual(sent[0]['status'], HTTPStatus.NOT_FOUND)
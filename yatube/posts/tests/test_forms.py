@@ -1,19 +1,35 @@
 import shutil
 import tempfile
+from datetime import timedelta
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
+from django.utils import timezone
 
+from core.tasks import get_queue
 from posts.models import Group, Post
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT,
+    TASKS_QUEUE_PATH=f'{TEMP_MEDIA_ROOT}/tasks.sqlite3'
+)
 class PostFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -24,14 +40,7 @@ class PostFormTests(TestCase):
             slug='test-slug',
             description='Тестовое описание',
         )
-        cls.small_gif = (
-            b'\x47\x49\x46\x38\x39\x61\x02\x00'
-            b'\x01\x00\x80\x00\x00\x00\x00\x00'
-            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
-            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
-            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
-            b'\x0A\x00\x3B'
-        )
+        cls.small_gif = SMALL_GIF
 
     @classmethod
     def tearDownClass(cls):
@@ -77,6 +86,40 @@ class PostFormTests(TestCase):
             ).exists()
         )
 
+    def test_post_schedule(self):
+        """Форма отложенной записи сохраняет неопубликованный пост."""
+        publish_at = timezone.localtime() + timedelta(days=1)
+        response = self.authorized_client.post(
+            reverse('posts:post_schedule'),
+            data={
+                'text': 'Отложенный пост',
+                'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+            }
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:profile', kwargs={'username': self.user.username})
+        )
+        post = Post.objects.get(text='Отложенный пост')
+        self.assertFalse(post.is_published)
+        self.assertEqual(
+            post.publish_at, publish_at.replace(second=0, microsecond=0)
+        )
+
+    def test_post_schedule_current_minute_publishes_immediately(self):
+        """Запись на текущую минуту публикуется сразу."""
+        publish_at = timezone.localtime()
+        self.authorized_client.post(
+            reverse('posts:post_schedule'),
+            data={
+                'text': 'Запоздалый пост',
+                'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+            }
+        )
+        post = Post.objects.get(text='Запоздалый пост')
+        self.assertTrue(post.is_published)
+        self.assertGreaterEqual(post.pub_date, post.publish_at)
+
     def test_post_edit(self):
         """Валидная форма изменяет запись в Post."""
         post = Post.objects.create(
@@ -125,6 +168,37 @@ class PostFormTests(TestCase):
         )
 
 
+class PostTasksTests(TransactionTestCase):
+    """Фоновые задачи, которые ставят в очередь представления."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_post_create_queues_thumbnail(self):
+        """Создание поста с картинкой ставит в очередь миниатюру."""
+        queue = get_queue()
+        queue.claim(100)
+        client = Client()
+        client.force_login(User.objects.create_user(username='noname'))
+        uploaded = SimpleUploadedFile(
+            name='pic_3.gif',
+            content=SMALL_GIF,
+            content_type='image/gif'
+        )
+        client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с картинкой', 'image': uploaded}
+        )
+        post = Post.objects.get(text='Пост с картинкой')
+        [(_, name, payload)] = queue.claim(100)
+        self.assertEqual(name, 'posts.tasks.warm_post_thumbnail')
+        self.assertEqual(payload['args'], [post.pk])
+
+
 class CommentFormTests(TestCase):
     @classmethod
     def setUpClass(cls):
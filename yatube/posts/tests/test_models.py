@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
 
-from posts.models import Comment, Follow, Group, Post
+from posts.models import Comment, Follow, Group, Post, PostArchiveBucket
 
 User = get_user_model()
 
@@ -29,6 +30,8 @@ class PostModelTest(TestCase):
             'pub_date': 'Дата создания',
             'author': 'Автор',
             'group': 'Группа',
+            'is_published': 'Опубликован',
+            'publish_at': 'Время публикации',
         }
         for field, expected_value in field_verboses.items():
             with self.subTest(field=field):
@@ -41,6 +44,7 @@ class PostModelTest(TestCase):
         field_help = {
             'text': 'Текст нового поста',
             'group': 'Группа, к которой будет относиться пост',
+            'publish_at': 'Оставьте пустым, чтобы сохранить черновик',
         }
         for field, expected_value in field_help.items():
             with self.subTest(field=field):
@@ -141,3 +145,51 @@ class FollowModelTest(TestCase):
                     follow._meta.get_field(field).verbose_name,
                     expected_value
                 )
+
+
+class PostArchiveBucketTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+        cls.other_group = Group.objects.create(
+            title='Другая группа',
+            slug='other-slug',
+            description='Тестовое описание',
+        )
+
+    def _get_count(self, **scope):
+        """Получить счётчик постов за текущий месяц."""
+        now = timezone.localtime()
+        bucket = PostArchiveBucket.objects.filter(
+            year=now.year, month=now.month, **scope
+        ).first()
+        return bucket.posts_count if bucket else 0
+
+    def test_bucket_counts_created_and_deleted_posts(self):
+        """Счётчики обновляются при создании и удалении поста."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Пост без группы')
+        self.assertEqual(self._get_count(author=self.user), 2)
+        self.assertEqual(self._get_count(group=self.group), 1)
+        post.delete()
+        self.assertEqual(self._get_count(author=self.user), 1)
+        self.assertEqual(self._get_count(group=self.group), 0)
+
+    def test_bucket_follows_group_change(self):
+        """Смена группы поста переносит его между счётчиками групп."""
+        post = Post.objects.create(
+            author=self.user, text='Тестовый пост', group=self.group
+        )
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self._get_count(group=self.group), 0)
+        self.assertEqual(self._get_count(group=self.other_group), 1)
+        self.assertEqual(self._get_count(author=self.user), 1)
@@ -0,0 +1,125 @@
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Notification, Post
+from posts.notifications import get_unread_count, send_digests
+
+User = get_user_model()
+
+
+class NotificationTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(
+            username='author', email='author@example.com'
+        )
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.readers = [
+            User.objects.create_user(username=f'reader{number}')
+            for number in range(3)
+        ]
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def comment(self, user):
+        Comment.objects.create(post=self.post, author=user, text='Текст')
+
+    def test_comments_are_coalesced(self):
+        """Комментарии к посту складываются в одно уведомление."""
+        for reader in self.readers:
+            self.comment(reader)
+        self.comment(self.author)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.count, 3)
+        self.assertEqual(notification.actor, self.readers[-1])
+        self.assertEqual(get_unread_count(self.author.pk), 3)
+
+    def test_follow_notification(self):
+        """Подписка через view уведомляет автора."""
+        client = Client()
+        client.force_login(self.readers[0])
+        client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.kind, Notification.FOLLOW)
+        self.assertEqual(notification.actor, self.readers[0])
+
+    def test_page_marks_read(self):
+        """Страница уведомлений отмечает их прочитанными, новое событие
+        после этого создаёт новую строку.
+        """
+        self.comment(self.readers[0])
+        self.assertEqual(get_unread_count(self.author.pk), 1)
+        response = self.author_client.get(reverse('posts:notifications'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'прокомментировал')
+        self.assertEqual(get_unread_count(self.author.pk), 0)
+        self.comment(self.readers[1])
+        self.assertEqual(
+            Notification.objects.filter(recipient=self.author).count(), 2
+        )
+        self.assertEqual(get_unread_count(self.author.pk), 1)
+
+    def test_follows_are_coalesced(self):
+        """Уведомления без поста тоже складываются в одну строку."""
+        for reader in self.readers:
+            Follow.objects.create(user=reader, author=self.author)
+        notification = Notification.objects.get(recipient=self.author)
+        self.assertEqual(notification.count, len(self.readers))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                recipient=self.author, kind=Notification.FOLLOW
+            )
+
+    @override_settings(POSTS_ON_PAGE=1)
+    def test_page_marks_only_shown_read(self):
+        """Прочитанными становятся только уведомления открытой страницы."""
+        self.comment(self.readers[0])
+        Follow.objects.create(user=self.readers[1], author=self.author)
+        self.author_client.get(reverse('posts:notifications'))
+        self.assertFalse(
+            Notification.objects.get(kind=Notification.COMMENT).is_read
+        )
+        self.assertTrue(
+            Notification.objects.get(kind=Notification.FOLLOW).is_read
+        )
+        self.assertEqual(get_unread_count(self.author.pk), 1)
+
+    def test_unread_count_in_header(self):
+        """Число непрочитанных событий выводится в шапке."""
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        response = self.author_client.get(reverse('posts:index'))
+        self.assertEqual(response.context['unread_notifications'], 1)
+
+    def test_digest(self):
+        """Сводка отправляется один раз и повторно только после новых
+        событий.
+        """
+        self.comment(self.readers[0])
+        self.comment(self.readers[1])
+        Follow.objects.create(user=self.readers[0], author=self.author)
+        Follow.objects.create(user=self.author, author=self.readers[0])
+        self.assertEqual(send_digests(batch_size=1), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [self.author.email])
+        self.assertIn('Новых комментариев', mail.outbox[0].body)
+        self.assertIn('подписался', mail.outbox[0].body)
+        self.assertEqual(send_digests(batch_size=1), 0)
+        self.comment(self.readers[2])
+        out = StringIO()
+        call_command('send_digests', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertEqual(len(mail.outbox), 2)
@@ -0,0 +1,130 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post
+from posts.ranking import (
+    Candidates, affinity, get_ranked_page, rank_feed, recency
+)
+
+User = get_user_model()
+
+
+def make_candidates(**arrays):
+    size = len(next(iter(arrays.values())))
+    fields = dict(
+        post_ids=np.arange(size),
+        author_ids=np.ones(size, dtype=np.int64),
+        ages=np.zeros(size),
+        comments=np.zeros(size),
+    )
+    fields.update(arrays)
+    return Candidates(**fields)
+
+
+class ScorerTests(TestCase):
+    def test_recency_halves(self):
+        """Оценка свежести уменьшается вдвое за период полураспада."""
+        with self.settings(FEED_RECENCY_HALF_LIFE=100):
+            scores = recency(
+                make_candidates(ages=np.array([0.0, 100.0, 200.0])), None
+            )
+        np.testing.assert_allclose(scores, [1, 0.5, 0.25])
+
+    def test_affinity_by_comment_history(self):
+        """Близость выше к авторам, которых пользователь комментирует."""
+        reader = User.objects.create_user(username='reader')
+        authors = [
+            User.objects.create_user(username=f'author{number}')
+            for number in range(3)
+        ]
+        for author, comments in zip(authors, (3, 1, 0)):
+            post = Post.objects.create(author=author, text='Пост')
+            for _ in range(comments):
+                Comment.objects.create(post=post, author=reader, text='!')
+        candidates = make_candidates(
+            author_ids=np.array([author.pk for author in authors])
+        )
+        scores = affinity(candidates, reader.pk)
+        self.assertEqual(scores[0], 1)
+        self.assertTrue(0 < scores[1] < 1)
+        self.assertEqual(scores[2], 0)
+
+
+@override_settings(
+    FEED_SCORERS=(
+        ('posts.ranking.recency', 1.0),
+        ('posts.ranking.discussion', 1.0),
+    ),
+    FEED_RECENCY_HALF_LIFE=60 * 60,
+)
+class RankedFeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        now = timezone.now()
+        cls.posts = []
+        for hours in range(5):
+            post = Post.objects.create(author=cls.author, text='Пост')
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=now - timedelta(hours=hours)
+            )
+            cls.posts.append(post)
+        Post.objects.create(author=cls.stranger, text='Чужой пост')
+        # Старый, но обсуждаемый пост поднимается в ленте.
+        for _ in range(20):
+            Comment.objects.create(
+                post=cls.posts[4], author=cls.stranger, text='!'
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_rank_feed(self):
+        """В ленте только посты подписок, обсуждаемый пост первый."""
+        ranked = rank_feed(self.reader.pk)
+        self.assertEqual(
+            ranked,
+            [self.posts[4].pk] + [post.pk for post in self.posts[:4]]
+        )
+
+    def test_cursor_pages_keep_order(self):
+        """Курсор листает сохранённый порядок без повторов."""
+        first, cursor = get_ranked_page(self.reader.pk, per_page=3)
+        Comment.objects.create(
+            post=self.posts[3], author=self.stranger, text='!'
+        )
+        cache.delete(f'posts.ranked_feed.{self.reader.pk}')
+        second, cursor = get_ranked_page(self.reader.pk, cursor, per_page=3)
+        self.assertIsNone(cursor)
+        self.assertCountEqual(
+            [post.pk for post in first + second],
+            [post.pk for post in self.posts]
+        )
+
+    def test_expired_cursor_restarts(self):
+        """Курсор без сохранённого порядка открывает начало ленты."""
+        posts, _ = get_ranked_page(self.reader.pk, 'missing:3', per_page=2)
+        self.assertEqual(posts[0], self.posts[4])
+
+    def test_follow_index_ranked_mode(self):
+        """Режим mode=ranked выводит ленту по оценке."""
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(
+            reverse('posts:follow_index'), {'mode': 'ranked'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertTrue(response.context['ranked'])
+        self.assertEqual(response.context['page_obj'][0], self.posts[4])
+        self.assertIsNone(response.context['next_cursor'])
@@ -0,0 +1,91 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post, PostSignature, RelatedPost
+from posts.related import get_related_posts, refresh_related
+
+User = get_user_model()
+
+WEATHER = (
+    'Сегодня в городе тёплая солнечная погода, синоптики обещают '
+    'ясное небо и лёгкий ветер до самого вечера'
+)
+
+
+class RelatedPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+
+    def create_post(self, text, **kwargs):
+        return Post.objects.create(author=self.author, text=text, **kwargs)
+
+    def setUp(self):
+        self.weather = self.create_post(WEATHER)
+        self.similar = self.create_post(WEATHER + ', а ночью прохладно')
+        self.other = self.create_post(
+            'Рецепт пирога с яблоками: мука, сахар, яйца и корица'
+        )
+
+    def test_refresh_related(self):
+        """Похожие посты находятся друг для друга, непохожие — нет."""
+        self.assertEqual(refresh_related(), 3)
+        self.assertEqual(get_related_posts(self.weather.pk), [self.similar])
+        self.assertEqual(get_related_posts(self.similar.pk), [self.weather])
+        self.assertEqual(get_related_posts(self.other.pk), [])
+        self.assertEqual(refresh_related(), 0)
+
+    def test_incremental_update(self):
+        """Новый пост попадает в списки уже обработанных соседей."""
+        refresh_related()
+        newest = self.create_post(WEATHER + ' и завтра')
+        draft = self.create_post(WEATHER, is_published=False)
+        self.assertEqual(refresh_related(), 3)
+        self.assertIn(newest, get_related_posts(self.weather.pk))
+        self.assertFalse(PostSignature.objects.filter(post=draft).exists())
+
+    def test_text_change_resets_signature(self):
+        """Изменение текста удаляет подпись поста."""
+        refresh_related()
+        self.similar.text = 'Совсем другой текст'
+        self.similar.save()
+        self.assertFalse(
+            PostSignature.objects.filter(post=self.similar).exists()
+        )
+        out = StringIO()
+        call_command('refresh_related', stdout=out)
+        self.assertNotIn(self.similar, get_related_posts(self.weather.pk))
+
+    def test_posts_without_words_are_not_related(self):
+        """Посты без слов не считаются похожими друг на друга."""
+        first = self.create_post('!!!')
+        second = self.create_post('+1')
+        refresh_related()
+        self.assertEqual(get_related_posts(first.pk), [])
+        self.assertEqual(get_related_posts(second.pk), [])
+
+    def test_save_without_text_change_keeps_signature(self):
+        """Сохранение поста без правки текста не сбрасывает подпись."""
+        refresh_related()
+        self.similar.group = None
+        self.similar.save()
+        self.assertTrue(
+            PostSignature.objects.filter(post=self.similar).exists()
+        )
+
+    def test_post_detail_block(self):
+        """Страница поста выводит похожие посты одним запросом."""
+        refresh_related(rebuild=True)
+        self.assertEqual(RelatedPost.objects.count(), 2)
+        with self.assertNumQueries(1):
+            get_related_posts(self.weather.pk)
+        response = Client().get(
+            reverse('posts:post_detail', args=[self.weather.pk])
+        )
+        self.assertEqual(response.context['related_posts'], [self.similar])
+        self.assertContains(response, 'Похожие записи')
@@ -0,0 +1,159 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Group, Post, PostArchiveBucket
+from posts.profiles import get_profile_summary
+from posts.forms import PAST_PUBLISH_AT_ERROR
+from posts.scheduling import get_next_publish_at, publish_due_posts
+
+User = get_user_model()
+
+
+class ScheduledPostTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.user)
+
+    def _schedule(self, delta, text='Отложенный пост'):
+        return Post.objects.create(
+            author=self.user,
+            group=self.group,
+            text=text,
+            is_published=False,
+            publish_at=timezone.now() + delta,
+        )
+
+    def test_unpublished_posts_are_hidden(self):
+        """Отложенный пост не виден в лентах и чужим пользователям."""
+        post = self._schedule(timedelta(days=1))
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+        ):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                self.assertNotIn(post, response.context['page_obj'])
+        url = reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        self.assertEqual(
+            self.guest_client.get(url).status_code, HTTPStatus.NOT_FOUND
+        )
+        response = self.author_client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.author_client.get(
+            reverse('posts:profile', kwargs={'username': self.user})
+        )
+        self.assertIn(post, response.context['drafts'])
+
+    def test_publish_due_posts(self):
+        """Наступившие посты публикуются пачками, будущие остаются."""
+        due = [self._schedule(timedelta(minutes=-n)) for n in range(1, 4)]
+        future = self._schedule(timedelta(days=1))
+        self.assertFalse(PostArchiveBucket.objects.exists())
+        summary = get_profile_summary(self.user.username)
+        self.assertEqual(summary.posts_count, 0)
+        started = timezone.now()
+        published = publish_due_posts(batch_size=2)
+        self.assertCountEqual(published, [post.pk for post in due])
+        for post in due:
+            post.refresh_from_db()
+            self.assertTrue(post.is_published)
+            # Опоздавший пост встаёт в ленту на момент публикации.
+            self.assertGreaterEqual(post.pub_date, started)
+        future.refresh_from_db()
+        self.assertFalse(future.is_published)
+        self.assertEqual(
+            sum(PostArchiveBucket.objects.filter(author=self.user)
+                .values_list('posts_count', flat=True)),
+            3
+        )
+        summary = get_profile_summary(self.user.username)
+        self.assertEqual(summary.posts_count, 3)
+
+    def test_publish_refreshes_cached_pages(self):
+        """Публикация сбрасывает кэш главной и счётчики каталога групп."""
+        post = self._schedule(timedelta(minutes=1))
+        self.assertNotIn(post.text.encode(), self.guest_client.get(
+            reverse('posts:index')
+        ).content)
+        directory = self.guest_client.get(reverse('posts:group_index'))
+        self.assertEqual(directory.context['groups'][0]['posts_count'], 0)
+        publish_due_posts(batch_size=10, now=post.publish_at)
+        self.assertIn(post.text.encode(), self.guest_client.get(
+            reverse('posts:index')
+        ).content)
+        directory = self.guest_client.get(reverse('posts:group_index'))
+        self.assertEqual(directory.context['groups'][0]['posts_count'], 1)
+
+    def test_publish_seq_assigned_in_one_update(self):
+        """Номера публикации пачки выдаются одним UPDATE по порядку id."""
+        published = Post.objects.create(author=self.user, text='Пост')
+        due = [self._schedule(timedelta(minutes=-n)) for n in range(1, 4)]
+        with CaptureQueriesContext(connection) as queries:
+            publish_due_posts(batch_size=10)
+        updates = [
+            query for query in queries
+            if query['sql'].startswith('UPDATE')
+            and '"publish_seq"' in query['sql'].split('WHERE')[0]
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            list(
+                Post.objects.filter(pk__in=[post.pk for post in due])
+                .order_by('pk').values_list('publish_seq', flat=True)
+            ),
+            [published.publish_seq + n for n in range(1, 4)]
+        )
+
+    def test_publish_scheduled_command(self):
+        """Команда publish_scheduled публикует наступившие посты."""
+        post = self._schedule(timedelta(seconds=-1))
+        stdout = StringIO()
+        call_command('publish_scheduled', once=True, stdout=stdout)
+        post.refresh_from_db()
+        self.assertTrue(post.is_published)
+        self.assertIn('Опубликовано постов: 1', stdout.getvalue())
+
+    def test_next_publish_at(self):
+        """Планировщик просыпается к ближайшей публикации."""
+        self.assertIsNone(get_next_publish_at())
+        self._schedule(timedelta(hours=2))
+        sooner = self._schedule(timedelta(hours=1))
+        self.assertEqual(get_next_publish_at(), sooner.publish_at.timestamp())
+
+    def test_past_publish_at_rejected(self):
+        """Время публикации в прошлом не принимается формой."""
+        publish_at = timezone.localtime() - timedelta(hours=1)
+        response = self.author_client.post(
+            reverse('posts:post_schedule'),
+            data={
+                'text': 'Опоздавший пост',
+                'publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+            }
+        )
+        self.assertFormError(
+            response, 'form', 'publish_at', PAST_PUBLISH_AT_ERROR
+        )
+        self.assertFalse(Post.objects.exists())
@@ -0,0 +1,164 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Follow, FollowSuggestion, StaleSuggestions
+from posts.suggestions import FollowGraph, refresh_suggestions, top_suggestions
+
+User = get_user_model()
+
+
+class SuggestionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.alice, cls.bob, cls.carol, cls.dave, cls.erin = [
+            User.objects.create_user(username=name)
+            for name in ('alice', 'bob', 'carol', 'dave', 'erin')
+        ]
+
+    def follow(self, user, *authors):
+        for author in authors:
+            Follow.objects.create(user=user, author=author)
+
+    def test_friends_and_cofollow(self):
+        """Друзья друзей и авторы похожих читателей попадают
+        в рекомендации, уже отслеживаемые — нет.
+        """
+        self.follow(self.alice, self.bob)
+        self.follow(self.bob, self.carol, self.alice)
+        self.follow(self.dave, self.bob, self.erin)
+        suggestions = dict(top_suggestions(
+            FollowGraph.load(), [self.alice.pk], limit=10
+        )[self.alice.pk])
+        self.assertEqual(set(suggestions), {self.carol.pk, self.erin.pk})
+        self.assertGreater(suggestions[self.carol.pk], 0)
+        # Carol — автор Bob, а Erin читает только похожий читатель Dave.
+        self.assertGreater(
+            suggestions[self.carol.pk], suggestions[self.erin.pk]
+        )
+
+    def test_top_k(self):
+        """Остаётся не больше limit лучших рекомендаций."""
+        self.follow(self.alice, self.bob)
+        self.follow(self.bob, self.carol, self.dave, self.erin)
+        suggestions = top_suggestions(
+            FollowGraph.load(), [self.alice.pk], limit=2
+        )
+        self.assertEqual(len(suggestions[self.alice.pk]), 2)
+
+    def test_partial_graph(self):
+        """Часть графа для пользователя даёт те же оценки, что и весь."""
+        self.follow(self.alice, self.bob)
+        self.follow(self.bob, self.carol, self.alice)
+        self.follow(self.dave, self.bob, self.erin)
+        self.follow(self.erin, self.dave)
+        graph = FollowGraph.load([self.alice.pk])
+        self.assertNotIn(self.erin.pk, graph.user_ids[
+            graph.matrix.getnnz(axis=1) > 0
+        ])
+        self.assertEqual(
+            top_suggestions(graph, [self.alice.pk], limit=10),
+            top_suggestions(FollowGraph.load(), [self.alice.pk], limit=10)
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_follow_marks_affected_readers(self):
+        """Подписка отмечает подписчиков читателя и других читателей
+        автора.
+        """
+        self.follow(self.bob, self.carol)
+        self.follow(self.erin, self.alice)
+        self.follow(self.dave, self.bob)
+        StaleSuggestions.objects.all().delete()
+        self.follow(self.alice, self.carol)
+        self.assertEqual(
+            set(StaleSuggestions.objects.values_list('user_id', flat=True)),
+            {self.alice.pk, self.erin.pk, self.bob.pk}
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_follow_marks_cofollowers_of_other_authors(self):
+        """Подписка отмечает читателей всех авторов подписчика: их
+        близость с ним нормирована на число его подписок.
+        """
+        self.follow(self.alice, self.bob)
+        self.follow(self.dave, self.bob, self.erin)
+        StaleSuggestions.objects.all().delete()
+        self.follow(self.alice, self.carol)
+        self.assertIn(
+            self.dave.pk,
+            StaleSuggestions.objects.values_list('user_id', flat=True)
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_incremental_refresh_matches_full(self):
+        """Пересчёт отмеченных даёт те же рекомендации, что и полный."""
+        self.follow(self.alice, self.bob)
+        self.follow(self.bob, self.alice)
+        self.follow(self.dave, self.bob, self.erin)
+        self.follow(self.erin, self.dave)
+        refresh_suggestions()
+        self.follow(self.alice, self.carol)
+        refresh_suggestions()
+
+        def stored():
+            return {
+                (user_id, suggested_id): round(score, 6)
+                for user_id, suggested_id, score
+                in FollowSuggestion.objects.values_list(
+                    'user_id', 'suggested_id', 'score'
+                )
+            }
+
+        incremental = stored()
+        refresh_suggestions(User.objects.values_list('pk', flat=True))
+        self.assertEqual(incremental, stored())
+
+    def test_incremental_refresh(self):
+        """Пересчитываются только пользователи с изменёнными подписками."""
+        self.follow(self.alice, self.bob)
+        self.follow(self.bob, self.carol)
+        self.assertEqual(
+            set(StaleSuggestions.objects.values_list('user_id', flat=True)),
+            {self.alice.pk, self.bob.pk}
+        )
+        self.assertEqual(refresh_suggestions(), 2)
+        self.assertFalse(StaleSuggestions.objects.exists())
+        self.assertEqual(
+            list(FollowSuggestion.objects.filter(user=self.alice)
+                 .values_list('suggested_id', flat=True)),
+            [self.carol.pk]
+        )
+        self.assertEqual(refresh_suggestions(), 0)
+        Follow.objects.filter(user=self.alice).delete()
+        out = StringIO()
+        call_command('refresh_suggestions', stdout=out)
+        self.assertIn('1', out.getvalue())
+        self.assertFalse(FollowSuggestion.objects.filter(user=self.alice))
+
+    def test_rendered_on_follow_index_and_profile(self):
+        """Рекомендации выводятся из сохранённых данных без подписок."""
+        self.follow(self.alice, self.bob)
+        FollowSuggestion.objects.create(
+            user=self.alice, suggested=self.carol, score=1
+        )
+        FollowSuggestion.objects.create(
+            user=self.alice, suggested=self.bob, score=0.5
+        )
+        client = Client()
+        client.force_login(self.alice)
+        pages = (
+            reverse('posts:follow_index'),
+            reverse('posts:profile', args=[self.dave.username]),
+        )
+        for url in pages:
+            with self.subTest(url=url):
+                response = client.get(url)
+                self.assertEqual(
+                    response.context['suggestions'], [self.carol]
+                )
+                self.assertContains(response, 'Кого почитать')
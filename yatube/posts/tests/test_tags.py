@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.models import Notification, Post, PostTag, Tag
+from posts.scheduling import publish_due_posts
+from posts.tags import get_tag_page, parse_mentions, parse_tags
+
+User = get_user_model()
+
+
+class ParseTests(TestCase):
+    def test_parse_tags(self):
+        """Теги выделяются без повторов и в нижнем регистре."""
+        self.assertEqual(
+            parse_tags('#Котики и #собаки, снова #котики! a#b &#39; '
+                       'https://example.com/#anchor'),
+            ['котики', 'собаки']
+        )
+
+    def test_parse_mentions(self):
+        """Упоминания не путаются с адресами почты."""
+        self.assertEqual(
+            parse_mentions('Привет, @leo. Пиши на leo@mail.ru, @a.b-c'),
+            {'leo', 'a.b-c'}
+        )
+
+
+class TagTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def create_post(self, text, **kwargs):
+        return Post.objects.create(author=self.author, text=text, **kwargs)
+
+    def tag_names(self, post):
+        return set(
+            PostTag.objects.filter(post=post)
+            .values_list('tag__name', flat=True)
+        )
+
+    def test_tags_follow_text_and_status(self):
+        """Теги обновляются при правке и снимаются с неопубликованных."""
+        post = self.create_post('Про #Котики и #собаки')
+        self.assertEqual(self.tag_names(post), {'котики', 'собаки'})
+        post.text = 'Только #котики и #птицы'
+        post.save()
+        self.assertEqual(self.tag_names(post), {'котики', 'птицы'})
+        self.assertEqual(Tag.objects.count(), 3)
+        post.soft_delete()
+        self.assertFalse(PostTag.objects.exists())
+        draft = self.create_post('Черновик с #котики', is_published=False)
+        self.assertEqual(self.tag_names(draft), set())
+
+    def test_scheduled_post_tagged_on_publish(self):
+        """Отложенный пост получает теги и упоминания при публикации."""
+        publish_at = timezone.now() - timedelta(minutes=1)
+        post = self.create_post(
+            'Скоро #новость для @reader',
+            is_published=False,
+            publish_at=publish_at,
+        )
+        publish_due_posts(10)
+        self.assertEqual(self.tag_names(post), {'новость'})
+        post.refresh_from_db()
+        self.assertEqual(
+            PostTag.objects.get(post=post).pub_date, post.pub_date
+        )
+        self.assertTrue(Notification.objects.filter(
+            recipient=self.reader, kind=Notification.MENTION, post=post
+        ).exists())
+
+    def test_mentions_notified_once(self):
+        """Упомянутый пользователь получает одно уведомление о посте."""
+        post = self.create_post('Привет, @reader и @author и @nobody')
+        post.text += ' ещё раз'
+        post.save()
+        notification = Notification.objects.get(kind=Notification.MENTION)
+        self.assertEqual(notification.recipient, self.reader)
+        self.assertEqual(notification.count, 1)
+        self.assertEqual(
+            notification.message(),
+            'author упомянул вас в посте «Привет, @reader и @author и @n»'
+        )
+        self.create_post('Без упоминаний', is_published=False)
+        self.assertEqual(
+            Notification.objects.filter(kind=Notification.MENTION).count(),
+            1
+        )
+
+    def test_keyset_pages(self):
+        """Страницы тега идут по курсору без повторов и пропусков."""
+        posts = [self.create_post(f'Пост {number} #лента') for number in
+                 range(5)]
+        # Одинаковая дата у двух постов разделяется по id.
+        Post.objects.filter(pk=posts[1].pk).update(pub_date=posts[2].pub_date)
+        PostTag.objects.filter(post=posts[1]).update(
+            pub_date=posts[2].pub_date
+        )
+        tag = Tag.objects.get(name='лента')
+        seen = []
+        cursor = None
+        while True:
+            page, cursor = get_tag_page(tag, cursor, per_page=2)
+            seen += page
+            if cursor is None:
+                break
+        self.assertEqual(seen, posts[::-1])
+        self.assertEqual(get_tag_page(tag, 'мусор', per_page=2)[0],
+                         posts[:2:-1])
+
+    @override_settings(POSTS_ON_PAGE=2)
+    def test_tag_page(self):
+        """Страница тега выводит посты и ссылку на следующую страницу."""
+        for number in range(3):
+            self.create_post(f'Пост {number} #Лента')
+        post = Post.objects.first()
+        client = Client()
+        response = client.get(reverse('posts:tag_posts', args=['Лента']))
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertIsNotNone(response.context['next_cursor'])
+        response = client.get(
+            reverse('posts:tag_posts', args=['лента']),
+            {'cursor': response.context['next_cursor']}
+        )
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertIsNone(response.context['next_cursor'])
+        response = client.get(
+            reverse('posts:post_detail', args=[post.pk])
+        )
+        self.assertContains(
+            response, reverse('posts:tag_posts', args=['лента'])
+        )
+        response = client.get(reverse('posts:tag_posts', args=['нет']))
+        self.assertEqual(response.status_code, 404)
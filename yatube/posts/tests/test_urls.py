@@ -39,9 +39,12 @@ class PostURLTests(TestCase):
         """URL-адрес доступен любому пользователю."""
         urls = [
             '/',
+            '/groups/',
             f'/group/{self.group.slug}/',
             f'/profile/{self.user.username}/',
             f'/posts/{self.post.pk}/',
+            f'/group/{self.group.slug}/2023/1/',
+            f'/profile/{self.user.username}/2023/1/',
         ]
         for url in urls:
             with self.subTest(url=url):
@@ -90,17 +93,30 @@ class PostURLTests(TestCase):
         urls_templates = {
             '/': 'posts/index.html',
             '/follow/': 'posts/follow.html',
+            '/groups/': 'posts/group_index.html',
             f'/group/{self.group.slug}/': 'posts/group_list.html',
             f'/profile/{self.user.username}/': 'posts/profile.html',
             f'/posts/{self.post.pk}/': 'posts/post_detail.html',
             '/create/': 'posts/create_post.html',
             f'/posts/{self.post.pk}/edit/': 'posts/create_post.html',
+            f'/group/{self.group.slug}/2023/1/': 'posts/archive.html',
+            f'/profile/{self.user.username}/2023/1/': 'posts/archive.html',
         }
         for url, template in urls_templates.items():
             with self.subTest(url=url):
                 response = self.authorized_client.get(url)
                 self.assertTemplateUsed(response, template)
 
+    def test_archive_with_wrong_month_returns_404(self):
+        """Архив за несуществующий месяц возвращает ошибку 404."""
+        response = self.guest_client.get(f'/group/{self.group.slug}/2023/13/')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_unexisting_group_returns_404(self):
+        """Страница несуществующей группы возвращает ошибку 404."""
+        response = self.guest_client.get('/group/no-such-group/')
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
     def test_unexisting_url_returns_404(self):
         """Несуществующий URL возвращает ошибку 404."""
         response = self.guest_client.get('/unexisting_page/')
@@ -7,10 +7,16 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.http import HttpResponse
-from django.test import Client, TestCase, override_settings
+from django.db import connection
+from django.http import Http404, HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 
+from posts.groups import get_group_directory, get_group_or_404
+from posts.memo import is_following
+from posts.profiles import get_profile_summary
 from posts.models import Comment, Follow, Group, Post
 
 User = get_user_model()
@@ -164,6 +170,72 @@ class PostPagesTest(TestCase):
             response=response
         )
 
+    def test_archive_pages_show_correct_context(self):
+        """Архивы группы и автора содержат посты за выбранный месяц."""
+        now = timezone.localtime()
+        urls = (
+            reverse('posts:group_archive', kwargs={
+                'slug': self.group.slug, 'year': now.year, 'month': now.month
+            }),
+            reverse('posts:profile_archive', kwargs={
+                'username': self.user.username,
+                'year': now.year,
+                'month': now.month
+            }),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                page_obj = response.context['page_obj']
+                self.assertEqual(page_obj.paginator.count, 1)
+                self._compare_post_fields(post=page_obj[0])
+                self.assertEqual(response.context['period'].month, now.month)
+
+    def test_archive_page_excludes_other_months(self):
+        """В архиве за другой месяц посты текущего месяца не выводятся."""
+        response = self.authorized_client.get(reverse(
+            'posts:group_archive',
+            kwargs={'slug': self.group.slug, 'year': 2001, 'month': 1}
+        ))
+        self.assertNotIn(self.post, response.context['page_obj'])
+        self.assertEqual(response.context['page_obj'].paginator.count, 0)
+
+    def test_group_index_show_correct_context(self):
+        """Каталог групп показывает число постов и дату последнего."""
+        empty_group = Group.objects.create(
+            title='Пустая группа',
+            slug='empty-slug',
+            description='Без постов',
+        )
+        response = self.authorized_client.get(reverse('posts:group_index'))
+        directory = {
+            item['group']: item for item in response.context['groups']
+        }
+        self.assertEqual(directory[self.group]['posts_count'], 1)
+        self.assertEqual(
+            directory[self.group]['last_pub_date'], self.post.pub_date
+        )
+        self.assertEqual(directory[empty_group]['posts_count'], 0)
+        self.assertIsNone(directory[empty_group]['last_pub_date'])
+
+    def test_group_index_stats_are_cached(self):
+        """Счётчики каталога групп не пересчитываются на каждый запрос."""
+        self.authorized_client.get(reverse('posts:group_index'))
+        with self.assertNumQueries(0):
+            get_group_directory()
+
+    def test_group_lookup_uses_cache(self):
+        """Группа по слагу берётся из кэша и обновляется после правки."""
+        get_group_or_404(self.group.slug)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_group_or_404(self.group.slug), self.group)
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(
+            get_group_or_404(self.group.slug).title, 'Новое название'
+        )
+
     def test_follow_index_show_correct_context(self):
         """Шаблон follow_index сформирован с правильным контекстом."""
         user = User.objects.create_user(username='follower')
@@ -209,6 +281,21 @@ class PostPagesTest(TestCase):
             response=response
         )
 
+    def test_create_post_groups_from_group_cache(self):
+        """Список групп формы берётся из кэша групп, без запроса."""
+        get_group_or_404(self.group.slug)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(
+                reverse('posts:post_create')
+            )
+        self.assertContains(
+            response, f'<option value="{self.group.pk}">{self.group}'
+        )
+        self.assertFalse([
+            query for query in queries
+            if 'FROM "posts_group"' in query['sql']
+        ])
+
     def test_edit_post_show_correct_context(self):
         """Шаблон post_edit сформирован с правильным контекстом."""
         form_fields = {
@@ -385,6 +472,61 @@ class FollowViewsTests(TestCase):
             ).exists()
         )
 
+    def test_profile_shows_following_status(self):
+        """Профиль автора показывает, что пользователь подписан."""
+        url = reverse('posts:profile', kwargs={'username': self.author})
+        response = self.authorized_client.get(url)
+        self.assertFalse(response.context['following'])
+        Follow.objects.create(user=self.user, author=self.author)
+        response = self.authorized_client.get(url)
+        self.assertTrue(response.context['following'])
+
+    def test_profile_summary_is_cached(self):
+        """Сводка профиля берётся из кэша без запросов к БД."""
+        cache.clear()
+        get_profile_summary(self.author.username)
+        with self.assertNumQueries(0):
+            summary = get_profile_summary(self.author.username)
+        self.assertEqual(summary.user, self.author)
+        self.assertEqual(summary.display_name, self.author.username)
+
+    def test_profile_summary_invalidated_on_writes(self):
+        """Новый пост и подписка обновляют сводку профиля."""
+        cache.clear()
+        summary = get_profile_summary(self.author.username)
+        self.assertEqual(
+            (summary.posts_count, summary.followers_count), (0, 0)
+        )
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        Follow.objects.create(user=self.user, author=self.author)
+        summary = get_profile_summary(self.author.username)
+        self.assertEqual(
+            (summary.posts_count, summary.followers_count), (1, 1)
+        )
+        self.assertEqual(summary.last_pub_date, post.pub_date)
+        self.assertEqual(
+            get_profile_summary(self.user.username).following_count, 1
+        )
+
+    def test_profile_summary_invalidated_on_user_delete(self):
+        """Профиль удалённого пользователя больше не показывается."""
+        user = User.objects.create_user(username='leaving')
+        get_profile_summary(user.username)
+        user.delete()
+        with self.assertRaises(Http404):
+            get_profile_summary('leaving')
+
+    def test_follow_status_checked_once_per_author(self):
+        """Подписка на автора проверяется одним запросом за запрос."""
+        Follow.objects.create(user=self.user, author=self.author)
+        request = RequestFactory().get('/')
+        request.user = self.user
+        with self.assertNumQueries(1):
+            self.assertTrue(is_following(request, self.author.pk))
+            self.assertTrue(is_following(request, self.author.pk))
+        with self.assertNumQueries(1):
+            self.assertFalse(is_following(request, self.user.pk))
+
     def test_self_following_forbidden(self):
         """Пользователь не может подписываться на себя."""
         follow_count = Follow.objects.count()
@@ -6,17 +6,41 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('groups/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/<int:year>/<int:month>/',
+        views.group_archive,
+        name='group_archive'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/<int:year>/<int:month>/',
+        views.profile_archive,
+        name='profile_archive'
+    ),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
+    path('tags/<str:name>/', views.tag_posts, name='tag_posts'),
     path('create/', views.post_create, name='post_create'),
+    path('create/scheduled/', views.post_schedule, name='post_schedule'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/delete/',
+        views.post_delete,
+        name='post_delete'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('posts/new/', views.new_posts, name='new_posts'),
+    path(
+        'notifications/',
+        views.notifications,
+        name='notifications'
+    ),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
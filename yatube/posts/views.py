@@ -1,71 +1,276 @@
+from datetime import datetime
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils import timezone
+
+from core.spam import DUPLICATE, FLOOD, check_text
+from posts.archiving import (
+    PostsWithArchive, archived_posts, get_post_comments
+)
+from posts.models import (
+    ArchivedComment, ArchivedPost, Follow, Notification, Post,
+    PostArchiveBucket, Tag, User
+)
+from posts.feeds import get_feed_queryset, get_new_posts
+from posts.forms import CommentForm, PostForm, ScheduledPostForm
+from posts.groups import get_group_directory, get_group_or_404
+from posts.memo import get_groups, get_suggestions, is_following
+from posts.notifications import mark_read
+from posts.pages import cache_index
+from posts.profiles import get_profile_summary
+from posts.ranking import get_ranked_page
+from posts.related import get_related_posts
+from posts.scheduling import publish_if_due
+from posts.tags import get_tag_page
+from posts.tasks import warm_post_thumbnail
+
+DUPLICATE_ERROR = 'Вы недавно уже публиковали почти такой же текст.'
+FLOOD_ERROR = 'Почти такой же текст недавно публиковали другие авторы.'
+SPAM_ERRORS = {DUPLICATE: DUPLICATE_ERROR, FLOOD: FLOOD_ERROR}
+
+
+def get_page_obj(request, post_list, count=None):
+    """Получить страницу постов; count позволяет не выполнять COUNT(*)."""
+    paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
+    if count is not None:
+        paginator.count = count
+    return paginator.get_page(request.GET.get('page'))
 
-from posts.models import Follow, Group, Post, User
-from posts.forms import CommentForm, PostForm
 
+def screen_post(form, author_id, check_author=True, hold_flood=True):
+    """Проверить текст формы поста на повтор и рассылку.
+
+    Повтор добавляется в ошибки формы, и функция возвращает None.
+    Иначе возвращается несохранённый пост; рассылка попадает в
+    черновики без времени публикации, а без ``hold_flood`` тоже
+    становится ошибкой формы.
+    """
+    verdict = check_text(
+        author_id, form.cleaned_data['text'], check_author=check_author
+    )
+    if verdict == DUPLICATE or verdict == FLOOD and not hold_flood:
+        form.add_error('text', SPAM_ERRORS[verdict])
+        return None
+    post = form.save(commit=False)
+    if verdict == FLOOD:
+        post.is_published = False
+        post.publish_at = None
+    return post
 
-@cache_page(settings.CACHE_DURABILITY, key_prefix='index_page')
+
+def get_month_bounds(year, month):
+    """Вернуть границы месяца [начало, конец) для запроса по pub_date."""
+    if not (1 <= month <= 12 and 1 <= year < 9999):
+        raise Http404('Некорректный период архива')
+    start = timezone.make_aware(datetime(year, month, 1))
+    end = timezone.make_aware(
+        datetime(year + month // 12, month % 12 + 1, 1)
+    )
+    return start, end
+
+
+def get_archive_context(request, post_list, year, month, **scope):
+    """Собрать контекст архивной страницы по месячным счётчикам.
+
+    Счётчик месяца включает посты, перенесённые в архив, и страница
+    листает их следом за живыми.
+    """
+    start, end = get_month_bounds(year, month)
+    buckets = PostArchiveBucket.objects.filter(
+        posts_count__gt=0, **scope
+    ).only('year', 'month', 'posts_count')
+    bucket = next(
+        (item for item in buckets
+         if (item.year, item.month) == (year, month)),
+        None
+    )
+    count = bucket.posts_count if bucket else 0
+    post_list = PostsWithArchive(
+        post_list.filter(pub_date__gte=start, pub_date__lt=end),
+        archived_posts().filter(
+            pub_date__gte=start, pub_date__lt=end, **scope
+        ),
+        count
+    )
+    return {
+        'period': start,
+        'archive_buckets': buckets,
+        'page_obj': get_page_obj(request, post_list, count=count),
+    }
+
+
+def get_index_posts():
+    return Post.objects.published().select_related('author', 'group')
+
+
+@cache_index
 def index(request):
     template = 'posts/index.html'
-    post_list = Post.objects.select_related('author', 'group').all()
-    paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(request, get_index_posts())
     context = {
         'page_obj': page_obj,
     }
     return render(request, template, context)
 
 
+def group_index(request):
+    template = 'posts/group_index.html'
+    context = {
+        'groups': get_group_directory(),
+    }
+    return render(request, template, context)
+
+
+def get_group_posts(group):
+    return group.posts.published().select_related('author', 'group')
+
+
+def get_group_buckets(group):
+    return group.archive_buckets.filter(posts_count__gt=0)
+
+
 def group_posts(request, slug):
     template = 'posts/group_list.html'
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author', 'group').all()
-    paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    group = get_group_or_404(slug)
+    page_obj = get_page_obj(request, get_group_posts(group))
     context = {
         'group': group,
         'page_obj': page_obj,
+        'archive_buckets': get_group_buckets(group),
     }
     return render(request, template, context)
 
 
+def group_archive(request, slug, year, month):
+    template = 'posts/archive.html'
+    group = get_group_or_404(slug)
+    post_list = group.posts.published().select_related('author', 'group')
+    context = get_archive_context(
+        request, post_list, year, month, group=group
+    )
+    context['group'] = group
+    return render(request, template, context)
+
+
+def get_profile_posts(summary):
+    """Посты профиля, включая архивные, в порядке ленты."""
+    return PostsWithArchive(
+        Post.objects.published().filter(author_id=summary.user_id)
+        .select_related('author', 'group'),
+        archived_posts().filter(author_id=summary.user_id),
+        summary.posts_count
+    )
+
+
+def get_profile_context(summary, page_obj):
+    """Контекст профиля, одинаковый для всех читателей."""
+    return {
+        'user_obj': summary.user,
+        'summary': summary,
+        'page_obj': page_obj,
+        'archive_buckets': summary.archive_buckets,
+    }
+
+
 def profile(request, username):
     template = 'posts/profile.html'
+    summary = get_profile_summary(username)
+    page_obj = get_page_obj(
+        request, get_profile_posts(summary), count=summary.posts_count
+    )
+    context = get_profile_context(summary, page_obj)
+    user_obj = context['user_obj']
+    if request.user.is_authenticated:
+        context['following'] = is_following(request, user_obj.pk)
+        context['suggestions'] = get_suggestions(request)
+    if request.user.pk == user_obj.pk:
+        context['drafts'] = user_obj.posts.drafts().order_by('publish_at')
+    return render(request, template, context)
+
+
+def profile_archive(request, username, year, month):
+    template = 'posts/archive.html'
     user_obj = get_object_or_404(User, username=username)
-    post_list = user_obj.posts.select_related('author', 'group').all()
-    paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = user_obj.posts.published().select_related(
+        'author', 'group'
+    )
+    context = get_archive_context(
+        request, post_list, year, month, author=user_obj
+    )
+    context['user_obj'] = user_obj
+    return render(request, template, context)
+
+
+def get_post_tags(post_id):
+    return Tag.objects.filter(post_tags__post_id=post_id)
+
+
+def check_post_visible(request, post):
+    if post.deleted_at or (
+        not post.is_published and request.user != post.author
+    ):
+        raise Http404('Пост не опубликован.')
+
+
+def get_post_context(post, comments, related_posts, tags):
+    """Контекст страницы поста по уже полученным частям."""
+    return {
+        'posts_count': post.author.posts.published().count(),
+        'post': post,
+        'form': CommentForm(),
+        'comments': comments,
+        'related_posts': related_posts,
+        'tags': tags,
+    }
+
+
+def post_detail(request, post_id):
+    template = 'posts/post_detail.html'
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None:
+        return archived_post_detail(request, post_id)
+    check_post_visible(request, post)
+    context = get_post_context(
+        post,
+        get_post_comments(post.pk),
+        get_related_posts(post.pk),
+        get_post_tags(post.pk),
+    )
+    return render(request, template, context)
+
+
+def tag_posts(request, name):
+    """Посты с тегом, от новых к старым, с курсором вместо страниц."""
+    template = 'posts/tag.html'
+    tag = get_object_or_404(Tag, name=name.lower())
+    posts, next_cursor = get_tag_page(tag, request.GET.get('cursor'))
     context = {
-        'user_obj': user_obj,
-        'page_obj': page_obj,
+        'tag': tag,
+        'page_obj': posts,
+        'next_cursor': next_cursor,
     }
-    if request.user.is_authenticated:
-        following = Follow.objects.filter(
-            user=request.user,
-            author=user_obj
-        ).exists()
-        context['following'] = following
     return render(request, template, context)
 
 
-def post_detail(request, post_id):
+def archived_post_detail(request, post_id):
+    """Пост, перенесённый командой archive_posts, только для чтения."""
     template = 'posts/post_detail.html'
-    post = get_object_or_404(Post, pk=post_id)
-    form = CommentForm()
-    comments = post.comments.select_related('author', 'post').all()
-    posts_count = post.author.posts.all().count()
+    post = get_object_or_404(
+        ArchivedPost.objects.select_related('author', 'group'),
+        pk=post_id,
+        deleted_at__isnull=True
+    )
     context = {
-        'posts_count': posts_count,
+        'posts_count': post.author.posts.published().count(),
         'post': post,
-        'form': form,
-        'comments': comments,
+        'comments': ArchivedComment.objects.filter(
+            post_id=post.pk
+        ).select_related('author'),
+        'is_archived': True,
     }
     return render(request, template, context)
 
@@ -74,37 +279,69 @@ def post_detail(request, post_id):
 def post_create(request):
     template = 'posts/create_post.html'
     if request.method != 'POST':
-        form = PostForm()
+        form = PostForm(groups=get_groups(request))
         return render(request, template, {'form': form})
     form = PostForm(
         request.POST or None,
-        files=request.FILES or None
+        files=request.FILES or None,
+        groups=get_groups(request)
     )
     if not form.is_valid():
         return render(request, template, {'form': form})
-    new_post = form.save(commit=False)
+    new_post = screen_post(form, request.user.pk)
+    if new_post is None:
+        return render(request, template, {'form': form})
     new_post.author = request.user
     new_post.save()
+    if new_post.image:
+        warm_post_thumbnail.delay(new_post.pk)
+    return redirect('posts:profile', request.user.username)
+
+
+@login_required
+def post_schedule(request):
+    template = 'posts/create_post.html'
+    if request.method != 'POST':
+        form = ScheduledPostForm(groups=get_groups(request))
+        return render(request, template, {'form': form, 'is_schedule': True})
+    form = ScheduledPostForm(
+        request.POST or None,
+        files=request.FILES or None,
+        groups=get_groups(request)
+    )
+    if not form.is_valid():
+        return render(request, template, {'form': form, 'is_schedule': True})
+    new_post = screen_post(form, request.user.pk)
+    if new_post is None:
+        return render(request, template, {'form': form, 'is_schedule': True})
+    new_post.author = request.user
+    new_post.is_published = False
+    new_post.save()
+    publish_if_due(new_post)
+    if new_post.image:
+        warm_post_thumbnail.delay(new_post.pk)
     return redirect('posts:profile', request.user.username)
 
 
 @login_required
 def post_edit(request, post_id):
     template = 'posts/create_post.html'
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post, pk=post_id, deleted_at__isnull=True)
     if request.user != post.author:
         return redirect(post)
+    form_class = PostForm if post.is_published else ScheduledPostForm
     if request.method != 'POST':
-        form = PostForm(instance=post)
+        form = form_class(instance=post, groups=get_groups(request))
         context = {
             'form': form,
             'is_edit': True
         }
         return render(request, template, context)
-    form = PostForm(
+    form = form_class(
         request.POST or None,
         files=request.FILES or None,
-        instance=post
+        instance=post,
+        groups=get_groups(request)
     )
     if not form.is_valid():
         context = {
@@ -112,37 +349,99 @@ def post_edit(request, post_id):
             'is_edit': True
         }
         return render(request, template, context)
-    form.save()
+    if {'text', 'publish_at'} & set(form.changed_data):
+        # Прежний текст поста есть среди подписей автора, поэтому
+        # правка проверяется только на рассылку. Рассылка отклоняется:
+        # правка не должна снимать пост с публикации.
+        post = screen_post(
+            form, request.user.pk, check_author=False, hold_flood=False
+        )
+        if post is None:
+            context = {
+                'form': form,
+                'is_edit': True
+            }
+            return render(request, template, context)
+        post.save()
+    else:
+        post = form.save()
+    if not post.is_published:
+        publish_if_due(post)
+    if 'image' in form.changed_data and post.image:
+        warm_post_thumbnail.delay(post.pk)
     return redirect(post)
 
 
+@login_required
+def post_delete(request, post_id):
+    post = get_object_or_404(Post, pk=post_id, deleted_at__isnull=True)
+    if request.user != post.author:
+        return redirect(post)
+    if request.method == 'POST':
+        post.soft_delete()
+    return redirect('posts:profile', request.user.username)
+
+
 @login_required
 def add_comment(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(Post.objects.published(), pk=post_id)
     form = CommentForm(request.POST or None)
-    if form.is_valid():
-        comment = form.save(commit=False)
-        comment.author = request.user
-        comment.post = post
-        comment.save()
+    if not form.is_valid():
+        return redirect(post)
+    verdict = check_text(request.user.pk, form.cleaned_data['text'])
+    if verdict:
+        # Повтор и рассылка не сохраняются: автор видит причину.
+        form.add_error('text', SPAM_ERRORS[verdict])
+        context = get_post_context(
+            post,
+            get_post_comments(post.pk),
+            get_related_posts(post.pk),
+            get_post_tags(post.pk),
+        )
+        context['form'] = form
+        return render(request, 'posts/post_detail.html', context)
+    comment = form.save(commit=False)
+    comment.author = request.user
+    comment.post = post
+    comment.save()
     return redirect(post)
 
 
 @login_required
 def follow_index(request):
     template = 'posts/follow.html'
-    post_list = Post.objects.filter(
+    if request.GET.get('mode') == 'ranked':
+        posts, next_cursor = get_ranked_page(
+            request.user.pk, request.GET.get('cursor')
+        )
+        context = {
+            'page_obj': posts,
+            'ranked': True,
+            'next_cursor': next_cursor,
+            'suggestions': get_suggestions(request),
+        }
+        return render(request, template, context)
+    post_list = Post.objects.published().filter(
         author__following__user=request.user
     ).select_related('author', 'group')
-    paginator = Paginator(post_list, settings.POSTS_ON_PAGE)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    page_obj = get_page_obj(request, post_list)
     context = {
         'page_obj': page_obj,
+        'suggestions': get_suggestions(request),
     }
     return render(request, template, context)
 
 
+def new_posts(request):
+    """Количество и id постов ленты, опубликованных после курсора."""
+    queryset = get_feed_queryset(
+        request.GET.get('feed', 'index'),
+        user_id=request.user.pk,
+        slug=request.GET.get('slug'),
+    )
+    return JsonResponse(get_new_posts(queryset, request.GET.get('since')))
+
+
 @login_required
 def profile_follow(request, username):
     author = get_object_or_404(User, username=username)
@@ -161,3 +460,24 @@ def profile_unfollow(request, username):
     if follow.exists():
         follow.delete()
     return redirect('posts:profile', username)
+
+
+@login_required
+def notifications(request):
+    """Уведомления пользователя; показанные на странице отмечаются
+    прочитанными.
+    """
+    template = 'posts/notifications.html'
+    notification_list = Notification.objects.filter(
+        recipient=request.user
+    ).select_related('actor', 'post')
+    page_obj = get_page_obj(request, notification_list)
+    page_obj.object_list = list(page_obj.object_list)
+    mark_read(
+        request.user.pk,
+        [notification.pk for notification in page_obj.object_list]
+    )
+    context = {
+        'page_obj': page_obj,
+    }
+    return render(request, template, context)
@@ -1,4 +1,5 @@
 from django.contrib.auth import get_user_model
+from django.core import mail
 from django.test import Client, TestCase
 from django.urls import reverse
 
@@ -35,3 +36,5 @@ class UsersCreationFormTests(TestCase):
                 email='ivasya@pochta.com',
             ).exists()
         )
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['ivasya@pochta.com'])
@@ -1,4 +1,6 @@
-from django.urls import reverse_lazy
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
+from django.urls import reverse, reverse_lazy
 from django.views.generic import CreateView
 
 from users.forms import CreationForm
@@ -8,3 +10,23 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        if self.object.email:
+            self.send_welcome_email(self.object)
+        return response
+
+    def send_welcome_email(self, user):
+        """Отправить приветственное письмо; доставку выполняет воркер."""
+        context = {
+            'user': user,
+            'login_url': self.request.build_absolute_uri(
+                reverse('users:login')
+            ),
+        }
+        subject = render_to_string(
+            'users/emails/welcome_subject.txt', context
+        ).strip()
+        body = render_to_string('users/emails/welcome.txt', context)
+        send_mail(subject, body, None, [user.email])
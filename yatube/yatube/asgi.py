@@ -0,0 +1,48 @@
+"""
+ASGI config for yatube project.
+
+Run it under any ASGI server, for example:
+
+    uvicorn yatube.asgi:application
+
+Read-heavy pages for anonymous readers are served by the async views in
+posts.async_views, the stream of new posts by posts.streams, and every
+other request by the regular WSGI application in a bounded thread pool.
+"""
+
+import os
+
+import django
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+django.setup()
+
+from core.asgi import AsyncRouter, WsgiBridge  # noqa: E402
+from posts.async_views import ASYNC_VIEWS  # noqa: E402
+from posts.streams import posts_stream  # noqa: E402
+
+STREAM_PATH = '/stream/posts/'
+
+django_application = AsyncRouter(
+    ASYNC_VIEWS, WsgiBridge(get_wsgi_application())
+)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http' and scope['path'] == STREAM_PATH:
+        await posts_stream(scope, receive, send)
+    elif scope['type'] == 'http':
+        await django_application(scope, receive, send)
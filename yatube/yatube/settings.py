@@ -42,8 +42,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'core.middleware.ratelimit.RateLimitMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -57,14 +59,21 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'core.context_processors.year.year',
+                'core.context_processors.memo.memo',
+                'posts.context_processors.memo',
             ],
         },
     },
@@ -75,8 +84,14 @@ WSGI_APPLICATION = 'yatube.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'core.db.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 5,
+            'lock_retries': 3,
+            'lock_retry_delay': 0.05,
+        },
     }
 }
 
@@ -117,7 +132,9 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+
+EMAIL_DELIVERY_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
@@ -132,8 +149,173 @@ MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+SESSION_ENGINE = 'core.sessions'
+
+SESSION_FLUSH_DELAY = 5
+
+PROFILE_SUMMARY_TIMEOUT = 60 * 60
+
+# Сколько секунд каталог групп показывает закэшированные счётчики.
+GROUP_DIRECTORY_TIMEOUT = 60
+
+SCHEDULER_BATCH = 100
+
+SCHEDULER_POLL_INTERVAL = 30
+
+NEW_POSTS_LIMIT = 50
+
+SSE_POLL_INTERVAL = 5
+
+SSE_HEARTBEAT_INTERVAL = 15
+
+ASGI_THREADS = 8
+
+BENCH_CLIENTS = 32
+
+POSTS_ARCHIVE_AFTER_DAYS = 365
+
+POSTS_ARCHIVE_BATCH = 500
+
+ADMIN_COUNT_CACHE_TIMEOUT = 60
+
+FEED_CANDIDATES = 500
+
+FEED_CANDIDATE_DAYS = 14
+
+FEED_RECENCY_HALF_LIFE = 12 * 60 * 60
+
+FEED_RANK_TIMEOUT = 60
+
+FEED_CURSOR_TIMEOUT = 30 * 60
+
+# Оценщики ранжированной ленты подписок: (путь к функции, вес).
+FEED_SCORERS = (
+    ('posts.ranking.recency', 1.0),
+    ('posts.ranking.affinity', 0.5),
+    ('posts.ranking.discussion', 0.25),
+)
+
+SUGGESTIONS_TOP_K = 10
+
+SUGGESTIONS_BATCH = 500
+
+SUGGESTIONS_ON_PAGE = 5
+
+SUGGESTIONS_WEIGHTS = {
+    'friends': 1.0,
+    'cofollow': 1.0,
+}
+
+RELATED_POSTS_COUNT = 5
+
+RELATED_POSTS_MIN_SCORE = 0.1
+
+RELATED_POSTS_BATCH = 500
+
+RELATED_MIN_WORD_LENGTH = 3
+
+RELATED_MINHASH_PERMUTATIONS = 64
+
+# 32 полосы по 2 строки: кандидатами становятся посты со сходством
+# по Жаккару примерно от 0.2.
+RELATED_LSH_BANDS = 32
+
+NOTIFICATIONS_COUNT_TIMEOUT = 60 * 60
+
+NOTIFICATIONS_DIGEST_BATCH = 200
+
+MODERATION_CHUNK_SIZE = 500
+
+MODERATION_CHUNKS_PER_TASK = 10
+
+RATELIMIT_ENABLED = True
+
+RATELIMIT_CACHE_ALIAS = 'ratelimit'
+
+RATELIMIT_TRUST_FORWARDED = False
+
+# Имя URL: (лимит, методы). Подписка выполняется GET-запросом по ссылке.
+RATELIMITS = {
+    'posts:post_create': ('20/m', ('POST',)),
+    'posts:post_schedule': ('20/m', ('POST',)),
+    'posts:add_comment': ('30/m', ('POST',)),
+    'posts:profile_follow': ('60/m', ('GET', 'POST')),
+    'users:signup': ('10/h', ('POST',)),
+}
+
+SPAM_CHECK_ENABLED = True
+
+# Сколько секунд тексты постов и комментариев участвуют в проверке.
+SPAM_WINDOW = 24 * 60 * 60
+
+# Подписи недавних текстов; отдельный файл, чтобы записи не ждали
+# очередь задач.
+SPAM_STORE_PATH = os.path.join(BASE_DIR, 'spam.sqlite3')
+
+SPAM_SHINGLE_SIZE = 3
+
+# Короткие тексты («Спасибо!») не проверяются.
+SPAM_MIN_SHINGLES = 5
+
+SPAM_MINHASH_PERMUTATIONS = 64
+
+# Все авторы: 8 полос по 8 строк, кандидаты — от ~0.77 по Жаккару.
+SPAM_GLOBAL_BANDS = 8
+
+SPAM_GLOBAL_THRESHOLD = 0.8
+
+# Со скольких других авторов похожий текст считается рассылкой.
+SPAM_FLOOD_AUTHORS = 2
+
+# Свои тексты автора: 16 полос по 4 строки, кандидаты — от ~0.5.
+SPAM_AUTHOR_BANDS = 16
+
+SPAM_AUTHOR_THRESHOLD = 0.6
+
+# Файловый кэш SQLite общий для всех процессов: выход из аккаунта,
+# сброс счётчиков и лимиты запросов видны каждому воркеру.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
+    # Счётчики лимитов запросов в отдельном файле: их не вытесняют
+    # страницы из общего кэша и не стирает его очистка.
+    'ratelimit': {
+        'BACKEND': 'core.cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'ratelimit.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
+
+TASKS_ALWAYS_EAGER = False
+
+# Тесты пишут очередь задач во временный каталог.
+TEST_RUNNER = 'core.runner.TestRunner'
+
+TASKS_QUEUE_PATH = os.path.join(BASE_DIR, 'tasks.sqlite3')
+
+TASKS_WORKER_PROCESSES = 2
+
+TASKS_WORKER_BATCH = 20
+
+TASKS_POLL_INTERVAL = 1.0
+
+TASKS_STALE_TIMEOUT = 300
+
+PROFILING_ENABLED = False
+
+PROFILING_SAMPLE_RATE = 0.01
+
+PROFILING_SAMPLE_INTERVAL = 0.005
+
+PROFILING_HEADER_MAX_AGE = 60 * 60
+
+PROFILING_DIR = os.path.join(BASE_DIR, 'profiles')
+
+PROFILING_MAX_FILES = 200